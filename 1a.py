@@ -6,7 +6,6 @@ from tkinter import ttk, filedialog, messagebox
 import pandas as pd
 import os
 import json
-from persiantools.jdatetime import JalaliDate
 from openpyxl import load_workbook, Workbook
 from openpyxl.drawing.image import Image as XLImage
 from openpyxl.styles import Font, PatternFill, Alignment
@@ -18,9 +17,17 @@ from PIL import Image, ImageTk
 import traceback
 import warnings
 import logging
-import re
 import numpy as np
 from datetime import datetime
+from excel_stream import read_sheet
+from background_task import BackgroundTask
+from data_schema import typed_dataset, distinct_strings, decimal_hours, HOURS_DECIMALS
+from jalali_dates import DAY_MISSING, jalali_to_day, day_to_jalali, to_day_ordinals
+from repair_normalizer import ColumnNormalizer, NormalizationMemo
+from repair_rules import RepairRuleEngine
+from persian_text import canonical_text
+from column_resolver import ColumnResolver
+from filter_index import AdjacencyIndex, FilterIndex
 
 # تنظیمات لاگینگ
 logging.basicConfig(
@@ -46,6 +53,8 @@ except ImportError:
 # -----------------------------
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 SETTINGS_PATH = os.path.join(BASE_DIR, "settings.json")
+# نگاشت ستون‌ها به ازای هر ساختار هدر (مشترک با report_excel.py)
+COLUMN_MAP_PATH = os.path.join(BASE_DIR, "column_map.json")
 
 
 # -----------------------------
@@ -136,43 +145,14 @@ def save_settings(data):
 
 
 # -----------------------------
-def find_column(columns, possible_names):
-    """
-    پیدا کردن ستون در لیست ستون‌ها بر اساس نام‌های احتمالی
-    """
-    for name in possible_names:
-        for col in columns:
-            if name.strip().lower() in str(col).strip().lower():
-                return col
-    return None
+# قواعد مرتب نرمالایز نوع تعمیر از کلید repair_rules در settings.json
+normalize_repair_type = RepairRuleEngine.from_settings(SETTINGS_PATH)
 
+# نرمالایز ستون نوع تعمیر روی مقادیر یکتا، با memo پایدار بین اجراها
+REPAIR_NORMALIZER = ColumnNormalizer(normalize_repair_type,
+                                     NormalizationMemo(os.path.join(BASE_DIR, "cache", "normalize_memo.json")))
 
-# -----------------------------
-def normalize_repair_type(repair_type):
-    """نرمالایز کردن نوع تعمیر برای تطبیق بهتر"""
-    if not isinstance(repair_type, str):
-        return str(repair_type)
-
-    repair_type = repair_type.strip()
-    repair_type = re.sub(r'[:]', '', repair_type)
-    repair_type = re.sub(r'\s+', ' ', repair_type)
-
-    if 'قالب' in repair_type and 'تعمیر' in repair_type:
-        return 'قالب تعمیری'
-    elif 'قطعه' in repair_type and 'تعمیر' in repair_type:
-        return 'قطعه تعمیری'
-    elif 'دستگاه' in repair_type and 'تعمیر' in repair_type:
-        return 'دستگاه تعمیری'
-    elif 'قالب' in repair_type:
-        return 'قالب'
-    elif 'قطعه' in repair_type:
-        return 'قطعه'
-    elif 'دستگاه' in repair_type:
-        return 'دستگاه'
-    elif 'تعمیر' in repair_type:
-        return 'تعمیری'
-    else:
-        return repair_type
+COLUMN_RESOLVER = ColumnResolver(COLUMN_MAP_PATH)
 
 
 # -----------------------------
@@ -451,10 +431,8 @@ pip install matplotlib seaborn numpy
             if (self.main_app.repair_col in df.columns and
                     self.main_app.perf_col in df.columns):
 
-                df = df.copy()
-                df[self.main_app.perf_col] = pd.to_numeric(df[self.main_app.perf_col], errors='coerce')
-
-                grouped = df.groupby(self.main_app.repair_col)[self.main_app.perf_col].sum()
+                hours = df[self.main_app.perf_col].astype("float64")
+                grouped = hours.groupby(df[self.main_app.repair_col], observed=True).sum()
                 grouped = grouped[grouped > 0].head(6)
 
                 if grouped.empty:
@@ -503,12 +481,12 @@ pip install matplotlib seaborn numpy
             stats = [("تعداد رکوردها", len(df))]
 
             if self.main_app.perf_col in df.columns:
-                df[self.main_app.perf_col] = pd.to_numeric(df[self.main_app.perf_col], errors='coerce')
+                hours = df[self.main_app.perf_col].astype("float64")
                 stats.extend([
-                    ("مجموع ساعت کاری", f"{df[self.main_app.perf_col].sum():.2f}"),
-                    ("میانگین ساعت کاری", f"{df[self.main_app.perf_col].mean():.2f}"),
-                    ("بیشترین ساعت کاری", f"{df[self.main_app.perf_col].max():.2f}"),
-                    ("کمترین ساعت کاری", f"{df[self.main_app.perf_col].min():.2f}")
+                    ("مجموع ساعت کاری", f"{hours.sum():.2f}"),
+                    ("میانگین ساعت کاری", f"{hours.mean():.2f}"),
+                    ("بیشترین ساعت کاری", f"{hours.max():.2f}"),
+                    ("کمترین ساعت کاری", f"{hours.min():.2f}")
                 ])
 
             if self.main_app.repair_col in df.columns:
@@ -544,11 +522,11 @@ pip install matplotlib seaborn numpy
             if (self.main_app.date_col in df.columns and
                     self.main_app.perf_col in df.columns):
 
-                df = df.copy()
-                df[self.main_app.perf_col] = pd.to_numeric(df[self.main_app.perf_col], errors='coerce')
-                df[self.main_app.date_col] = pd.to_datetime(df[self.main_app.date_col], errors='coerce')
+                days = to_day_ordinals(df[self.main_app.date_col])
+                hours = df[self.main_app.perf_col].astype("float64")
 
-                daily_hours = df.groupby(df[self.main_app.date_col].dt.date)[self.main_app.perf_col].sum()
+                valid = days != DAY_MISSING
+                daily_hours = hours[valid].groupby(days[valid]).sum()
                 daily_hours = daily_hours.sort_index().tail(30)
 
                 if daily_hours.empty:
@@ -561,7 +539,8 @@ pip install matplotlib seaborn numpy
                 ax.plot(range(len(daily_hours)), daily_hours.values, marker='o', linewidth=2, color='green')
                 ax.set_title('روند ساعت کاری روزانه', fontsize=12)
                 ax.set_xticks(range(len(daily_hours)))
-                ax.set_xticklabels([d.strftime('%m/%d') for d in daily_hours.index], rotation=45)
+                ax.set_xticklabels([datetime.fromordinal(int(d)).strftime('%m/%d') for d in daily_hours.index],
+                                   rotation=45)
                 ax.grid(True, alpha=0.3)
 
                 canvas = FigureCanvasTkAgg(fig, frame)
@@ -787,7 +766,6 @@ pip install matplotlib seaborn numpy
         ax = fig.add_subplot(111)
 
         if self.main_app.perf_col in df.columns:
-            df[self.main_app.perf_col] = pd.to_numeric(df[self.main_app.perf_col], errors='coerce')
             values = df[self.main_app.perf_col].head(15).dropna().values
             if len(values) == 0:
                 ttk.Label(frame, text="داده‌ی عددی برای نمودار خطی یافت نشد").pack(expand=True)
@@ -920,6 +898,10 @@ class ExcelReportApp:
         self.df_filtered = None
         self.df_normalized = None
         self.df_grouped = None
+        # ایندکس معکوس ستون‌های فیلتر روی df_normalized (filter_index)
+        self.filter_index = None
+        # نوع تعمیر ↔ قالب/قطعه/دستگاه برای کمبوباکس‌های وابسته
+        self.repair_parts = None
 
         self.repair_col = None
         self.part_col = None
@@ -928,11 +910,15 @@ class ExcelReportApp:
         self.req_col = None
         self.code_col = None
 
+        self.loading_task = None
+
         self.persian_font = register_persian_fonts()
         self.has_persian_support = self.check_persian_support()
 
         self.status_var = tk.StringVar()
         self.status_var.set("آماده")
+        # راهنمای کمترین و بیشترین تاریخ داده‌های بارگذاری شده (کنار فیلدهای تاریخ)
+        self.date_range_var = tk.StringVar()
 
         self.root.title("گزارش قالبسازی - برنامه‌ریز تعمیر و ساخت")
         geom = self.settings.get("window_size", "1200x800")
@@ -1221,8 +1207,14 @@ class ExcelReportApp:
         self.setup_filters_frame()
         self.setup_treeview()
 
-        status_label = ttk.Label(self.root, textvariable=self.status_var, relief="sunken", anchor="w")
-        status_label.pack(fill="x", padx=10, pady=5)
+        self.status_label = ttk.Label(self.root, textvariable=self.status_var, relief="sunken", anchor="w")
+        self.status_label.pack(fill="x", padx=10, pady=5)
+
+        # نوار پیشرفت بارگذاری؛ فقط هنگام خواندن فایل نمایش داده می‌شود
+        self.progress_frame = ttk.Frame(self.root)
+        self.progress_bar = ttk.Progressbar(self.progress_frame, mode="determinate", length=400)
+        self.progress_bar.pack(side="left", fill="x", expand=True, padx=5)
+        ttk.Button(self.progress_frame, text="✖ لغو", command=self.cancel_loading).pack(side="left", padx=5)
 
     def setup_filters_frame(self):
         self.frame_filters = ttk.LabelFrame(self.root, text="فیلتر ساده", padding=10)
@@ -1245,6 +1237,8 @@ class ExcelReportApp:
         ttk.Label(self.frame_filters, text="تاریخ پایان (YYYY/MM/DD):").grid(row=3, column=0, sticky="w", padx=5, pady=2)
         self.end_entry = ttk.Entry(self.frame_filters, width=15)
         self.end_entry.grid(row=3, column=1, sticky="w", padx=5, pady=2)
+        ttk.Label(self.frame_filters, textvariable=self.date_range_var, foreground="gray").grid(
+            row=2, column=2, rowspan=2, sticky="w", padx=5, pady=2)
 
         ttk.Label(self.frame_filters, text="نوع تعمیر:").grid(row=4, column=0, sticky="w", padx=5, pady=2)
         self.repair_cb = ttk.Combobox(self.frame_filters, width=30, state="readonly")
@@ -1254,6 +1248,7 @@ class ExcelReportApp:
         ttk.Label(self.frame_filters, text="قالب / قطعه / دستگاه:").grid(row=5, column=0, sticky="w", padx=5, pady=2)
         self.part_cb = ttk.Combobox(self.frame_filters, width=30, state="readonly")
         self.part_cb.grid(row=5, column=1, sticky="w", padx=5, pady=2)
+        self.part_cb.bind('<<ComboboxSelected>>', self.on_part_changed)
 
         button_frame = ttk.Frame(self.frame_filters)
         button_frame.grid(row=6, column=0, columnspan=3, pady=10)
@@ -1320,23 +1315,21 @@ class ExcelReportApp:
 
     # -------------------- Filters Logic --------------------
     def on_repair_type_changed(self, event=None):
-        if self.df_normalized is None or self.repair_col is None or self.part_col is None:
+        if self.repair_parts is None:
             return
 
         selected_repair = self.repair_cb.get()
 
         if not selected_repair or selected_repair == "(همه)":
-            part_values = ["(همه)"] + sorted(self.df[self.part_col].dropna().astype(str).unique())
+            part_values = ["(همه)"] + sorted(distinct_strings(self.df_normalized[self.part_col]))
             self.part_cb["values"] = part_values
             self.status_var.set("همه قالب/قطعه/دستگاه‌ها نمایش داده می‌شوند")
         else:
             try:
-                mask = self.df_normalized[self.repair_col].astype(str) == selected_repair
-                filtered_parts = self.df_normalized.loc[mask, self.part_col].dropna().astype(str).unique()
-
-                part_values = ["(همه)"] + sorted(filtered_parts)
+                part_values = ["(همه)"] + self.repair_parts.right_of(selected_repair)
                 self.part_cb["values"] = part_values
                 self.part_cb.set('')
+                self.repair_cb["values"] = ["(همه)"] + sorted(distinct_strings(self.df_normalized[self.repair_col]))
 
                 count = len(part_values) - 1
                 self.status_var.set(f"{count} قالب/قطعه/دستگاه برای نوع تعمیر '{selected_repair}' یافت شد")
@@ -1344,41 +1337,56 @@ class ExcelReportApp:
                 logging.error(f"Error in on_repair_type_changed: {e}")
                 self.status_var.set("خطا در فیلتر کردن داده‌ها")
 
+    def on_part_changed(self, event=None):
+        if self.repair_parts is None:
+            return
+
+        selected_part = self.part_cb.get()
+        if not selected_part or selected_part == "(همه)":
+            repair_values = sorted(distinct_strings(self.df_normalized[self.repair_col]))
+        else:
+            repair_values = self.repair_parts.left_of(selected_part)
+        self.repair_cb["values"] = ["(همه)"] + repair_values
+
     def update_repair_listbox(self):
         if self.df_normalized is not None and self.repair_col is not None:
             self.repair_listbox.delete(0, tk.END)
-            repair_types = sorted(self.df_normalized[self.repair_col].dropna().astype(str).unique())
+            repair_types = sorted(distinct_strings(self.df_normalized[self.repair_col]))
             for repair_type in repair_types:
                 self.repair_listbox.insert(tk.END, repair_type)
 
+    def update_date_range_hint(self):
+        """نمایش کمترین و بیشترین تاریخ داده‌ها از دو سر ایندکس مرتب تاریخ"""
+        dates = self.filter_index.dates if self.filter_index is not None else None
+        if dates is None or dates.min_day is None:
+            self.date_range_var.set("")
+            return
+        self.date_range_var.set(f"بازه داده‌ها: {day_to_jalali(dates.min_day)} تا {day_to_jalali(dates.max_day)}")
+
     def apply_advanced_filter(self):
         if self.df is None or self.df_normalized is None:
             messagebox.showwarning("هشدار", "ابتدا داده‌ها را بارگذاری کنید.")
             return
 
-        df = self.df.copy()
+        # شرط‌ها در طرح فیلتر جمع و فقط یک بار روی ستون‌های اصلی ارزیابی می‌شوند
+        plan = self.filter_index.plan()
 
         selected_repairs = [self.repair_listbox.get(i) for i in self.repair_listbox.curselection()]
-        if selected_repairs and self.repair_col in self.df_normalized.columns:
-            mask = self.df_normalized[self.repair_col].astype(str).isin(selected_repairs)
-            df = df[mask]
+        if selected_repairs:
+            plan.values("repair_col", selected_repairs)
 
         hour_min = self.hour_min_entry.get().strip()
         hour_max = self.hour_max_entry.get().strip()
 
-        if (hour_min or hour_max) and self.perf_col in df.columns:
+        if (hour_min or hour_max) and self.perf_col in self.df.columns:
             try:
-                df[self.perf_col] = pd.to_numeric(df[self.perf_col], errors="coerce")
-
-                if hour_min and hour_max:
-                    df = df[(df[self.perf_col] >= float(hour_min)) & (df[self.perf_col] <= float(hour_max))]
-                elif hour_min:
-                    df = df[df[self.perf_col] >= float(hour_min)]
-                elif hour_max:
-                    df = df[df[self.perf_col] <= float(hour_max)]
+                plan.between(self.df[self.perf_col].to_numpy(),
+                             float(hour_min) if hour_min else None,
+                             float(hour_max) if hour_max else None)
             except ValueError:
                 messagebox.showerror("خطا", "مقادیر ساعت باید عددی باشند.")
 
+        df = plan.take(self.df)
         self.df_filtered = df
         self.update_treeview(df)
 
@@ -1413,15 +1421,11 @@ class ExcelReportApp:
                 messagebox.showerror("خطا", "ستون‌های لازم برای گروه‌بندی یافت نشد.")
                 return
 
-            if self.perf_col in self.df_filtered.columns:
-                self.df_filtered[self.perf_col] = pd.to_numeric(
-                    self.df_filtered[self.perf_col],
-                    errors="coerce"
-                ).fillna(0)
-
-            grouped_df = self.df_filtered.groupby(grouping_cols, as_index=False).agg({
-                self.perf_col: 'sum'
-            })
+            # جمع ساعت‌های float32 در float64 روی مقادیر اعشاری ورودی
+            hours = decimal_hours(self.df_filtered[self.perf_col])
+            # کلیدهای متعارف df_normalized هم‌تراز با ردیف‌های فیلتر شده
+            keys = [self.df_normalized.loc[self.df_filtered.index, col] for col in grouping_cols]
+            grouped_df = hours.groupby(keys, observed=True).sum().round(HOURS_DECIMALS).reset_index()
 
             grouped_df = grouped_df.sort_values(by=self.perf_col, ascending=False)
 
@@ -1636,65 +1640,102 @@ class ExcelReportApp:
             messagebox.showerror("خطا", "فایل و شیت را انتخاب کنید.")
             return
 
+        if self.loading_task is not None and self.loading_task.running:
+            self.status_var.set("بارگذاری دیگری در حال انجام است")
+            return
+
         # پاک‌سازی قبلی
-        for attr in ['df', 'df_filtered', 'df_normalized', 'df_grouped']:
+        for attr in ['df', 'df_filtered', 'df_normalized', 'df_grouped', 'filter_index', 'repair_parts']:
             if hasattr(self, attr):
                 setattr(self, attr, None)
 
-        self.set_loading_cursor(True)
-        try:
-            wb = load_workbook(path, data_only=True, read_only=True)
-            ws = wb[sheet]
-            rows = list(ws.values)
-            wb.close()
-
-            if not rows:
+        # خواندن، تشخیص ستون‌ها و نرمالایز در ترد کارگر انجام می‌شود
+        def work(progress, cancel_event):
+            df = read_sheet(path, sheet, progress=progress)
+            if df is None:
+                return None
+
+            columns = self.detect_column_names(df)
+            normalized = None
+            repair_col = columns["repair_col"]
+            if repair_col and repair_col in df.columns:
+                normalized = pd.DataFrame({repair_col: REPAIR_NORMALIZER.normalize(df[repair_col])})
+            df_normalized = typed_dataset(df, columns, normalized)
+            return df, df_normalized, columns, FilterIndex(df_normalized, columns)
+
+        def done(result):
+            self.finish_loading()
+            if result is None:
                 messagebox.showerror("خطا", "شیت انتخاب‌شده خالی است.")
                 return
 
-            headers = [str(x).strip() if x else "" for x in rows[0]]
-            df = pd.DataFrame(rows[1:], columns=headers)
+            df, df_normalized, columns, filter_index = result
             self.df = df
-
-            # تشخیص ستون‌ها
-            self.detect_columns(df)
-
-            # ساخت df_normalized پس از تشخیص ستون repair_col
-            self.df_normalized = df.copy()
-            if self.repair_col and self.repair_col in df.columns:
-                self.df_normalized[self.repair_col] = self.df_normalized[self.repair_col].apply(normalize_repair_type)
+            self.df_normalized = df_normalized
+            self.filter_index = filter_index
+            for attr, col in columns.items():
+                setattr(self, attr, col)
 
             self.settings["last_sheet"] = sheet
             save_settings(self.settings)
 
             self.populate_comboboxes(self.df_normalized)
             self.update_repair_listbox()
+            self.update_date_range_hint()
 
             record_count = len(df)
             self.status_var.set(f"تعداد {record_count} رکورد بارگذاری شد")
             messagebox.showinfo("موفق", f"اطلاعات بارگذاری و نرمالایز شد. ({record_count} رکورد)")
 
-        except Exception as e:
-            logging.error(f"Error loading values: {e}")
-            messagebox.showerror("خطا", f"خطا در بارگذاری داده‌ها: {str(e)}")
-        finally:
-            self.set_loading_cursor(False)
+        def error(exc):
+            self.finish_loading()
+            messagebox.showerror("خطا", f"خطا در بارگذاری داده‌ها: {str(exc)}")
+
+        def cancelled():
+            self.finish_loading()
+            self.status_var.set("بارگذاری لغو شد")
+
+        def progress(done_count, total):
+            self.progress_bar["maximum"] = max(total, 1)
+            self.progress_bar["value"] = done_count
+            self.status_var.set(f"در حال خواندن شیت '{sheet}' ({done_count} از {total})")
+
+        self.root.config(cursor="watch")
+        self.progress_bar["value"] = 0
+        self.progress_frame.pack(fill="x", padx=10, before=self.status_label)
+        self.status_var.set(f"در حال خواندن شیت '{sheet}'")
+        self.loading_task = BackgroundTask(self.root, work, done, on_error=error,
+                                           on_progress=progress, on_cancel=cancelled).start()
+
+    def finish_loading(self):
+        self.loading_task = None
+        self.progress_frame.pack_forget()
+        self.root.config(cursor="")
+
+    def cancel_loading(self):
+        if self.loading_task is not None:
+            self.loading_task.cancel()
+            self.status_var.set("در حال لغو بارگذاری...")
+
+    def detect_column_names(self, df):
+        return COLUMN_RESOLVER.resolve(df.columns)
 
     def detect_columns(self, df):
-        self.repair_col = find_column(df.columns, ["نوع تعمیر", "تعمیر", "repair"])
-        self.part_col = find_column(df.columns, ["قالب / قطعه / دستگاه", "قالب", "قطعه", "دستگاه", "part", "device"])
-        self.date_col = find_column(df.columns, ["تاریخ", "date"])
-        self.perf_col = find_column(df.columns, ["مقدار ساعت کار شده", "ساعت", "hour", "time"])
-        self.req_col = find_column(df.columns, ["شماره نامه درخواست", "شماره درخواست", "request"])
-        self.code_col = find_column(df.columns, ["کد قالب", "کد", "code"])
+        for attr, col in self.detect_column_names(df).items():
+            setattr(self, attr, col)
 
     def populate_comboboxes(self, df):
+        if self.repair_col in df.columns and self.part_col in df.columns:
+            self.repair_parts = AdjacencyIndex(df[self.repair_col], df[self.part_col])
+        else:
+            self.repair_parts = None
+
         if self.repair_col in df.columns:
-            repair_values = ["(همه)"] + sorted(df[self.repair_col].dropna().astype(str).unique())
+            repair_values = ["(همه)"] + sorted(distinct_strings(df[self.repair_col]))
             self.repair_cb["values"] = repair_values
 
         if self.part_col in df.columns:
-            part_values = ["(همه)"] + sorted(df[self.part_col].dropna().astype(str).unique())
+            part_values = ["(همه)"] + sorted(distinct_strings(df[self.part_col]))
             self.part_cb["values"] = part_values
 
     def set_loading_cursor(self, loading):
@@ -1707,8 +1748,6 @@ class ExcelReportApp:
             messagebox.showwarning("هشدار", "ابتدا داده‌ها را بارگذاری کنید.")
             return
 
-        df = self.df.copy()
-
         s = self.start_entry.get().strip()
         e = self.end_entry.get().strip()
 
@@ -1720,32 +1759,33 @@ class ExcelReportApp:
         self.settings["filters"]["end_date"] = e
         save_settings(self.settings)
 
-        if s and e and self.date_col:
-            try:
-                s_g = JalaliDate.strptime(s, "%Y/%m/%d").to_gregorian()
-                e_g = JalaliDate.strptime(e, "%Y/%m/%d").to_gregorian()
-                df[self.date_col] = pd.to_datetime(df[self.date_col], errors="coerce")
-                df = df[(df[self.date_col] >= s_g) & (df[self.date_col] <= e_g)]
-                self.status_var.set(f"فیلتر تاریخ اعمال شد: {s} تا {e}")
-            except Exception as exc:
-                logging.error(f"Date filter error: {exc}")
-                messagebox.showerror("خطا", "فرمت تاریخ اشتباه است. از فرمت YYYY/MM/DD استفاده کنید.")
-
+        # نوع تعمیر و قالب/قطعه/دستگاه از ایندکس معکوس، تاریخ از ایندکس مرتب شماره روز؛
+        # شرط‌ها در طرح فیلتر جمع و فقط یک بار روی ستون‌های اصلی ارزیابی می‌شوند
+        plan = self.filter_index.plan()
         rep = self.repair_cb.get()
         if rep and rep != "(همه)" and self.repair_col:
-            mask = self.df_normalized[self.repair_col].astype(str) == rep
-            df = df[mask]
+            plan.values("repair_col", [rep])
             self.settings["filters"]["repair_type"] = rep
 
         part = self.part_cb.get()
         if part and part != "(همه)" and self.part_col:
-            df = df[df[self.part_col].astype(str) == part]
+            plan.values("part_col", [canonical_text(part)])
             self.settings["filters"]["part_type"] = part
 
         save_settings(self.settings)
 
+        if s and e and self.date_col:
+            try:
+                plan.days(jalali_to_day(s), jalali_to_day(e))
+                self.status_var.set(f"فیلتر تاریخ اعمال شد: {s} تا {e}")
+            except Exception as exc:
+                logging.error(f"Date filter error: {exc}")
+                messagebox.showerror("خطا", "فرمت تاریخ اشتباه است. از فرمت YYYY/MM/DD استفاده کنید.")
+
+        # تنها DataFrame ساخته شده در کل فیلتر؛ ستون ساعت فقط روی همین ردیف‌ها پر می‌شود
+        df = plan.take(self.df)
         if self.perf_col in df.columns:
-            df[self.perf_col] = pd.to_numeric(df[self.perf_col], errors="coerce").fillna(0)
+            df[self.perf_col] = df[self.perf_col].fillna(0)
 
         self.df_filtered = df
         self.update_treeview(df)
@@ -1798,6 +1838,8 @@ class ExcelReportApp:
                 df_to_save = df_to_save.rename(columns=column_mapping)
             else:
                 df_to_save = df
+                if self.perf_col in df_to_save.columns:
+                    df_to_save = df_to_save.assign(**{self.perf_col: decimal_hours(df_to_save[self.perf_col])})
 
             if path.endswith(".xlsx"):
                 self.save_excel(df_to_save, path)
@@ -1841,7 +1883,7 @@ class ExcelReportApp:
             total_row = len(df) + 2
             ws.cell(row=total_row, column=1, value="جمع کل")
             col_index = list(df.columns).index("ساعت کار شده") + 1
-            ws.cell(row=total_row, column=col_index, value=df["ساعت کار شده"].sum())
+            ws.cell(row=total_row, column=col_index, value=round(df["ساعت کار شده"].sum(), HOURS_DECIMALS))
 
             for col in range(1, len(df.columns) + 1):
                 cell = ws.cell(row=total_row, column=col)
@@ -1860,7 +1902,7 @@ class ExcelReportApp:
         df_out = df.copy()
         if "ساعت کار شده" in df_out.columns:
             total_row = {col: "" for col in df_out.columns}
-            total_row["ساعت کار شده"] = df_out["ساعت کار شده"].sum()
+            total_row["ساعت کار شده"] = round(df_out["ساعت کار شده"].sum(), HOURS_DECIMALS)
             total_row[df_out.columns[0]] = "جمع کل"
             df_out = pd.concat([df_out, pd.DataFrame([total_row])], ignore_index=True)
 
@@ -1950,6 +1992,7 @@ class ExcelReportApp:
     # -------------------- Close --------------------
     def on_close(self):
         try:
+            self.cancel_loading()
             self.settings["window_size"] = self.root.geometry()
             save_settings(self.settings)
             self.status_var.set("برنامه بسته شد")
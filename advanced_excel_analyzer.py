@@ -13,6 +13,8 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib import font_manager
 import warnings
 
+from substring_index import TrigramIndex
+
 # optional shaping for Arabic/Persian
 try:
     import arabic_reshaper
@@ -71,6 +73,8 @@ class ExcelHandler:
         self.file_path = None
         self.sheet_names = []
         self.df = None
+        # trigram index per text column, built on first search
+        self.search_indexes = {}
 
     def load_file(self, path):
         if not os.path.exists(path):
@@ -84,8 +88,16 @@ class ExcelHandler:
         self.df = pd.read_excel(self.file_path, sheet_name=sheet_name, engine='openpyxl')
         # normalize columns (strip)
         self.df.columns = [str(c).strip() for c in self.df.columns]
+        self.search_indexes = {}
         return self.df
 
+    def contains_mask(self, col, text, literal=True):
+        """Boolean mask of rows whose value in col contains text (a regex when literal is False)."""
+        index = self.search_indexes.get(col)
+        if index is None:
+            index = self.search_indexes[col] = TrigramIndex(self.df[col])
+        return index.mask(text, literal)
+
 # ======================
 # Main Application (unchanged structure)
 # ======================
@@ -285,7 +297,9 @@ class SimpleFilterWindow(tk.Toplevel):
         ttk.Label(form_frame, text='مقدار مورد نظر:').grid(row=1, column=0, padx=5, pady=5, sticky='w')
         self.val_entry = ttk.Entry(form_frame, width=30)
         self.val_entry.grid(row=1, column=1, padx=5, pady=5, sticky='w')
-        ttk.Button(form_frame, text='اعمال فیلتر', command=self.apply_filter).grid(row=2, column=0, columnspan=2, pady=10)
+        self.regex_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(form_frame, text='عبارت باقاعده (regex)', variable=self.regex_var).grid(row=2, column=1, padx=5, sticky='w')
+        ttk.Button(form_frame, text='اعمال فیلتر', command=self.apply_filter).grid(row=3, column=0, columnspan=2, pady=10)
         form_frame.grid_columnconfigure(1, weight=1)
         tree_frame = ttk.Frame(self)
         tree_frame.pack(fill='both', expand=True)
@@ -321,7 +335,7 @@ class SimpleFilterWindow(tk.Toplevel):
                 messagebox.showerror('خطا', 'لطفاً مقدار فیلتر را وارد کنید')
                 return
             try:
-                filtered = df[df[col].astype(str).str.contains(val, na=False)]
+                filtered = df[self.app.excel.contains_mask(col, val, literal=not self.regex_var.get())]
             except Exception as e:
                 messagebox.showerror('خطا', f'خطا در اعمال فیلتر: {str(e)}')
                 return
@@ -362,7 +376,9 @@ class AdvancedFilterWindow(tk.Toplevel):
         ttk.Label(form_frame, text='مقدار دوم:').grid(row=1, column=2, padx=5, pady=5, sticky='w')
         self.val2_entry = ttk.Entry(form_frame, width=25)
         self.val2_entry.grid(row=1, column=3, padx=5, pady=5, sticky='w')
-        ttk.Button(form_frame, text='اعمال فیلتر', command=self.apply_filter).grid(row=2, column=0, columnspan=4, pady=10)
+        self.regex_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(form_frame, text='عبارت باقاعده (regex)', variable=self.regex_var).grid(row=2, column=1, padx=5, sticky='w')
+        ttk.Button(form_frame, text='اعمال فیلتر', command=self.apply_filter).grid(row=3, column=0, columnspan=4, pady=10)
         for i in range(4):
             form_frame.grid_columnconfigure(i, weight=1)
         tree_frame = ttk.Frame(self)
@@ -400,8 +416,9 @@ class AdvancedFilterWindow(tk.Toplevel):
             if not val1:
                 messagebox.showerror('خطا', 'لطفاً مقدار اول را وارد کنید')
                 return
+            literal = not self.regex_var.get()
             try:
-                filtered = df[df[col1].astype(str).str.contains(val1, na=False)]
+                mask = self.app.excel.contains_mask(col1, val1, literal)
             except Exception as e:
                 messagebox.showerror('خطا', f'خطا در اعمال فیلتر اول: {str(e)}')
                 return
@@ -409,10 +426,11 @@ class AdvancedFilterWindow(tk.Toplevel):
             val2 = self.val2_entry.get().strip()
             if col2 and val2:
                 try:
-                    filtered = filtered[filtered[col2].astype(str).str.contains(val2, na=False)]
+                    mask &= self.app.excel.contains_mask(col2, val2, literal)
                 except Exception as e:
                     messagebox.showerror('خطا', f'خطا در اعمال فیلتر دوم: {str(e)}')
                     return
+            filtered = df[mask]
             self.display_data(filtered)
             self.app.status_var.set(f'فیلتر پیشرفته اعمال شد - {len(filtered)} رکورد پیدا شد')
         except Exception as e:
@@ -0,0 +1,87 @@
+# background_task.py
+# -*- coding: utf-8 -*-
+"""
+اجرای کارهای طولانی (مثل خواندن اکسل) در یک ترد جداگانه
+
+حلقه اصلی Tk آزاد می‌ماند و نتیجه، خطا و پیشرفت کار با root.after در ترد
+اصلی به برنامه برگردانده می‌شود؛ ویجت‌ها هرگز از ترد کارگر لمس نمی‌شوند.
+"""
+
+import queue
+import threading
+import logging
+
+from excel_stream import LoadCancelled
+
+
+class BackgroundTask:
+    """
+    work(progress, cancel_event) در ترد کارگر اجرا می‌شود:
+    progress(done, total) برای گزارش پیشرفت و cancel_event برای توقف کار
+    """
+
+    def __init__(self, root, work, on_done, on_error=None, on_progress=None,
+                 on_cancel=None, poll_ms=100):
+        self.root = root
+        self.work = work
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancel = on_cancel
+        self.poll_ms = poll_ms
+
+        self.cancel_event = threading.Event()
+        self._result = queue.Queue(maxsize=1)
+        self._progress = None
+        self._thread = None
+
+    # -------------------------
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.root.after(self.poll_ms, self._poll)
+        return self
+
+    def cancel(self):
+        """درخواست توقف؛ کار در اولین نقطه بررسی متوقف می‌شود"""
+        self.cancel_event.set()
+
+    # -------------------------
+    def _report_progress(self, done, total):
+        # فقط آخرین وضعیت نگه داشته می‌شود؛ ترد اصلی آن را در _poll می‌خواند
+        self._progress = (done, total)
+        if self.cancel_event.is_set():
+            raise LoadCancelled()
+
+    def _run(self):
+        try:
+            result = self.work(self._report_progress, self.cancel_event)
+            self._result.put(("done", result))
+        except LoadCancelled:
+            self._result.put(("cancelled", None))
+        except Exception as e:
+            logging.error(f"Error in background task: {e}")
+            self._result.put(("error", e))
+
+    def _poll(self):
+        progress = self._progress
+        if progress is not None and self.on_progress is not None:
+            self.on_progress(*progress)
+
+        try:
+            status, value = self._result.get_nowait()
+        except queue.Empty:
+            self.root.after(self.poll_ms, self._poll)
+            return
+
+        if status == "done":
+            self.on_done(value)
+        elif status == "cancelled":
+            if self.on_cancel is not None:
+                self.on_cancel()
+        elif self.on_error is not None:
+            self.on_error(value)
@@ -0,0 +1,150 @@
+# benchmark_filters.py
+# -*- coding: utf-8 -*-
+"""
+بنچمارک چرخه فیلتر و گروه‌بندی
+
+اجرا:
+    python benchmark_filters.py [تعداد ردیف] [تعداد تکرار]
+
+یک DataFrame آزمایشی با ستون‌های مشابه فایل قالبسازی ساخته می‌شود و چرخه
+«فیلتر ساده (تاریخ + نوع تعمیر) و سپس گروه‌بندی» یک بار به روش قبلی (کپی کامل،
+pd.to_datetime و pd.to_numeric و astype(str) در هر اجرا) و یک بار روی ستون‌های
+نوع‌دهی شده data_schema اجرا می‌شود.
+"""
+
+import sys
+import time
+import random
+import datetime
+import warnings
+
+import pandas as pd
+from persiantools.jdatetime import JalaliDate
+
+from data_schema import DAY_COL, typed_dataset
+from jalali_dates import jalali_to_day
+
+warnings.simplefilter("ignore", UserWarning)
+
+DATE_COL = "تاریخ"
+REPAIR_COL = "نوع تعمیر"
+PART_COL = "قالب / قطعه / دستگاه"
+CODE_COL = "کد قالب"
+REQ_COL = "شماره نامه درخواست"
+PERF_COL = "مقدار ساعت کار شده"
+
+COLUMNS = {
+    "date_col": DATE_COL,
+    "repair_col": REPAIR_COL,
+    "part_col": PART_COL,
+    "code_col": CODE_COL,
+    "req_col": REQ_COL,
+    "perf_col": PERF_COL,
+}
+
+START, END = "1404/01/01", "1404/06/31"
+REPAIR = "قالب تعمیری"
+
+
+def make_frame(rows):
+    """ساخت DataFrame آزمایشی با مقادیر خام مشابه خروجی خواندن شیت"""
+    repairs = ["قالب تعمیری", "ساخت قالب", "قطعه تعمیری", "دستگاه تعمیری", "ساخت قطعه"]
+    parts = [f"شمش پراید {i}" for i in range(400)]
+    rnd = random.Random(1404)
+    start = datetime.datetime(2025, 3, 21)
+    return pd.DataFrame({
+        "ردیف": range(1, rows + 1),
+        DATE_COL: [start + datetime.timedelta(days=rnd.randrange(365)) for _ in range(rows)],
+        REPAIR_COL: [rnd.choice(repairs) for _ in range(rows)],
+        PART_COL: [rnd.choice(parts) for _ in range(rows)],
+        CODE_COL: [f"M-{rnd.randrange(900):03d}" for _ in range(rows)],
+        REQ_COL: [rnd.randrange(1000, 9000) for _ in range(rows)],
+        PERF_COL: [round(rnd.uniform(0.5, 12), 2) if rnd.random() > 0.02 else "" for _ in range(rows)],
+    })
+
+
+# -----------------------------
+def cycle_legacy(df, df_normalized):
+    """روش قبلی apply_simple_filter و apply_grouping_filter"""
+    s_g = JalaliDate.strptime(START, "%Y/%m/%d").to_gregorian()
+    e_g = JalaliDate.strptime(END, "%Y/%m/%d").to_gregorian()
+
+    filtered = df.copy()
+    filtered[DATE_COL] = pd.to_datetime(filtered[DATE_COL], errors="coerce")
+    filtered = filtered[(filtered[DATE_COL] >= pd.Timestamp(s_g)) & (filtered[DATE_COL] <= pd.Timestamp(e_g))]
+    filtered = filtered[df_normalized[REPAIR_COL].astype(str) == REPAIR]
+    filtered[PERF_COL] = pd.to_numeric(filtered[PERF_COL], errors="coerce").fillna(0)
+
+    filtered[PERF_COL] = pd.to_numeric(filtered[PERF_COL], errors="coerce").fillna(0)
+    grouped = filtered.groupby([PART_COL, CODE_COL, REQ_COL], as_index=False).agg({PERF_COL: "sum"})
+    return grouped.sort_values(by=PERF_COL, ascending=False)
+
+
+def cycle_typed(df, df_normalized):
+    """ماسک روی ستون‌های تایپ‌دار و گروه‌بندی categorical"""
+    s_day = jalali_to_day(START)
+    e_day = jalali_to_day(END)
+
+    days = df_normalized[DAY_COL].to_numpy()
+    mask = (days >= s_day) & (days <= e_day)
+    mask &= (df_normalized[REPAIR_COL] == REPAIR).to_numpy()
+    filtered = df[mask]
+    filtered = filtered.assign(**{PERF_COL: filtered[PERF_COL].fillna(0)})
+
+    hours = filtered[PERF_COL].astype("float64")
+    keys = [filtered[col] for col in (PART_COL, CODE_COL, REQ_COL)]
+    grouped = hours.groupby(keys, observed=True).sum().reset_index()
+    return grouped.sort_values(by=PERF_COL, ascending=False)
+
+
+def prepare_legacy(df):
+    df_normalized = df.copy()
+    return df, df_normalized
+
+
+def prepare_typed(df):
+    df = df.copy()
+    df_normalized = typed_dataset(df, COLUMNS, df[[REPAIR_COL]])
+    return df, df_normalized
+
+
+CASES = {
+    "legacy (to_numeric/astype)": (prepare_legacy, cycle_legacy),
+    "typed schema": (prepare_typed, cycle_typed),
+}
+
+
+def run_cases(raw, repeat):
+    """اجرای هر روش و چاپ زمان آماده‌سازی، زمان هر چرخه و حافظه"""
+    print(f"{'روش':<28}{'آماده‌سازی (s)':>16}{'هر چرخه (ms)':>16}{'DataFrame (MB)':>16}{'گروه‌ها':>10}")
+    results = []
+    for name, (prepare, cycle) in CASES.items():
+        t0 = time.perf_counter()
+        df, df_normalized = prepare(raw)
+        prepare_s = time.perf_counter() - t0
+
+        grouped = cycle(df, df_normalized)
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            grouped = cycle(df, df_normalized)
+        cycle_ms = (time.perf_counter() - t0) / repeat * 1000
+
+        frame_mb = (df.memory_usage(deep=True).sum() + df_normalized.memory_usage(deep=True).sum()) / 2**20
+        results.append((name, prepare_s, cycle_ms, frame_mb, grouped))
+        print(f"{name:<28}{prepare_s:>16.3f}{cycle_ms:>16.1f}{frame_mb:>16.1f}{len(grouped):>10}")
+
+    # مجموع ساعت‌های هر دو روش باید یکسان باشد
+    totals = [float(r[4][PERF_COL].sum()) for r in results]
+    print(f"مجموع ساعت: {', '.join(f'{t:.2f}' for t in totals)}")
+    return results
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(f"ساخت DataFrame آزمایشی با {rows} ردیف")
+    run_cases(make_frame(rows), repeat)
+
+
+if __name__ == "__main__":
+    main()
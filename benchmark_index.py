@@ -0,0 +1,125 @@
+# benchmark_index.py
+# -*- coding: utf-8 -*-
+"""
+بررسی و بنچمارک فیلترهای ساده و ترکیبی با ایندکس معکوس (filter_index)
+
+اجرا:
+    python benchmark_index.py [تعداد ردیف] [تعداد تکرار]
+
+روی یک دیتاست ساختگی (نوع تعمیر، قالب/قطعه/دستگاه با هزاران مقدار، کد قالب و شماره
+درخواست) سه روش ساختن ماسک فیلتر مقایسه می‌شوند:
+- قبلی: کپی کل DataFrame و مقایسه astype(str) == مقدار / isin روی هر کلیک
+- ماسک ستونی: مقایسه روی ستون‌های categorical نوع‌دهی شده
+- ایندکس: OR/AND ردیف‌های از پیش ایندکس شده هر مقدار
+ردیف‌های انتخاب شده هر روش باید یکسان باشند؛ در غیر این صورت اجرا با خطا متوقف می‌شود.
+"""
+
+import sys
+import time
+import random
+
+import numpy as np
+import pandas as pd
+
+from data_schema import to_category
+from filter_index import FilterIndex
+
+COLUMNS = {"repair_col": "نوع تعمیر", "part_col": "قالب / قطعه / دستگاه",
+           "code_col": "کد قالب", "req_col": "شماره نامه درخواست"}
+
+
+def make_frame(count):
+    """دیتاست ساختگی با توزیع نامتوازن مقادیر (چند مقدار پرتکرار و تعداد زیادی مقدار کم‌تکرار)"""
+    rng = np.random.default_rng(1404)
+    repairs = ["قالب تعمیری", "قطعه تعمیری", "دستگاه تعمیری", "قالب", "قطعه", "دستگاه", "تعمیری"]
+    parts = [f"قالب {i}" for i in range(5000)]
+    weights = 1 / np.arange(1, len(parts) + 1)
+    raw = pd.DataFrame({
+        COLUMNS["repair_col"]: rng.choice(repairs, count),
+        COLUMNS["part_col"]: rng.choice(parts, count, p=weights / weights.sum()),
+        COLUMNS["code_col"]: rng.integers(100, 2100, count).astype(str),
+        COLUMNS["req_col"]: rng.integers(1, count // 5 + 2, count).astype(str),
+        "مقدار ساعت کار شده": rng.integers(1, 12, count).astype(np.float32),
+    })
+    normalized = raw.assign(**{col: to_category(raw[col]) for col in COLUMNS.values()})
+    return raw, normalized
+
+
+def make_queries(raw):
+    """ترکیب‌های فیلتر: {ستون: مقادیر انتخاب شده}"""
+    rnd = random.Random(1404)
+    repairs = sorted(raw[COLUMNS["repair_col"]].unique())
+    parts = raw[COLUMNS["part_col"]].value_counts().index
+    return [
+        {"repair_col": [repairs[0]]},
+        {"repair_col": repairs[:3]},
+        {"part_col": [parts[0]]},
+        {"repair_col": [repairs[1]], "part_col": [parts[0]]},
+        {"repair_col": [repairs[2]], "part_col": [parts[-1]]},
+        {"code_col": [str(rnd.randint(100, 2099))]},
+        {"req_col": [str(rnd.randint(1, len(raw) // 5))], "repair_col": repairs[:2]},
+    ]
+
+
+def legacy_filter(raw, query):
+    """روش قبلی: کپی و مقایسه رشته‌ای (isin برای چند مقدار)"""
+    df = raw.copy()
+    for role, values in query.items():
+        column = df[COLUMNS[role]].astype(str)
+        df = df[column == values[0]] if len(values) == 1 else df[column.isin(values)]
+    return df.index.to_numpy()
+
+
+def column_mask_filter(normalized, query):
+    """ماسک روی ستون‌های categorical"""
+    mask = np.ones(len(normalized), dtype=bool)
+    for role, values in query.items():
+        mask &= normalized[COLUMNS[role]].isin(values).to_numpy()
+    return mask
+
+
+def index_filter(index, query):
+    """طرح فیلتر روی ایندکس معکوس"""
+    plan = index.plan()
+    for role, values in query.items():
+        plan.values(role, values)
+    return plan.mask()
+
+
+def timed(func, queries, repeat):
+    """میانگین زمان (ms) هر فیلتر"""
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            func(query)
+    return (time.perf_counter() - t0) * 1000 / (repeat * len(queries))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    raw, normalized = make_frame(count)
+    queries = make_queries(raw)
+
+    t0 = time.perf_counter()
+    index = FilterIndex(normalized, COLUMNS)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    for query in queries:
+        expected = legacy_filter(raw, query)
+        for name, mask in (("column mask", column_mask_filter(normalized, query)), ("index", index_filter(index, query))):
+            if not np.array_equal(np.flatnonzero(mask), expected):
+                raise AssertionError(f"{name}: {query!r}")
+    print(f"ردیف‌های یکسان برای {len(queries)} فیلتر روی {count:,} ردیف")
+    print(f"ساخت ایندکس (یک بار هنگام بارگذاری): {build_ms:.1f} ms")
+
+    legacy_ms = timed(lambda q: legacy_filter(raw, q), queries, 1)
+    column_ms = timed(lambda q: column_mask_filter(normalized, q), queries, repeat)
+    index_ms = timed(lambda q: index_filter(index, q), queries, repeat)
+    print(f"{'روش':<20}{'هر فیلتر (ms)':>16}{'نسبت':>8}")
+    for name, ms in (("قبلی (copy + astype)", legacy_ms), ("ماسک ستونی", column_ms), ("ایندکس", index_ms)):
+        print(f"{name:<20}{ms:>16.2f}{legacy_ms / ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# benchmark_loading.py
+# -*- coding: utf-8 -*-
+"""
+بنچمارک مسیرهای بارگذاری داده
+
+اجرا:
+    python benchmark_loading.py [تعداد ردیف] [مسیر فایل اکسل]
+
+اگر مسیر فایل داده نشود یک فایل آزمایشی با ستون‌های مشابه فایل قالبسازی
+ساخته می‌شود. هر روش در یک پروسس جداگانه اجرا می‌شود تا زمان و حافظه اوج
+آن مستقل از بقیه اندازه‌گیری شود.
+"""
+
+import os
+import sys
+import time
+import random
+import datetime
+import tempfile
+import tracemalloc
+import multiprocessing
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+from excel_stream import read_sheet, default_header, ENGINE_XLSX
+
+BENCH_SHEET = "آذر"
+
+
+def make_workbook(path, rows):
+    """ساخت فایل آزمایشی با ستون‌های مشابه شیت‌های قالبسازی"""
+    repairs = ["قالب تعمیری", "قالب: تعمیری", "ساخت قالب", "قطعه تعمیری", "دستگاه  تعمیری", "ساخت قطعه"]
+    parts = [f"شمش پراید {i}" for i in range(400)]
+    rnd = random.Random(1404)
+    start = datetime.datetime(2025, 3, 21)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(BENCH_SHEET)
+    ws.append(["ردیف", "تاریخ", "نوع تعمیر", "قالب / قطعه / دستگاه", "کد قالب",
+               "شماره نامه درخواست", "مقدار ساعت کار شده", "توضیحات"])
+    for i in range(rows):
+        ws.append([
+            i + 1,
+            start + datetime.timedelta(days=rnd.randrange(365)),
+            rnd.choice(repairs),
+            rnd.choice(parts),
+            f"M-{rnd.randrange(900):03d}",
+            rnd.randrange(1000, 9000),
+            round(rnd.uniform(0.5, 12), 2),
+            "توضیحات آزاد برای ردیف " + str(rnd.randrange(50)),
+        ])
+    wb.save(path)
+
+
+# -----------------------------
+def load_legacy(path, sheet):
+    """روش قبلی: list(ws.values) و سپس DataFrame"""
+    wb = load_workbook(path, data_only=True, read_only=True)
+    ws = wb[sheet]
+    rows = list(ws.values)
+    wb.close()
+    headers = [default_header(i, x) for i, x in enumerate(rows[0])]
+    return pd.DataFrame(rows[1:], columns=headers)
+
+
+def load_streaming(path, sheet):
+    """روش جدید: بافرهای ستونی تایپ‌دار"""
+    return read_sheet(path, sheet)
+
+
+def load_fast_xlsx(path, sheet):
+    """خواننده مستقیم zip/XML با جدول رشته‌های مشترک"""
+    return read_sheet(path, sheet, engine=ENGINE_XLSX)
+
+
+CASES = {
+    "legacy list(ws.values)": load_legacy,
+    "streaming columns": load_streaming,
+    "fast xlsx reader": load_fast_xlsx,
+}
+
+
+def _run_case(name, path, sheet, queue):
+    func = CASES[name]
+    t0 = time.perf_counter()
+    df = func(path, sheet)
+    elapsed = time.perf_counter() - t0
+    rows = len(df)
+    del df
+
+    tracemalloc.start()
+    df = func(path, sheet)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    frame_mb = df.memory_usage(deep=True).sum() / 2**20
+
+    rss_mb = None
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        rss_mb = rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+    except ImportError:
+        pass
+    queue.put((name, rows, elapsed, peak / 2**20, frame_mb, rss_mb))
+
+
+def run_cases(path, sheet, cases=None):
+    """اجرای هر روش در پروسس جدا و چاپ نتایج"""
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for name in cases or CASES:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_case, args=(name, path, sheet, queue))
+        proc.start()
+        results.append(queue.get())
+        proc.join()
+
+    print(f"{'روش':<28}{'ردیف':>10}{'زمان (s)':>12}{'اوج حافظه (MB)':>18}{'DataFrame (MB)':>16}{'RSS اوج (MB)':>14}")
+    for name, rows, elapsed, peak, frame_mb, rss_mb in results:
+        rss = f"{rss_mb:.1f}" if rss_mb is not None else "-"
+        print(f"{name:<28}{rows:>10}{elapsed:>12.2f}{peak:>18.1f}{frame_mb:>16.1f}{rss:>14}")
+    return results
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    path = sys.argv[2] if len(sys.argv) > 2 else None
+    sheet = BENCH_SHEET
+    if path is None:
+        path = os.path.join(tempfile.gettempdir(), f"bench_{rows}.xlsx")
+        if not os.path.exists(path):
+            print(f"ساخت فایل آزمایشی با {rows} ردیف: {path}")
+            make_workbook(path, rows)
+    else:
+        sheet = load_workbook(path, read_only=True).sheetnames[0]
+    run_cases(path, sheet)
+
+
+if __name__ == "__main__":
+    main()
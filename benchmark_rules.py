@@ -0,0 +1,216 @@
+# benchmark_rules.py
+# -*- coding: utf-8 -*-
+"""
+بررسی و بنچمارک موتور قواعد نوع تعمیر (repair_rules)
+
+اجرا:
+    python benchmark_rules.py [تعداد مقدار] [تعداد تکرار]
+
+چهار نسخه قبلی نرمالایز نوع تعمیر (زنجیره if در report_excel.py و 1a.py،
+دیکشنری الگوهای regex در utils/helpers، نسخه s_lower در merged_report_app.py و
+نسخه حروف کوچک complete_app.py) اینجا نگه داشته شده‌اند. خروجی هر کدام روی
+مجموعه‌ای از مقادیر آزمایشی (ترکیب کلمات کلیدی، ":"، فاصله‌های اضافه، حروف لاتین،
+مقادیر خالی و عددی) با پروفایل متناظر RepairRuleEngine مقایسه می‌شود و در صورت
+هر اختلافی اجرا با خطا متوقف می‌شود؛ سپس سرعت هر روش چاپ می‌شود.
+
+نسبت سرد (زمان قبلی / موتور سرد) برای زنجیره‌های if ساده کمتر از ۱ است: یک پیمایش
+regex به اضافه پاک‌سازی و ثبت نتیجه از چند بررسی «in» کندتر است و موتور فقط روی
+مقادیر تکراری (موتور گرم، یا memo مقادیر یکتای ColumnNormalizer) سریع‌تر می‌شود.
+"""
+
+import re
+import sys
+import time
+import random
+
+import pandas as pd
+
+from repair_rules import RepairRuleEngine
+
+
+# -----------------------------
+# نسخه‌های قبلی
+def legacy_report(repair_type):
+    """report_excel.py / 1a.py"""
+    if not isinstance(repair_type, str):
+        return str(repair_type)
+
+    repair_type = repair_type.strip()
+    repair_type = re.sub(r'[:]', '', repair_type)
+    repair_type = re.sub(r'\s+', ' ', repair_type)
+
+    if 'قالب' in repair_type and 'تعمیر' in repair_type:
+        return 'قالب تعمیری'
+    elif 'قطعه' in repair_type and 'تعمیر' in repair_type:
+        return 'قطعه تعمیری'
+    elif 'دستگاه' in repair_type and 'تعمیر' in repair_type:
+        return 'دستگاه تعمیری'
+    elif 'قالب' in repair_type:
+        return 'قالب'
+    elif 'قطعه' in repair_type:
+        return 'قطعه'
+    elif 'دستگاه' in repair_type:
+        return 'دستگاه'
+    elif 'تعمیر' in repair_type:
+        return 'تعمیری'
+    else:
+        return repair_type
+
+
+def legacy_patterns(repair_type):
+    """utils/helpers.py (report_excel_test.py)"""
+    if not isinstance(repair_type, str):
+        return str(repair_type)
+
+    repair_type = repair_type.strip()
+    repair_type = re.sub(r'[:]', '', repair_type)
+    repair_type = re.sub(r'\s+', ' ', repair_type)
+
+    patterns = {
+        'قالب تعمیری': ['قالب.*تعمیر', 'تعمیر.*قالب'],
+        'قطعه تعمیری': ['قطعه.*تعمیر', 'تعمیر.*قطعه'],
+        'دستگاه تعمیری': ['دستگاه.*تعمیر', 'تعمیر.*دستگاه'],
+        'قالب': ['قالب'],
+        'قطعه': ['قطعه'],
+        'دستگاه': ['دستگاه'],
+        'تعمیری': ['تعمیر']
+    }
+
+    for normalized_name, pattern_list in patterns.items():
+        for pattern in pattern_list:
+            if re.search(pattern, repair_type, re.IGNORECASE):
+                return normalized_name
+
+    return repair_type
+
+
+def legacy_merged(repair_type):
+    """merged_report_app.py"""
+    try:
+        if pd.isna(repair_type):
+            return repair_type
+        s = str(repair_type).strip()
+        s_lower = s.lower()
+        if 'قالب' in s_lower and 'تعمیر' in s_lower:
+            return 'قالب تعمیری'
+        if 'قطعه' in s_lower and 'تعمیر' in s_lower:
+            return 'قطعه تعمیری'
+        if 'دستگاه' in s_lower and 'تعمیر' in s_lower:
+            return 'دستگاه تعمیری'
+        if 'قالب' in s_lower:
+            return 'قالب'
+        if 'قطعه' in s_lower:
+            return 'قطعه'
+        if 'دستگاه' in s_lower:
+            return 'دستگاه'
+        if 'تعمیر' in s_lower:
+            return 'تعمیری'
+        return s
+    except Exception:
+        return str(repair_type)
+
+
+def legacy_lower(repair_type):
+    """complete_app.py / main_advanced.py"""
+    if not isinstance(repair_type, str):
+        return str(repair_type)
+
+    repair_type = str(repair_type).strip().lower()
+
+    if 'قالب' in repair_type and 'تعمیر' in repair_type:
+        return 'قالب تعمیری'
+    elif 'قطعه' in repair_type and 'تعمیر' in repair_type:
+        return 'قطعه تعمیری'
+    elif 'دستگاه' in repair_type and 'تعمیر' in repair_type:
+        return 'دستگاه تعمیری'
+    elif 'قالب' in repair_type:
+        return 'قالب'
+    elif 'قطعه' in repair_type:
+        return 'قطعه'
+    elif 'دستگاه' in repair_type:
+        return 'دستگاه'
+    elif 'تعمیر' in repair_type:
+        return 'تعمیری'
+    else:
+        return repair_type
+
+
+CASES = [
+    ("if-chain (report_excel/1a)", legacy_report, "report"),
+    ("regex patterns (utils/helpers)", legacy_patterns, "report"),
+    ("s_lower (merged_report_app)", legacy_merged, "merged"),
+    ("lower (complete_app)", legacy_lower, "lower"),
+]
+
+
+# -----------------------------
+def make_values(count):
+    """مقادیر آزمایشی نوع تعمیر"""
+    words = ["قالب", "تعمیر", "تعمیری", "قطعه", "دستگاه", "ساخت", "جدید", "Mold", "REPAIR",
+             "پرس", "تعمیرات", "قالب‌سازی", ":", " : ", "  ", "\t", "\n"]
+    rnd = random.Random(1404)
+    values = [None, float("nan"), pd.NA, pd.NaT, 0, 12.5, True, "", " ", ":", "قالب:تعمیری",
+              "تعمیر\nقالب", "  قالب   تعمیری  ", "ساخت قالب", "قطعه تعمیری:", "دستگاه"]
+    while len(values) < count:
+        values.append("".join(rnd.choice(words) + rnd.choice(["", " "]) for _ in range(rnd.randint(1, 4))))
+    return values
+
+
+def same(a, b):
+    """برابری دو خروجی (مقادیر خالی با نوع یکسان برابر در نظر گرفته می‌شوند)"""
+    if a is b or (type(a) is type(b) and a == b):
+        return True
+    return type(a) is type(b) and bool(pd.isna(a)) and bool(pd.isna(b))
+
+
+def check_parity(values):
+    """خروجی هر نسخه قبلی با پروفایل متناظر موتور یکسان باشد"""
+    for name, legacy, profile in CASES:
+        engine = RepairRuleEngine(profile=profile)
+        for value in values:
+            expected, actual = legacy(value), engine(value)
+            if not same(expected, actual):
+                raise AssertionError(f"{name}: {value!r} -> {expected!r} != {actual!r}")
+    print(f"خروجی یکسان برای {len(values)} مقدار در {len(CASES)} نسخه")
+
+
+def timed(func, values, repeat, fresh=None):
+    """میانگین زمان (ms) فراخوانی تابع روی همه مقادیر؛ fresh برای ساخت تابع تازه در هر تکرار"""
+    total = 0.0
+    for _ in range(repeat):
+        if fresh is not None:
+            func = fresh()
+        t0 = time.perf_counter()
+        for value in values:
+            func(value)
+        total += time.perf_counter() - t0
+    return total / repeat * 1000
+
+
+def run_cases(values, repeat):
+    """
+    زمان نرمالایز همه مقادیر (هر مقدار جدا) برای هر روش
+    موتور سرد: نمونه تازه بدون نتیجه نگه داشته شده، موتور گرم: مقادیر تکراری از cache
+    """
+    print(f"{'روش':<34}{'قبلی (ms)':>12}{'موتور سرد':>12}{'موتور گرم':>12}{'نسبت سرد':>10}{'نسبت گرم':>10}")
+    for name, legacy, profile in CASES:
+        legacy_ms = timed(legacy, values, repeat)
+        cold_ms = timed(None, values, repeat, fresh=lambda: RepairRuleEngine(profile=profile))
+        warm = RepairRuleEngine(profile=profile)
+        timed(warm, values, 1)
+        warm_ms = timed(warm, values, repeat)
+        print(f"{name:<34}{legacy_ms:>12.1f}{cold_ms:>12.1f}{warm_ms:>12.1f}"
+              f"{legacy_ms / cold_ms:>10.2f}{legacy_ms / warm_ms:>10.1f}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    values = make_values(count)
+    check_parity(values)
+    print(f"{len(set(map(repr, values)))} مقدار یکتا")
+    run_cases(values, repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# column_resolver.py
+# -*- coding: utf-8 -*-
+"""
+تشخیص ستون‌های مهم (نوع تعمیر، قالب/قطعه/دستگاه، تاریخ، ساعت، شماره درخواست، کد قالب)
+
+به جای find_column جداگانه برای هر ستون (حلقه تودرتوی تطبیق زیررشته روی همه هدرها،
+با لیست نام‌های متفاوت در هر برنامه) هدرها یک بار امتیازدهی می‌شوند:
+- هر هدر با کلید متعارف (persian_text) و حروف کوچک با نام‌های COLUMN_CANDIDATES مقایسه می‌شود
+- نام زودتر در لیست، سپس تطبیق کامل به جای زیررشته، سپس هدر زودتر اولویت دارد
+- هر هدر فقط به یک ستون نسبت داده می‌شود (مثلاً "کد قالب" هرگز ستون قالب نمی‌شود)
+
+نگاشت نهایی بر اساس هش ردیف هدر در یک فایل JSON نگه داشته می‌شود تا باز کردن دوباره
+فایل‌هایی با همان ساختار بدون تشخیص دوباره و همیشه با همان نگاشت انجام شود. کاربر
+می‌تواند نگاشت هر ستون را به صورت دستی ثابت (pin) کند.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+
+from persian_text import canonical_text
+
+# نسخه الگوریتم امتیازدهی؛ با تغییر آن نگاشت‌های خودکار قبلی دوباره محاسبه می‌شوند
+RESOLVER_VERSION = 1
+
+COLUMN_CANDIDATES = {
+    "repair_col": ["نوع تعمیر", "تعمیر", "repair"],
+    "part_col": ["قالب / قطعه / دستگاه", "قالب", "قطعه", "دستگاه", "part", "device"],
+    "date_col": ["تاریخ", "date"],
+    "perf_col": ["مقدار ساعت کار شده", "ساعت", "hour", "time"],
+    "req_col": ["شماره نامه درخواست", "شماره درخواست", "request"],
+    "code_col": ["کد قالب", "کد", "code"],
+}
+
+COLUMN_LABELS = {
+    "repair_col": "نوع تعمیر",
+    "part_col": "قالب / قطعه / دستگاه",
+    "date_col": "تاریخ",
+    "perf_col": "ساعت کار شده",
+    "req_col": "شماره درخواست",
+    "code_col": "کد قالب",
+}
+
+
+def _key(text):
+    return canonical_text(text).lower()
+
+
+def header_fingerprint(headers, candidates=COLUMN_CANDIDATES):
+    """هش ردیف هدر (ترتیب و متن هدرها)؛ برای لیست نام‌های غیر پیش‌فرض، هش آن هم اضافه می‌شود"""
+    data = json.dumps([str(h) for h in headers], ensure_ascii=False)
+    fingerprint = hashlib.sha1(data.encode("utf-8")).hexdigest()
+    if candidates is not COLUMN_CANDIDATES:
+        names = json.dumps(candidates, ensure_ascii=False, sort_keys=True)
+        fingerprint += ":" + hashlib.sha1(names.encode("utf-8")).hexdigest()[:12]
+    return fingerprint
+
+
+def score_columns(headers, candidates=COLUMN_CANDIDATES):
+    """
+    نگاشت {ستون: هدر یا None} با امتیازدهی یک باره همه هدرها
+    امتیاز هر (ستون، هدر): (اندیس نام در لیست، تطبیق کامل/زیررشته، اندیس هدر)؛ کمتر بهتر
+    """
+    header_keys = [_key(h) for h in headers]
+    scored = []
+    for role, names in candidates.items():
+        for rank, name in enumerate(_key(n) for n in names):
+            for position, header in enumerate(header_keys):
+                if name and name in header:
+                    scored.append(((rank, header != name, position), role, position))
+
+    mapping = {role: None for role in candidates}
+    used = set()
+    for _, role, position in sorted(scored, key=lambda item: item[0]):
+        if mapping[role] is None and position not in used:
+            mapping[role] = headers[position]
+            used.add(position)
+    return mapping
+
+
+class ColumnResolver:
+    """نگاشت ستون‌ها به ازای هر ساختار هدر، با کش JSON و نگاشت‌های ثابت شده کاربر"""
+
+    def __init__(self, map_path, candidates=COLUMN_CANDIDATES):
+        self.map_path = map_path
+        self.candidates = candidates
+        self._entries = None
+        self._lock = threading.Lock()
+
+    # -------------------------
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        if os.path.exists(self.map_path):
+            try:
+                with open(self.map_path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except Exception as e:
+                logging.error(f"Error loading column map: {e}")
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.map_path) or ".", exist_ok=True)
+            tmp_path = self.map_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.map_path)
+        except Exception as e:
+            logging.error(f"Error saving column map: {e}")
+
+    def _entry(self, headers):
+        """مدخل یک ساختار هدر؛ در صورت نبود یا نسخه قدیمی، امتیازدهی و ذخیره"""
+        headers = [str(h) for h in headers]
+        fingerprint = header_fingerprint(headers, self.candidates)
+        entry = self._entries.get(fingerprint)
+        if entry is None or entry.get("version") != RESOLVER_VERSION:
+            pinned = entry.get("pinned", {}) if entry else {}
+            entry = {"version": RESOLVER_VERSION, "headers": headers,
+                     "mapping": score_columns(headers, self.candidates), "pinned": pinned}
+            self._entries[fingerprint] = entry
+            self._store_projection(entry)
+            self._save()
+        return entry
+
+    def _store_projection(self, entry):
+        """
+        همان نگاشت برای هدرهای فقط ستون‌های نگاشت شده (خواندن شیت با projection)
+        تا نتیجه روی DataFrame کاهش یافته هم یکسان باشد
+        """
+        mapping = self._mapping(entry)
+        selected = set(mapping.values())
+        projected = [h for h in entry["headers"] if h in selected]
+        if not projected or len(projected) == len(entry["headers"]):
+            return
+        self._entries[header_fingerprint(projected, self.candidates)] = {
+            "version": RESOLVER_VERSION, "headers": projected,
+            "mapping": {role: col if col in selected else None for role, col in mapping.items()},
+            "pinned": {},
+        }
+
+    @staticmethod
+    def _mapping(entry):
+        mapping = dict(entry["mapping"])
+        for role, col in entry.get("pinned", {}).items():
+            mapping[role] = col if col in entry["headers"] else None
+        return mapping
+
+    # -------------------------
+    def resolve(self, headers):
+        """نگاشت {ستون: هدر یا None} برای یک ردیف هدر"""
+        headers = list(headers)
+        with self._lock:
+            self._load()
+            mapping = self._mapping(self._entry(headers))
+        # هدرهای غیر رشته‌ای به همان شیء اصلی ستون برگردانده می‌شوند
+        originals = {str(h): h for h in headers}
+        return {role: originals.get(col) if col is not None else None for role, col in mapping.items()}
+
+    def pinned(self, headers):
+        """نگاشت‌های ثابت شده کاربر برای یک ردیف هدر"""
+        with self._lock:
+            self._load()
+            return dict(self._entry(headers).get("pinned", {}))
+
+    def pin(self, headers, overrides):
+        """ثابت کردن نگاشت ستون‌ها: {ستون: هدر یا None (بدون ستون)}"""
+        with self._lock:
+            self._load()
+            entry = self._entry(headers)
+            entry["pinned"].update({role: (str(col) if col is not None else None)
+                                    for role, col in overrides.items()})
+            self._store_projection(entry)
+            self._save()
+
+    def unpin(self, headers):
+        """حذف نگاشت‌های ثابت شده یک ردیف هدر (بازگشت به تشخیص خودکار)"""
+        with self._lock:
+            self._load()
+            entry = self._entry(headers)
+            entry["pinned"] = {}
+            self._store_projection(entry)
+            self._save()
@@ -5,6 +5,10 @@ import pandas as pd
 import os
 import logging
 from openpyxl import load_workbook
+from excel_stream import read_sheet
+from repair_normalizer import ColumnNormalizer, NormalizationMemo
+from repair_rules import RepairRuleEngine
+from column_resolver import ColumnResolver
 from persiantools.jdatetime import JalaliDate
 import traceback
 from datetime import datetime
@@ -12,11 +16,21 @@ from datetime import datetime
 # تنظیمات لاگینگ
 logging.basicConfig(level=logging.INFO)
 
+# memo نرمالایز نوع تعمیر (مقدار خام -> نرمالایز شده) بین اجراهای برنامه
+NORMALIZE_MEMO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "normalize_memo.json")
+# قواعد مرتب نرمالایز نوع تعمیر از کلید repair_rules در settings.json
+SETTINGS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "settings.json")
+# نگاشت ستون‌ها به ازای هر ساختار هدر (مشترک با report_excel.py)
+COLUMN_RESOLVER = ColumnResolver(os.path.join(os.path.dirname(os.path.abspath(__file__)), "column_map.json"))
+
 class ExcelProcessor:
     def __init__(self):
         self.df = None
         self.df_normalized = None
         self.column_mapping = {}
+        # نرمالایز فقط یک بار برای هر مقدار یکتای ستون نوع تعمیر
+        self.repair_normalizer = ColumnNormalizer(RepairRuleEngine.from_settings(SETTINGS_PATH, profile="lower"),
+                                                  NormalizationMemo(NORMALIZE_MEMO_PATH))
         
     def load_excel(self, file_path, sheet_name):
         """بارگذاری فایل اکسل"""
@@ -24,18 +38,16 @@ class ExcelProcessor:
             print(f"📂 در حال بارگذاری فایل: {file_path}")
             print(f"📋 شیت انتخاب شده: {sheet_name}")
             
-            wb = load_workbook(file_path, read_only=False, data_only=True)
-            ws = wb[sheet_name]
-            data = list(ws.values)
-            wb.close()
+            self.df = read_sheet(
+                file_path, sheet_name,
+                header_func=lambda i, cell: str(cell).strip() if cell is not None else f"Column_{i}"
+            )
             
-            print(f"📊 تعداد ردیف‌های خوانده شده: {len(data)}")
+            print(f"📊 تعداد ردیف‌های خوانده شده: {0 if self.df is None else len(self.df) + 1}")
             
-            if not data or len(data) <= 1:
+            if self.df is None or self.df.empty:
+                self.df = None
                 return False
-                
-            headers = [str(cell).strip() if cell is not None else f"Column_{i}" for i, cell in enumerate(data[0])]
-            self.df = pd.DataFrame(data[1:], columns=headers)
             
             # حذف ستون‌های کاملاً خالی
             self.df = self.df.dropna(axis=1, how='all')
@@ -54,26 +66,8 @@ class ExcelProcessor:
         if self.df is None or self.df.empty:
             return
             
-        column_patterns = {
-            'repair_col': ['نوع تعمیر', 'تعمیر', 'repair'],
-            'part_col': ['قالب', 'قطعه', 'دستگاه', 'part', 'device'],
-            'date_col': ['تاریخ', 'date'],
-            'perf_col': ['مقدار ساعت کار شده', 'ساعت', 'hour', 'time'],
-            'req_col': ['شماره نامه درخواست', 'شماره درخواست', 'request'],
-            'code_col': ['کد قالب', 'کد', 'code']
-        }
-        
-        for col_type, patterns in column_patterns.items():
-            found_col = None
-            for col in self.df.columns:
-                col_str = str(col).strip().lower()
-                for pattern in patterns:
-                    if pattern.lower() in col_str:
-                        found_col = col
-                        break
-                if found_col:
-                    break
-            self.column_mapping[col_type] = found_col
+        # نگاشت ذخیره شده برای همین ساختار هدر یا امتیازدهی یک باره (column_resolver)
+        self.column_mapping.update(COLUMN_RESOLVER.resolve(self.df.columns))
     
     def _create_normalized_data(self):
         """ایجاد نسخه نرمالایز شده"""
@@ -83,31 +77,8 @@ class ExcelProcessor:
         self.df_normalized = self.df.copy()
         repair_col = self.column_mapping.get('repair_col')
         if repair_col and repair_col in self.df_normalized.columns:
-            self.df_normalized[repair_col] = self.df_normalized[repair_col].apply(self._normalize_repair_type)
+            self.df_normalized[repair_col] = self.repair_normalizer.normalize(self.df_normalized[repair_col])
     
-    def _normalize_repair_type(self, repair_type):
-        """نرمال‌سازی نوع تعمیر"""
-        if not isinstance(repair_type, str):
-            return str(repair_type)
-        
-        repair_type = str(repair_type).strip().lower()
-        
-        if 'قالب' in repair_type and 'تعمیر' in repair_type:
-            return 'قالب تعمیری'
-        elif 'قطعه' in repair_type and 'تعمیر' in repair_type:
-            return 'قطعه تعمیری'
-        elif 'دستگاه' in repair_type and 'تعمیر' in repair_type:
-            return 'دستگاه تعمیری'
-        elif 'قالب' in repair_type:
-            return 'قالب'
-        elif 'قطعه' in repair_type:
-            return 'قطعه'
-        elif 'دستگاه' in repair_type:
-            return 'دستگاه'
-        elif 'تعمیر' in repair_type:
-            return 'تعمیری'
-        else:
-            return repair_type
 
 class DataFilter:
     """کلاس برای فیلتر کردن داده‌ها"""
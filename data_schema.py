@@ -0,0 +1,144 @@
+# data_schema.py
+# -*- coding: utf-8 -*-
+"""
+لایه نوع‌دهی (schema) ستون‌های تشخیص داده شده
+
+بعد از detect_columns هر ستون فقط یک بار به نوع فشرده خودش تبدیل می‌شود و همین
+نوع‌ها در تمام نشست حفظ می‌شوند، تا فیلترها، گروه‌بندی و نمودارها دیگر
+pd.to_numeric یا pd.to_datetime را روی هر اجرا تکرار نکنند:
+- ساعت کار شده: float32 (مقادیر غیرعددی NaN)
+- نوع تعمیر، قالب/قطعه/دستگاه و کد قالب: categorical با دسته‌های رشته‌ای مرتب
+  (در df_normalized با کلیدهای متعارف persian_text تا فیلترهای برابری و گروه‌بندی
+  روی کدهای صحیح و بدون اختلاف ي/ی، نیم‌فاصله، ارقام و ":" انجام شوند)
+- تاریخ: شماره روز int32 در ستون جداگانه DAY_COL از df_normalized (jalali_dates)
+  (ستون تاریخ اصلی برای نمایش و خروجی دست نمی‌خورد)
+"""
+
+import numpy as np
+import pandas as pd
+
+from jalali_dates import DAY_DTYPE, DAY_MISSING, to_day_ordinals
+from persian_text import canonical_text
+
+HOURS_DTYPE = np.float32
+# رقم‌های اعشار مجموع ساعت‌ها در خروجی (حذف خطای گرد کردن جمع float64، مثل 3.4000000000000004)
+HOURS_DECIMALS = 6
+
+# ستون داخلی شماره روز (ordinal میلادی؛ مستقل از تقویم) در df_normalized
+DAY_COL = "__day"
+
+CATEGORY_COLUMNS = ("repair_col", "part_col", "code_col")
+# ستون‌هایی که در df_normalized با کلید متعارف ذخیره می‌شوند
+CANONICAL_COLUMNS = ("repair_col", "part_col", "code_col")
+
+
+def to_hours(series):
+    """ستون ساعت کار به float32"""
+    if series.dtype == HOURS_DTYPE:
+        return series
+    return pd.to_numeric(series, errors="coerce").astype(HOURS_DTYPE)
+
+
+def decimal_hours(series):
+    """
+    ستون ساعت float32 به float64 با همان مقدار اعشاری ورودی (2.3 به جای 2.299999952316284)
+    برای گروه‌بندی و خروجی؛ کوتاه‌ترین نمایش float32 فقط برای مقادیر یکتا ساخته می‌شود
+    """
+    values = series.to_numpy()
+    if values.dtype != HOURS_DTYPE:
+        return series.astype("float64")
+    uniques, inverse = np.unique(values, return_inverse=True)
+    exact = uniques.astype(str).astype(np.float64)[inverse.reshape(-1)]
+    return pd.Series(exact, index=series.index, name=series.name)
+
+
+def to_category(series):
+    """
+    ستون به categorical با دسته‌های رشته‌ای (همان مقادیر astype(str) قبلی)
+    مقادیر یکتا فقط یک بار به رشته تبدیل می‌شوند
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        if categories.dtype == object and all(isinstance(c, str) for c in categories):
+            return series
+        series = series.astype(object)
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    labels = np.array([str(u) for u in uniques], dtype=object)
+    # مقادیر مختلفی که رشته یکسان دارند (مثلاً 12 و "12") یک دسته می‌شوند
+    categories, inverse = np.unique(labels, return_inverse=True)
+    if len(uniques):
+        codes = np.where(codes >= 0, inverse[np.maximum(codes, 0)], -1)
+    categorical = pd.Categorical.from_codes(codes, categories=pd.Index(categories, dtype=object))
+    return pd.Series(categorical, index=series.index, name=series.name)
+
+
+def map_categories(series, func):
+    """
+    اعمال تابع روی دسته‌های یک ستون categorical (فقط یک بار برای هر دسته)
+    دسته‌هایی که نتیجه یکسان دارند یکی می‌شوند
+    """
+    series = to_category(series)
+    categories = series.cat.categories
+    keys = np.array([func(c) for c in categories], dtype=object)
+    if len(keys) == 0 or (keys == np.asarray(categories, dtype=object)).all():
+        return series
+
+    mapped, inverse = np.unique(keys, return_inverse=True)
+    codes = series.cat.codes.to_numpy()
+    codes = np.where(codes >= 0, inverse[np.maximum(codes, 0)], -1)
+    categorical = pd.Categorical.from_codes(codes, categories=pd.Index(mapped, dtype=object))
+    return pd.Series(categorical, index=series.index, name=series.name)
+
+
+def to_canonical_category(series):
+    """ستون به categorical با دسته‌های کلید متعارف (canonical_text)"""
+    return map_categories(series, canonical_text)
+
+
+# -----------------------------
+def apply_schema(df, columns):
+    """تبدیل در جای ستون‌های ساعت و categorical یک DataFrame بر اساس ستون‌های تشخیص داده شده"""
+    perf_col = columns.get("perf_col")
+    if perf_col is not None and perf_col in df.columns:
+        df[perf_col] = to_hours(df[perf_col])
+    for key in CATEGORY_COLUMNS:
+        col = columns.get(key)
+        if col is not None and col in df.columns:
+            df[col] = to_category(df[col])
+    return df
+
+
+def typed_dataset(df, columns, normalized=None):
+    """
+    اعمال schema روی df (در جا) و ساخت df_normalized:
+    کپی df با ستون‌های نرمالایز شده (مثلاً نوع تعمیر) به صورت categorical، ستون‌های
+    CANONICAL_COLUMNS با کلید متعارف و ستون DAY_COL
+    normalized: DataFrame ستون‌های نرمالایز شده هم‌تراز با df یا None
+    """
+    apply_schema(df, columns)
+    df_normalized = df.copy()
+    if normalized is not None:
+        for col in normalized.columns:
+            if col in df_normalized.columns:
+                df_normalized[col] = to_category(pd.Series(normalized[col].values, index=df.index, name=col))
+    for key in CANONICAL_COLUMNS:
+        col = columns.get(key)
+        if col is not None and col in df_normalized.columns:
+            df_normalized[col] = to_canonical_category(df_normalized[col])
+
+    date_col = columns.get("date_col")
+    if date_col is not None and date_col in df.columns:
+        df_normalized[DAY_COL] = to_day_ordinals(df[date_col])
+    else:
+        df_normalized[DAY_COL] = np.full(len(df), DAY_MISSING, dtype=DAY_DTYPE)
+    return df_normalized
+
+
+def distinct_strings(series):
+    """مجموعه مقادیر رشته‌ای موجود در یک ستون (برای categorical فقط دسته‌های استفاده شده)"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        used = np.unique(codes[codes >= 0])
+        return set(series.cat.categories[used])
+    return set(series.dropna().astype(str).unique())
@@ -0,0 +1,548 @@
+# excel_stream.py
+# -*- coding: utf-8 -*-
+"""
+خواندن جریانی (streaming) شیت اکسل به بافرهای ستونی تایپ‌دار
+
+به جای ساختن list(ws.values) و سپس DataFrame، ردیف‌ها یک بار با
+iter_rows(values_only=True) پیمایش می‌شوند و هر مقدار مستقیماً به بافر ستون
+خودش اضافه می‌شود: اعداد در array('d')/array('q')، تاریخ‌ها به صورت عدد
+صحیح (ثانیه از مبدأ ordinal) و رشته‌ها به صورت کد دیکشنری. DataFrame در پایان
+از همین بافرها ساخته می‌شود.
+"""
+
+import os
+import hashlib
+import datetime
+import logging
+from array import array
+from itertools import islice, chain
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from xlsx_reader import XlsxWorkbook
+
+# فاصله مبدأ ordinal پایتون (0001-01-01) تا مبدأ یونیکس بر حسب ثانیه
+_EPOCH_SECONDS = (datetime.date(1970, 1, 1).toordinal() - 1) * 86400
+
+_EMPTY, _INT, _FLOAT, _DATE, _STR, _OBJECT = range(6)
+_INT_MIN, _INT_MAX = -2**63, 2**63 - 1
+_FLOAT_CLASSES = frozenset((float, int))
+_INT_CLASSES = frozenset((int,))
+
+# موتورهای خواندن فایل؛ قابل انتخاب از settings.json با کلید excel_engine
+ENGINE_OPENPYXL = "openpyxl"
+ENGINE_XLSX = "xlsx"
+
+# تعداد ردیف‌هایی که در هر دسته ترانهاده و به بافرها اضافه می‌شوند
+CHUNK_ROWS = 2048
+
+# تعداد ردیف‌های انتهایی که برای تشخیص تغییر نکردن داده‌های قبلی هش می‌شوند
+TAIL_SIGNATURE_ROWS = 32
+
+
+class LoadCancelled(Exception):
+    """بارگذاری توسط کاربر لغو شد"""
+
+
+def default_header(index, value):
+    """پاک‌سازی هدر به روش برنامه اصلی: خالی برای سلول‌های بدون مقدار"""
+    return str(value).strip() if value else ""
+
+
+class ColumnBuilder:
+    """بافر تایپ‌دار یک ستون که نوع خود را از روی مقادیر تشخیص می‌دهد"""
+
+    __slots__ = ("kind", "buf", "missing", "lookup", "strings", "length")
+
+    def __init__(self):
+        self.kind = _EMPTY
+        self.buf = None
+        self.missing = None
+        self.lookup = None
+        self.strings = None
+        self.length = 0
+
+    # -------------------------
+    def append(self, value):
+        kind = self.kind
+        if value is None:
+            self._append_missing()
+        elif kind == _STR and value.__class__ is str:
+            code = self.lookup.get(value)
+            if code is None:
+                code = len(self.strings)
+                self.lookup[value] = code
+                self.strings.append(value)
+            self.buf.append(code)
+        elif kind == _FLOAT and (value.__class__ is float
+                                 or (value.__class__ is int and _INT_MIN <= value <= _INT_MAX)):
+            self.buf.append(value)
+        elif kind == _INT and value.__class__ is int and _INT_MIN <= value <= _INT_MAX:
+            self.buf.append(value)
+        elif kind == _DATE and value.__class__ is datetime.datetime:
+            self.buf.append(_datetime_seconds(value))
+        elif kind == _OBJECT:
+            self.buf.append(value)
+        else:
+            self._append_slow(value)
+        self.length += 1
+
+    def extend(self, values):
+        """افزودن یک دسته از مقادیر؛ در حالت عادی بدون فراخوانی تابع برای هر سلول"""
+        kind = self.kind
+        buf = self.buf
+        if kind == _STR:
+            get = self.lookup.get
+            codes = [get(v) for v in values]
+            if None not in codes:
+                buf.extend(codes)
+                self.length += len(codes)
+                return
+        elif kind in (_FLOAT, _INT):
+            # فقط اگر همه مقادیر دسته هم‌نوع بافر باشند (bool و خالی مسیر تک‌مقداری را می‌روند)
+            classes = set(map(type, values))
+            if (classes <= (_FLOAT_CLASSES if kind == _FLOAT else _INT_CLASSES)
+                    and (int not in classes or (_INT_MIN <= min(values) and max(values) <= _INT_MAX))):
+                buf.extend(values)
+                self.length += len(values)
+                return
+        elif kind == _DATE:
+            try:
+                seconds = [_datetime_seconds(v) for v in values]
+            except AttributeError:
+                seconds = None
+            if seconds is not None:
+                buf.extend(seconds)
+                self.length += len(seconds)
+                return
+        elif kind == _OBJECT:
+            buf.extend(values)
+            self.length += len(values)
+            return
+        append = self.append
+        for value in values:
+            append(value)
+
+    def _append_missing(self):
+        if self.missing is None:
+            self.missing = []
+        self.missing.append(self.length)
+        kind = self.kind
+        if kind == _STR:
+            self.buf.append(-1)
+        elif kind == _FLOAT:
+            self.buf.append(float("nan"))
+        elif kind in (_INT, _DATE):
+            self.buf.append(0)
+        elif kind == _OBJECT:
+            self.buf.append(None)
+
+    def _append_slow(self, value):
+        """اولین مقدار ستون یا مقداری که با نوع فعلی بافر سازگار نیست"""
+        cls = value.__class__
+        if self.kind == _EMPTY:
+            if cls is str:
+                self._start(_STR, array("i"))
+                # None در دیکشنری به کد -1 (خالی) نگاشت می‌شود
+                self.lookup = {value: 0, None: -1}
+                self.strings = [value]
+                self.buf.append(0)
+                return
+            if cls is float:
+                self._start(_FLOAT, array("d"))
+                self.buf.append(value)
+                return
+            if cls is int and _INT_MIN <= value <= _INT_MAX:
+                self._start(_INT, array("q"))
+                self.buf.append(value)
+                return
+            if cls is datetime.datetime:
+                self._start(_DATE, array("q"))
+                self.buf.append(_datetime_seconds(value))
+                return
+        elif self.kind == _INT and cls is float:
+            # ستون عدد صحیح با اولین مقدار اعشاری به float64 تبدیل می‌شود
+            self.buf = array("d", self.buf)
+            for i in self.missing or ():
+                self.buf[i] = float("nan")
+            self.kind = _FLOAT
+            self.buf.append(value)
+            return
+
+        self._to_object()
+        self.buf.append(value)
+
+    def _start(self, kind, buf):
+        """شروع بافر تایپ‌دار با پر کردن جای خالی ردیف‌های قبلی"""
+        self.kind = kind
+        self.buf = buf
+        if self.length:
+            pad = -1 if kind == _STR else (float("nan") if kind == _FLOAT else 0)
+            buf.extend([pad] * self.length)
+
+    def _to_object(self):
+        """بازگشت به لیست اشیای پایتون برای ستون‌های با نوع مختلط"""
+        values = self._object_values() if self.length else []
+        self.buf = values
+        self.kind = _OBJECT
+        self.lookup = None
+        self.strings = None
+
+    def _object_values(self):
+        kind = self.kind
+        if kind == _EMPTY:
+            return [None] * self.length
+        if kind == _OBJECT:
+            return list(self.buf)
+        if kind == _STR:
+            lookup = self.strings + [None]
+            values = [lookup[c] for c in self.buf]
+        elif kind == _DATE:
+            values = [_seconds_datetime(s) for s in self.buf]
+        else:
+            values = list(self.buf)
+        for i in self.missing or ():
+            values[i] = None
+        return values
+
+    # -------------------------
+    def to_array(self, length, categorical=False):
+        """ساخت آرایه نهایی ستون با طول length"""
+        while self.length < length:
+            self.append(None)
+        kind = self.kind
+        if kind == _EMPTY:
+            return np.full(length, None, dtype=object)
+        if kind == _OBJECT:
+            arr = np.empty(length, dtype=object)
+            arr[:] = self.buf
+            return arr
+        if kind == _STR:
+            codes = np.frombuffer(self.buf, dtype=np.int32)
+            if categorical:
+                return pd.Categorical.from_codes(codes, categories=pd.Index(self.strings, dtype=object))
+            # هر رشته تکراری به همان شیء پایتون اشاره می‌کند
+            lookup = np.empty(len(self.strings) + 1, dtype=object)
+            lookup[:-1] = self.strings
+            lookup[-1] = None
+            return lookup[codes]
+        if kind == _FLOAT:
+            return np.frombuffer(self.buf, dtype=np.float64)
+        if kind == _INT:
+            arr = np.frombuffer(self.buf, dtype=np.int64)
+            if self.missing:
+                arr = arr.astype(np.float64)
+                arr[self.missing] = np.nan
+            return arr
+        # _DATE
+        seconds = np.frombuffer(self.buf, dtype=np.int64) - _EPOCH_SECONDS
+        arr = seconds.astype("datetime64[s]").astype("datetime64[ns]")
+        if self.missing:
+            arr[self.missing] = np.datetime64("NaT")
+        return arr
+
+
+def _datetime_seconds(value):
+    return ((value.toordinal() - 1) * 86400
+            + value.hour * 3600 + value.minute * 60 + value.second)
+
+
+def _seconds_datetime(seconds):
+    days, rem = divmod(seconds, 86400)
+    return datetime.datetime.fromordinal(days + 1) + datetime.timedelta(seconds=rem)
+
+
+# -----------------------------
+def _fit_row(row, width):
+    """هم‌طول کردن ردیف با تعداد هدرها"""
+    row = tuple(row[:width])
+    return row + (None,) * (width - len(row))
+
+
+def build_frame(rows, header_func=default_header, categorical=False, chunk_size=CHUNK_ROWS,
+                progress=None, total=0):
+    """
+    ساخت DataFrame از یک iterator ردیف‌ها (ردیف اول هدر)
+    ردیف‌ها در دسته‌های chunk_size تایی ترانهاده می‌شوند تا حافظه موقت محدود بماند
+    progress(ردیف‌های خوانده شده, total) بعد از هر دسته صدا زده می‌شود و می‌تواند
+    با LoadCancelled کار را متوقف کند
+    در صورت خالی بودن شیت None برمی‌گرداند
+    """
+    rows = iter(rows)
+    header_row = next(rows, None)
+    if header_row is None:
+        return None
+
+    headers = [header_func(i, x) for i, x in enumerate(header_row)]
+    width = len(headers)
+    builders = [ColumnBuilder() for _ in range(width)]
+
+    count = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        count += len(chunk)
+        if any(len(row) != width for row in chunk):
+            chunk = [_fit_row(row, width) for row in chunk]
+        for builder, values in zip(builders, zip(*chunk)):
+            builder.extend(values)
+        if progress is not None:
+            progress(count, max(total, count))
+
+    data = {i: b.to_array(count, categorical) for i, b in enumerate(builders)}
+    df = pd.DataFrame(data, index=pd.RangeIndex(count))
+    df.columns = headers
+    return df
+
+
+def read_sheet(path, sheet, header_func=default_header, categorical=False, progress=None,
+               engine=ENGINE_OPENPYXL, usecols=None, stats=None):
+    """
+    خواندن جریانی یک شیت از فایل اکسل به DataFrame
+    تعداد کل ردیف‌ها برای progress از المان dimension شیت گرفته می‌شود
+    engine: "xlsx" برای خواننده مستقیم zip/XML و "openpyxl" برای مسیر قبلی؛
+    در صورت خطای خواننده سریع، openpyxl به عنوان جایگزین استفاده می‌شود
+    usecols: اندیس ستون‌هایی که خوانده می‌شوند (None یعنی همه ستون‌ها)
+    stats: دیکشنری اختیاری که skipped_cells (سلول‌های غیرخالی خوانده نشده) در آن نوشته می‌شود
+    """
+    return _read_frame(path, sheet, engine, header_func, categorical, progress, usecols, 0, stats)
+
+
+def read_sheet_header(path, sheet, header_func=default_header, engine=ENGINE_OPENPYXL):
+    """فقط ردیف هدر شیت (مرحله اول بارگذاری ستون‌های انتخابی)؛ برای شیت خالی None"""
+    return read_sheet_headers(path, [sheet], header_func, engine)[sheet]
+
+
+def read_sheet_headers(path, sheets, header_func=default_header, engine=ENGINE_OPENPYXL):
+    """هدر چند شیت با یک بار باز کردن فایل: {نام شیت: لیست هدرها یا None}"""
+    rows = {}
+    if engine == ENGINE_XLSX:
+        try:
+            with XlsxWorkbook(path) as wb:
+                for sheet in sheets:
+                    it = wb.iter_rows(sheet)
+                    rows[sheet] = next(it, None)
+                    it.close()
+        except Exception as e:
+            logging.error(f"Fast xlsx reader failed for headers in {path}, falling back to openpyxl: {e}")
+            engine = ENGINE_OPENPYXL
+
+    if engine != ENGINE_XLSX:
+        wb = load_workbook(path, data_only=True, read_only=True)
+        try:
+            for sheet in sheets:
+                rows[sheet] = next(wb[sheet].iter_rows(max_row=1, values_only=True), None)
+        finally:
+            wb.close()
+
+    return {sheet: [header_func(i, x) for i, x in enumerate(row)] if row is not None else None
+            for sheet, row in rows.items()}
+
+
+def _read_frame(path, sheet, engine, header_func, categorical, progress, usecols, skip_rows, stats):
+    """خواندن شیت با موتور انتخاب شده و جایگزینی openpyxl در صورت خطای خواننده سریع"""
+    if usecols is not None:
+        usecols = sorted(usecols)
+        base_header = header_func
+        # نام‌گذاری هدرهای خالی با اندیس اصلی ستون در شیت
+        header_func = lambda i, value: base_header(usecols[i], value)
+
+    if engine == ENGINE_XLSX:
+        try:
+            with XlsxWorkbook(path) as wb:
+                dimension = wb.sheet_dimension(sheet)
+                total = max(dimension[0] - 1 - skip_rows, 0) if dimension else 0
+                rows = wb.iter_rows(sheet, usecols, skip_rows, stats)
+                return build_frame(rows, header_func, categorical, progress=progress, total=total)
+        except LoadCancelled:
+            raise
+        except Exception as e:
+            logging.error(f"Fast xlsx reader failed for {sheet} in {path}, falling back to openpyxl: {e}")
+
+    wb = load_workbook(path, data_only=True, read_only=True)
+    try:
+        ws = wb[sheet]
+        total = max((ws.max_row or 1) - 1 - skip_rows, 0)
+        if skip_rows:
+            header = next(ws.iter_rows(max_row=1, values_only=True), None)
+            if header is None:
+                return None
+            rows = chain([header], ws.iter_rows(min_row=skip_rows + 2, values_only=True))
+        else:
+            rows = ws.iter_rows(values_only=True)
+        if usecols is not None:
+            rows = _project_rows(rows, usecols, stats)
+        return build_frame(rows, header_func, categorical, progress=progress, total=total)
+    except LoadCancelled:
+        raise
+    except Exception as e:
+        logging.error(f"Error streaming sheet {sheet} from {path}: {e}")
+        raise
+    finally:
+        wb.close()
+
+
+def _project_rows(rows, usecols, stats=None):
+    """انتخاب ستون‌های usecols از ردیف‌های کامل openpyxl"""
+    wanted = set(usecols)
+    skipped = 0
+    for row in rows:
+        width = len(row)
+        skipped += sum(1 for i, value in enumerate(row) if value is not None and i not in wanted)
+        yield tuple(row[i] if i < width else None for i in usecols)
+    if stats is not None:
+        stats["skipped_cells"] = skipped
+
+
+# -----------------------------
+def _signature_value(value):
+    """یکسان‌سازی مقدار برای هش، مستقل از dtype ستون (مثلاً 3 و 3.0)"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        value = float(value)
+        return int(value) if value.is_integer() else value
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def frame_signature(df):
+    """هش sha1 مقادیر ردیف‌های یک DataFrame"""
+    h = hashlib.sha1()
+    for row in df.itertuples(index=False, name=None):
+        h.update(repr(tuple(_signature_value(v) for v in row)).encode("utf-8"))
+    return h.hexdigest()
+
+
+def tail_signature(df, rows=TAIL_SIGNATURE_ROWS, usecols=None):
+    """
+    وضعیت انتهای یک شیت برای بارگذاری افزایشی: تعداد ردیف، ستون‌ها و هش ردیف‌های آخر
+    usecols: اندیس ستون‌هایی که df از شیت خوانده شده (None یعنی همه ستون‌ها)
+    """
+    rows = min(rows, len(df))
+    return {
+        "rows": len(df),
+        "columns": [str(c) for c in df.columns],
+        "usecols": sorted(usecols) if usecols is not None else None,
+        "overlap": rows,
+        "signature": frame_signature(df.iloc[len(df) - rows:]),
+    }
+
+
+def read_sheet_appended(path, sheet, tail, header_func=default_header, progress=None,
+                        engine=ENGINE_OPENPYXL):
+    """
+    خواندن فقط ردیف‌های اضافه شده به انتهای شیت نسبت به وضعیت tail (خروجی tail_signature)
+    ردیف‌های قبل از بخش هش شده بدون تبدیل سلول‌ها رد می‌شوند.
+    اگر هدرها یا ردیف‌های انتهایی قبلی تغییر کرده باشند None برمی‌گرداند (نیاز به بارگذاری کامل)؛
+    در غیر این صورت DataFrame ردیف‌های جدید (ممکن است خالی باشد) با index ادامه داده‌های قبلی
+    """
+    overlap = tail["overlap"]
+    skip = tail["rows"] - overlap
+    frame = _read_frame(path, sheet, engine, header_func, False, progress, tail.get("usecols"), skip, None)
+
+    if frame is None or [str(c) for c in frame.columns] != tail["columns"]:
+        return None
+    if len(frame) < overlap or frame_signature(frame.iloc[:overlap]) != tail["signature"]:
+        return None
+
+    appended = frame.iloc[overlap:]
+    appended.index = pd.RangeIndex(tail["rows"], tail["rows"] + len(appended))
+    return appended
+
+
+# -----------------------------
+def _read_sheet_task(path, sheet, engine, usecols=None):
+    """تابع اجرا در پروسس کارگر"""
+    return read_sheet(path, sheet, engine=engine, usecols=usecols)
+
+
+def read_sheet_tasks_parallel(tasks, max_workers=None, progress=None, engine=ENGINE_OPENPYXL):
+    """
+    خواندن همزمان شیت‌های یک یا چند فایل در ProcessPoolExecutor
+    tasks: لیست (مسیر فایل, نام شیت, اندیس ستون‌های خوانده شده یا None)
+    progress(شیت‌های تمام شده, کل شیت‌ها) به طور مرتب صدا زده می‌شود؛ اگر LoadCancelled
+    بدهد شیت‌های در صف لغو می‌شوند و شیت‌های در حال خواندن نتیجه‌شان دور ریخته می‌شود
+    خروجی دیکشنری {(مسیر, شیت): DataFrame یا None برای شیت خالی} به ترتیب ورودی
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return {}
+    if len(tasks) == 1:
+        path, sheet, usecols = tasks[0]
+        return {(path, sheet): read_sheet(path, sheet, engine=engine, usecols=usecols)}
+
+    workers = min(len(tasks), max_workers or os.cpu_count() or 1)
+    results = {}
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = {executor.submit(_read_sheet_task, path, sheet, engine, usecols): (path, sheet)
+                   for path, sheet, usecols in tasks}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[futures[future]] = future.result()
+            if progress is not None:
+                progress(len(results), len(tasks))
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+    return {(path, sheet): results[(path, sheet)] for path, sheet, _ in tasks}
+
+
+def read_sheets_parallel(path, sheets, max_workers=None, progress=None, engine=ENGINE_OPENPYXL,
+                         usecols=None):
+    """
+    خواندن همزمان چند شیت یک فایل (read_sheet_tasks_parallel)
+    usecols: دیکشنری اختیاری {نام شیت: اندیس ستون‌های خوانده شده}
+    خروجی دیکشنری {نام شیت: DataFrame یا None برای شیت خالی} به ترتیب ورودی
+    """
+    usecols = usecols or {}
+    tasks = [(path, sheet, usecols.get(sheet)) for sheet in sheets]
+    results = read_sheet_tasks_parallel(tasks, max_workers, progress, engine)
+    return {sheet: df for (_, sheet), df in results.items()}
+
+
+def _unique_columns(columns):
+    """یکتا کردن نام ستون‌های تکراری (مثلاً چند هدر خالی) با پسوند .1، .2 ..."""
+    seen = {}
+    result = []
+    for col in columns:
+        if col in seen:
+            seen[col] += 1
+            result.append(f"{col}.{seen[col]}")
+        else:
+            seen[col] = 0
+            result.append(col)
+    return result
+
+
+def concat_sheets(frames, source_col=None):
+    """
+    الحاق DataFrameهای چند شیت با هم‌ترازی ستون‌ها بر اساس نام
+    اگر source_col داده شود، نام شیت هر ردیف به صورت ستون categorical اضافه می‌شود
+    """
+    names = [name for name, df in frames.items() if df is not None]
+    parts = []
+    for name in names:
+        df = frames[name]
+        if df.columns.duplicated().any():
+            df = df.set_axis(_unique_columns(df.columns), axis=1)
+        parts.append(df)
+    if not parts:
+        return None
+
+    combined = pd.concat(parts, ignore_index=True, sort=False)
+    if source_col is not None:
+        codes = np.repeat(np.arange(len(parts), dtype=np.int32), [len(df) for df in parts])
+        combined[source_col] = pd.Categorical.from_codes(codes, categories=names)
+    return combined
@@ -0,0 +1,423 @@
+# filter_index.py
+# -*- coding: utf-8 -*-
+"""
+ایندکس معکوس (inverted index) ستون‌های فیلتر: نوع تعمیر، قالب/قطعه/دستگاه، کد قالب و شماره درخواست
+
+به جای ساختن ماسک با مقایسه کل ستون در هر کلیک فیلتر، هنگام بارگذاری برای هر ستون
+یک بار شماره ردیف‌های هر مقدار ساخته می‌شود (CSR: ردیف‌ها مرتب بر اساس کد دسته و
+آفست شروع هر دسته). ماسک بیتی (bitmap) یک یا چند مقدار فقط با نشاندن همان ردیف‌ها
+ساخته می‌شود و فیلترها AND ستون‌ها و OR مقادیر انتخاب شده یک ستون هستند.
+
+برای تاریخ، ردیف‌ها یک بار بر اساس شماره روز (DAY_COL) مرتب می‌شوند و هر بازه شمسی
+با دو searchsorted به یک برش پیوسته از شماره ردیف‌ها تبدیل می‌شود؛ کمترین و بیشترین
+تاریخ داده‌ها هم از دو سر همین ترتیب خوانده می‌شود.
+
+FilterPlan شرط‌های یک فیلتر (مقادیر ستون، بازه تاریخ، بازه ساعت) را فقط جمع می‌کند؛
+شرط‌ها هنگام نیاز به ردیف‌ها یک بار و به ترتیب روی ستون‌های اصلی ارزیابی و در یک ماسک
+AND می‌شوند و خروجی فقط یک بار (یک take روی DataFrame اصلی) ساخته می‌شود، بدون کپی
+کامل دیتاست یا DataFrame میانی برای هر مرحله.
+
+وقتی فیلتر محدودتر می‌شود (شرط اضافه، بازه تاریخ یا ساعت کوتاه‌تر، مقادیر کمتر)
+FilterPlan.refine فقط شرط‌های جدید را روی شماره ردیف‌های نتیجه قبلی ارزیابی می‌کند و
+هزینه آن متناسب با اندازه نتیجه فعلی است، نه کل دیتاست؛ با بازتر شدن فیلتر ارزیابی کامل
+انجام می‌شود.
+
+FilterResultCache نتیجه فیلترهای اخیر را (با کلید نسخه دیتاست و وضعیت یکسان‌سازی شده
+فیلتر) با سقف حافظه و حذف LRU نگه می‌دارد تا تکرار یک فیلتر بدون ارزیابی دوباره باشد.
+
+AdjacencyIndex زوج‌های یکتای (نوع تعمیر، قالب/قطعه/دستگاه) را در هر دو جهت نگه می‌دارد
+تا کمبوباکس‌های وابسته بدون ماسک روی کل ستون همدیگر را محدود کنند؛ با افزودن ردیف‌ها
+فقط زوج‌های ردیف‌های جدید اضافه می‌شوند.
+
+bitmap جداگانه برای هر مقدار نگه داشته نمی‌شود: با هزاران قالب و یک میلیون ردیف
+حافظه آن چند صد مگابایت می‌شد، در حالی که لیست ردیف‌ها روی هم فقط یک آرایه int32
+به اندازه تعداد ردیف‌هاست.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from data_schema import DAY_COL, to_category
+from jalali_dates import DAY_MISSING
+
+# ستون‌هایی که ایندکس می‌شوند (کلیدهای detect_column_names)
+INDEXED_COLUMNS = ("repair_col", "part_col", "code_col", "req_col")
+
+# سقف پیش‌فرض حافظه نتایج نگه داشته شده فیلتر (مگابایت)
+DEFAULT_CACHE_MB = 256
+
+
+class ColumnIndex:
+    """شماره ردیف‌های هر مقدار یک ستون (روی رشته‌های دسته‌های categorical)"""
+
+    def __init__(self, series):
+        series = to_category(series)
+        categories = series.cat.categories
+        # کدهای کوچک (int16) با مرتب‌سازی radix در argsort پایدار مرتب می‌شوند
+        code_dtype = np.int16 if len(categories) < 2**15 - 1 else np.int32
+        codes = series.cat.codes.to_numpy().astype(code_dtype) + 1
+        # کد دسته هر ردیف (برای بررسی شرط فقط روی ردیف‌های یک نتیجه قبلی)
+        self.codes = codes
+        self.size = len(codes)
+        self.positions = {value: code + 1 for code, value in enumerate(categories)}
+        counts = np.bincount(codes, minlength=len(categories) + 1)
+        # offsets[k]..offsets[k+1]: ردیف‌های کد k (کد 0: مقادیر خالی)
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+        row_dtype = np.int32 if self.size < 2**31 else np.int64
+        self.rows = np.argsort(codes, kind="stable").astype(row_dtype)
+
+    def rows_for(self, value):
+        """شماره ردیف‌های (مرتب) یک مقدار؛ آرایه خالی برای مقدار ناموجود"""
+        code = self.positions.get(value)
+        if code is None:
+            return self.rows[:0]
+        return self.rows[self.offsets[code]:self.offsets[code + 1]]
+
+    def count(self, value):
+        """تعداد ردیف‌های یک مقدار"""
+        code = self.positions.get(value)
+        return 0 if code is None else int(self.offsets[code + 1] - self.offsets[code])
+
+    def bitmap(self, values):
+        """ماسک بولی ردیف‌هایی که مقدارشان یکی از values است (OR)"""
+        mask = np.zeros(self.size, dtype=bool)
+        for value in values:
+            mask[self.rows_for(value)] = True
+        return mask
+
+    def test(self, rows, values):
+        """ماسک بولی هم‌طول rows: مقدار کدام ردیف‌ها یکی از values است"""
+        wanted = [self.positions[value] for value in values if value in self.positions]
+        return np.isin(self.codes[rows], wanted)
+
+
+class DateIndex:
+    """شماره ردیف‌ها مرتب بر اساس شماره روز؛ بازه تاریخ با دو جستجوی دودویی"""
+
+    def __init__(self, days):
+        days = np.asarray(days)
+        # شماره روز هر ردیف به ترتیب اصلی (برای بررسی شرط فقط روی ردیف‌های یک نتیجه قبلی)
+        self.values = days
+        self.size = len(days)
+        row_dtype = np.int32 if self.size < 2**31 else np.int64
+        self.order = np.argsort(days, kind="stable").astype(row_dtype)
+        self.days = days[self.order]
+        # تاریخ‌های خالی (DAY_MISSING) ابتدای ترتیب قرار می‌گیرند
+        self.first_valid = int(np.searchsorted(self.days, DAY_MISSING, side="right"))
+
+    @property
+    def min_day(self):
+        """کمترین شماره روز (None اگر تاریخی وجود نداشته باشد)"""
+        return int(self.days[self.first_valid]) if self.first_valid < self.size else None
+
+    @property
+    def max_day(self):
+        """بیشترین شماره روز (None اگر تاریخی وجود نداشته باشد)"""
+        return int(self.days[-1]) if self.first_valid < self.size else None
+
+    def rows_between(self, start_day, end_day):
+        """شماره ردیف‌های با تاریخ بین start_day و end_day (هر دو شامل)، به ترتیب تاریخ"""
+        lo = max(int(np.searchsorted(self.days, start_day, side="left")), self.first_valid)
+        hi = int(np.searchsorted(self.days, end_day, side="right"))
+        return self.order[lo:max(lo, hi)]
+
+    def bitmap(self, start_day, end_day):
+        """ماسک بولی ردیف‌های بازه تاریخ"""
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.rows_between(start_day, end_day)] = True
+        return mask
+
+    def test(self, rows, start_day, end_day):
+        """ماسک بولی هم‌طول rows: تاریخ کدام ردیف‌ها در بازه است"""
+        days = self.values[rows]
+        return (days >= start_day) & (days <= end_day) & (days != DAY_MISSING)
+
+
+class FilterIndex:
+    """ایندکس ستون‌های فیلتر یک دیتاست (df_normalized با کلیدهای متعارف)"""
+
+    def __init__(self, df_normalized, columns, roles=INDEXED_COLUMNS, days=None):
+        """days: شماره روز ردیف‌ها؛ پیش‌فرض ستون DAY_COL از df_normalized"""
+        self.df_normalized = df_normalized
+        self.columns = columns
+        self.size = len(df_normalized)
+        self._indexes = {}
+        self._lock = threading.Lock()
+        for role in roles:
+            self.column(role)
+        if days is None and DAY_COL in df_normalized.columns:
+            days = df_normalized[DAY_COL]
+        self.dates = DateIndex(days) if days is not None else None
+
+    def column(self, role):
+        """ایندکس یک ستون (در صورت نبود، ساخته می‌شود)؛ None اگر ستون تشخیص داده نشده باشد"""
+        col = self.columns.get(role)
+        if col is None or col not in self.df_normalized.columns:
+            return None
+        with self._lock:
+            index = self._indexes.get(role)
+            if index is None:
+                index = self._indexes[role] = ColumnIndex(self.df_normalized[col])
+            return index
+
+    def invalidate(self, role):
+        """حذف ایندکس یک ستون پس از تغییر مقادیر آن (مثلاً اعمال نام‌های مستعار)"""
+        with self._lock:
+            self._indexes.pop(role, None)
+
+    def plan(self):
+        """طرح فیلتر خالی (همه ردیف‌ها) روی این دیتاست"""
+        return FilterPlan(self)
+
+
+class FilterPlan:
+    """
+    طرح فیلتر lazy: شرط‌ها جمع و فقط هنگام نیاز به ردیف‌ها ارزیابی می‌شوند
+    مقادیر یک ستون OR و شرط‌ها با هم AND؛ ستون تشخیص داده نشده نادیده گرفته می‌شود
+    """
+
+    def __init__(self, index):
+        self.index = index
+        # هر شرط: (ماسک کل دیتاست، ماسک فقط روی ردیف‌های داده شده)
+        self._predicates = []
+        self._keys = []
+        self._mask = None
+        self._rows = None
+        # طرح قبلی که این طرح محدودتر از آن است (refine)
+        self._base = None
+
+    def _add(self, key, full, at_rows):
+        self._keys.append(key)
+        self._predicates.append((full, at_rows))
+        self._mask = self._rows = None
+        return self
+
+    @property
+    def key(self):
+        """
+        کلید یکسان‌سازی شده شرط‌ها (مستقل از ترتیب شرط‌ها و ترتیب مقادیر انتخاب شده)
+        برای کلید کش نتایج؛ دیتاست در آن نیست و نسخه دیتاست باید جدا اضافه شود
+        """
+        return tuple(sorted(self._keys, key=repr))
+
+    def values(self, role, values):
+        """ردیف‌هایی که مقدار ستون role یکی از values است"""
+        column = self.index.column(role)
+        if column is None:
+            return self
+        values = sorted(set(values))
+        return self._add(("values", role, tuple(values)),
+                         lambda: column.bitmap(values), lambda rows: column.test(rows, values))
+
+    def days(self, start_day, end_day):
+        """ردیف‌های بازه شماره روز (هر دو شامل)"""
+        dates = self.index.dates
+        if dates is None:
+            return self
+        return self._add(("days", int(start_day), int(end_day)),
+                         lambda: dates.bitmap(start_day, end_day),
+                         lambda rows: dates.test(rows, start_day, end_day))
+
+    def between(self, values, low=None, high=None, label=""):
+        """
+        ردیف‌هایی که مقدار عددی‌شان (آرایه هم‌طول دیتاست) بین low و high است؛ None یعنی بدون حد
+        label: نام ستون مقادیر در کلید طرح
+        """
+        if low is None and high is None:
+            return self
+
+        def predicate(array):
+            mask = array >= low if low is not None else np.ones(len(array), dtype=bool)
+            if high is not None:
+                mask &= array <= high
+            return mask
+        return self._add(("between", label, low, high),
+                         lambda: predicate(np.asarray(values)), lambda rows: predicate(np.asarray(values)[rows]))
+
+    @property
+    def empty(self):
+        """بدون هیچ شرطی (همه ردیف‌ها)"""
+        return not self._predicates
+
+    def narrows(self, previous):
+        """هر ردیف این طرح در نتیجه طرح قبلی هم هست (هر شرط قبلی با یکی از شرط‌های این طرح نتیجه می‌شود)"""
+        return all(any(_implies(new, old) for new in self._keys) for old in previous._keys)
+
+    def refine(self, previous):
+        """
+        اگر این طرح محدودتر از طرح قبلی روی همان ایندکس باشد، نتیجه از ردیف‌های طرح قبلی
+        و فقط با شرط‌های جدید ساخته می‌شود؛ True اگر طرح قبلی استفاده شود
+        """
+        if (previous is None or previous is self or previous.index is not self.index
+                or self.key == previous.key or not self.narrows(previous)):
+            return False
+        self._base = previous
+        self._mask = self._rows = None
+        return True
+
+    def use_rows(self, rows):
+        """ثبت ردیف‌های از پیش محاسبه شده این طرح (مثلاً از کش نتایج)"""
+        self._rows = rows
+        self._mask = None
+        self._base = None
+
+    def mask(self):
+        """ماسک بولی نهایی (شرط‌ها یکی یکی و در جا AND می‌شوند)"""
+        if self._mask is None:
+            if self._rows is not None or self._base is not None:
+                mask = np.zeros(self.index.size, dtype=bool)
+                mask[self.rows()] = True
+            else:
+                mask = np.ones(self.index.size, dtype=bool)
+                for full, _ in self._predicates:
+                    mask &= full()
+            self._mask = mask
+        return self._mask
+
+    def rows(self):
+        """شماره ردیف‌های انتخاب شده (مرتب)"""
+        if self._rows is None:
+            if self._base is not None:
+                rows = self._base.rows()
+                known = set(self._base._keys)
+                for key, (_, at_rows) in zip(self._keys, self._predicates):
+                    if key not in known:
+                        rows = rows[at_rows(rows)]
+                self._rows = rows
+                self._base = None
+            else:
+                self._rows = np.flatnonzero(self.mask())
+        return self._rows
+
+    def count(self):
+        """تعداد ردیف‌های انتخاب شده بدون ساختن DataFrame"""
+        return len(self.rows())
+
+    def take(self, df):
+        """DataFrame ردیف‌های انتخاب شده از df (هم‌ردیف با دیتاست ایندکس شده)"""
+        return df.take(self.rows())
+
+
+def _implies(new, old):
+    """هر ردیفی که شرط new را دارد شرط old را هم دارد"""
+    if new == old:
+        return True
+    kind = new[0]
+    if kind != old[0]:
+        return False
+    if kind == "values":
+        return new[1] == old[1] and set(new[2]) <= set(old[2])
+    if kind == "days":
+        return old[1] <= new[1] and new[2] <= old[2]
+    if kind == "between":
+        return (new[1] == old[1]
+                and (old[2] is None or (new[2] is not None and new[2] >= old[2]))
+                and (old[3] is None or (new[3] is not None and new[3] <= old[3])))
+    return False
+
+
+def value_pairs(left, right):
+    """زوج‌های یکتای (مقدار ستون left، مقدار ستون right) در ردیف‌های هم‌تراز، بدون مقادیر خالی"""
+    left, right = to_category(left), to_category(right)
+    left_codes = left.cat.codes.to_numpy().astype(np.int64)
+    right_codes = right.cat.codes.to_numpy().astype(np.int64)
+    valid = (left_codes >= 0) & (right_codes >= 0)
+    width = max(len(right.cat.categories), 1)
+    pairs = np.unique(left_codes[valid] * width + right_codes[valid])
+    return zip(left.cat.categories[pairs // width], right.cat.categories[pairs % width])
+
+
+class AdjacencyIndex:
+    """
+    مقادیر مرتبط دو ستون در هر دو جهت (مثلاً نوع تعمیر ← قالب‌ها و قالب ← انواع تعمیر)
+    لیست مرتب هر مقدار فقط یک بار ساخته و تا تغییر همان مقدار نگه داشته می‌شود
+    """
+
+    def __init__(self, left=None, right=None):
+        self._forward = {}
+        self._reverse = {}
+        self._sorted = {}
+        if left is not None and right is not None:
+            self.update(left, right)
+
+    def update(self, left, right):
+        """افزودن زوج‌های ردیف‌های جدید؛ خروجی تعداد زوج‌های تازه"""
+        added = 0
+        for a, b in value_pairs(left, right):
+            targets = self._forward.setdefault(a, set())
+            if b in targets:
+                continue
+            targets.add(b)
+            self._reverse.setdefault(b, set()).add(a)
+            self._sorted.pop(("forward", a), None)
+            self._sorted.pop(("reverse", b), None)
+            added += 1
+        return added
+
+    def _values(self, direction, mapping, value):
+        key = (direction, value)
+        values = self._sorted.get(key)
+        if values is None:
+            values = self._sorted[key] = sorted(mapping.get(value, ()))
+        return values
+
+    def right_of(self, value):
+        """مقادیر مرتب ستون دوم که با value از ستون اول در یک ردیف آمده‌اند"""
+        return self._values("forward", self._forward, value)
+
+    def left_of(self, value):
+        """مقادیر مرتب ستون اول که با value از ستون دوم در یک ردیف آمده‌اند"""
+        return self._values("reverse", self._reverse, value)
+
+
+def frame_nbytes(df):
+    """حافظه تقریبی یک DataFrame (بدون پیمایش رشته‌ها؛ برای ستون‌های object فقط اشاره‌گرها)"""
+    return int(df.memory_usage(index=True, deep=False).sum())
+
+
+class FilterResultCache:
+    """نتایج اخیر فیلتر با حذف LRU بر اساس سقف حافظه و شمارنده hit/miss"""
+
+    def __init__(self, max_mb=DEFAULT_CACHE_MB):
+        self.max_bytes = int(max_mb * 2**20)
+        self._entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """نتیجه نگه داشته شده (None در صورت نبود)؛ مدخل پیدا شده تازه‌ترین می‌شود"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value, nbytes):
+        """افزودن نتیجه و حذف قدیمی‌ترین نتایج تا رسیدن به سقف حافظه"""
+        if nbytes > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old[1]
+        self._entries[key] = (value, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.nbytes -= size
+
+    def clear(self):
+        """حذف همه نتایج (شمارنده‌ها حفظ می‌شوند)"""
+        self._entries.clear()
+        self.nbytes = 0
+
+    def stats(self):
+        """آمار کش: تعداد مدخل، حافظه، hit و miss"""
+        total = self.hits + self.misses
+        return {"entries": len(self._entries), "mb": self.nbytes / 2**20,
+                "max_mb": self.max_bytes / 2**20, "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
@@ -0,0 +1,190 @@
+# jalali_dates.py
+# -*- coding: utf-8 -*-
+"""
+تبدیل برداری تاریخ‌های ستون تاریخ به شماره روز
+
+هر مقدار ستون تاریخ (رشته شمسی مثل "1404/09/08" با ارقام فارسی یا لاتین، رشته
+میلادی، عدد سریال اکسل، عدد فشرده 14040908 یا datetime) به شماره روز int32
+(ordinal میلادی، همان date.toordinal) تبدیل می‌شود تا فیلتر بازه تاریخ فقط یک
+مقایسه عددی باشد.
+
+به جای فراخوانی JalaliDate برای هر ردیف، شماره روز اول همه ماه‌های شمسی بازه
+JALALI_MIN_YEAR تا JALALI_MAX_YEAR یک بار در یک جدول numpy محاسبه می‌شود و
+تبدیل فقط روی مقادیر یکتای ستون و با اندیس‌گذاری در همین جدول انجام می‌شود.
+"""
+
+import datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from persiantools.jdatetime import JalaliDate
+
+JALALI_MIN_YEAR = 1300
+JALALI_MAX_YEAR = 1500
+
+DAY_DTYPE = np.int32
+# شماره روز تاریخ خالی یا نامعتبر؛ در هیچ بازه تاریخی قرار نمی‌گیرد
+DAY_MISSING = 0
+
+# سال‌های کمتر از این مقدار شمسی در نظر گرفته می‌شوند
+GREGORIAN_MIN_YEAR = 1700
+
+_UNIX_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+# مبدأ سریال اکسل (با احتساب خطای سال کبیسه 1900 در اکسل)
+_EXCEL_EPOCH_ORDINAL = datetime.date(1899, 12, 30).toordinal()
+_EXCEL_MAX_SERIAL = 2958465
+
+_DIGITS = str.maketrans("۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩", "01234567890123456789")
+_DATE_PATTERN = r"^\s*(\d{1,4})\s*[/\-.]\s*(\d{1,2})\s*[/\-.]\s*(\d{1,4})"
+
+
+@lru_cache(maxsize=None)
+def month_starts():
+    """
+    جدول شماره روز اول هر ماه شمسی: اندیس (سال - JALALI_MIN_YEAR) * 12 + (ماه - 1)
+    یک خانه اضافه در انتها (اول سال بعد از JALALI_MAX_YEAR) برای محاسبه طول آخرین ماه
+    """
+    starts = [JalaliDate(year, month, 1).to_gregorian().toordinal()
+              for year in range(JALALI_MIN_YEAR, JALALI_MAX_YEAR + 1)
+              for month in range(1, 13)]
+    starts.append(JalaliDate(JALALI_MAX_YEAR + 1, 1, 1).to_gregorian().toordinal())
+    return np.array(starts, dtype=np.int64)
+
+
+def jalali_to_days(years, months, days):
+    """آرایه‌های سال/ماه/روز شمسی به شماره روز (DAY_MISSING برای تاریخ نامعتبر)"""
+    starts = month_starts()
+    years = np.asarray(years, dtype=np.int64)
+    months = np.asarray(months, dtype=np.int64)
+    days = np.asarray(days, dtype=np.int64)
+
+    valid = ((years >= JALALI_MIN_YEAR) & (years <= JALALI_MAX_YEAR)
+             & (months >= 1) & (months <= 12) & (days >= 1))
+    index = np.where(valid, (years - JALALI_MIN_YEAR) * 12 + months - 1, 0)
+    valid &= days <= starts[index + 1] - starts[index]
+    return np.where(valid, starts[index] + days - 1, DAY_MISSING)
+
+
+def gregorian_to_days(years, months, days):
+    """آرایه‌های سال/ماه/روز میلادی به شماره روز"""
+    if len(years) == 0:
+        return np.empty(0, dtype=np.int64)
+    stamps = pd.to_datetime(pd.DataFrame({"year": years, "month": months, "day": days}), errors="coerce")
+    return datetime64_to_days(stamps.to_numpy())
+
+
+def datetime64_to_days(values):
+    """آرایه datetime64 به شماره روز"""
+    values = np.asarray(values).astype("datetime64[D]")
+    days = values.astype(np.int64) + _UNIX_EPOCH_ORDINAL
+    return np.where(np.isnat(values), DAY_MISSING, days)
+
+
+def numbers_to_days(values):
+    """
+    اعداد به شماره روز: عدد فشرده شمسی (مثل 14040908) یا سریال اکسل
+    بقیه اعداد نامعتبر در نظر گرفته می‌شوند
+    """
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values)
+    whole = np.where(finite, np.floor(values), 0).astype(np.int64)
+
+    compact = (whole >= JALALI_MIN_YEAR * 10000 + 101) & (whole <= JALALI_MAX_YEAR * 10000 + 1231)
+    serial = finite & (whole >= 1) & (whole <= _EXCEL_MAX_SERIAL)
+    result = np.where(serial, _EXCEL_EPOCH_ORDINAL + whole, DAY_MISSING)
+    if compact.any():
+        jalali = jalali_to_days(whole // 10000, whole // 100 % 100, whole % 100)
+        result = np.where(compact, jalali, result)
+    return result
+
+
+def strings_to_days(values):
+    """
+    رشته‌های تاریخ (سال/ماه/روز یا روز/ماه/سال، با جداکننده / یا - یا .) به شماره روز
+    سال کوچک‌تر از GREGORIAN_MIN_YEAR شمسی و بقیه میلادی در نظر گرفته می‌شوند
+    """
+    texts = pd.Series([str(v).translate(_DIGITS) for v in values], dtype=object)
+    parts = texts.str.extract(_DATE_PATTERN)
+    matched = parts[0].notna().to_numpy()
+    result = np.full(len(texts), DAY_MISSING, dtype=np.int64)
+    if not matched.any():
+        return result
+
+    first = parts.loc[matched, 0]
+    third = parts.loc[matched, 2]
+    # روز/ماه/سال: جزء سوم چهار رقمی و جزء اول حداکثر دو رقمی
+    day_first = ((third.str.len() == 4) & (first.str.len() <= 2)).to_numpy()
+    first = first.astype(np.int64).to_numpy()
+    month = parts.loc[matched, 1].astype(np.int64).to_numpy()
+    third = third.astype(np.int64).to_numpy()
+    year = np.where(day_first, third, first)
+    day = np.where(day_first, first, third)
+
+    jalali = year < GREGORIAN_MIN_YEAR
+    days = np.full(len(year), DAY_MISSING, dtype=np.int64)
+    days[jalali] = jalali_to_days(year[jalali], month[jalali], day[jalali])
+    days[~jalali] = gregorian_to_days(year[~jalali], month[~jalali], day[~jalali])
+    result[matched] = days
+    return result
+
+
+def _unique_values_to_days(uniques):
+    """شماره روز هر مقدار یکتا بر اساس نوع آن"""
+    uniques = np.asarray(uniques, dtype=object)
+    result = np.full(len(uniques), DAY_MISSING, dtype=np.int64)
+    kinds = np.array([
+        "s" if isinstance(v, str) else
+        "d" if isinstance(v, (datetime.date, np.datetime64)) else
+        "n" if isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool) else
+        ""
+        for v in uniques
+    ], dtype=object)
+
+    strings = kinds == "s"
+    if strings.any():
+        result[strings] = strings_to_days(uniques[strings])
+    dates = kinds == "d"
+    if dates.any():
+        stamps = pd.to_datetime(pd.Series(uniques[dates]), errors="coerce")
+        result[dates] = datetime64_to_days(stamps.to_numpy())
+    numbers = kinds == "n"
+    if numbers.any():
+        result[numbers] = numbers_to_days(uniques[numbers].astype(np.float64))
+    return result
+
+
+def to_day_ordinals(series):
+    """ستون تاریخ با هر نوع مقدار به آرایه int32 شماره روز"""
+    kind = series.dtype.kind
+    if kind == "M":
+        return datetime64_to_days(series.to_numpy()).astype(DAY_DTYPE)
+    if kind in "iuf":
+        return numbers_to_days(series.to_numpy()).astype(DAY_DTYPE)
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    lookup = np.empty(len(uniques) + 1, dtype=DAY_DTYPE)
+    lookup[0] = DAY_MISSING
+    lookup[1:] = _unique_values_to_days(uniques)
+    return lookup[codes + 1]
+
+
+def day_to_jalali(day):
+    """شماره روز به رشته تاریخ شمسی "YYYY/MM/DD" (رشته خالی برای تاریخ نامعتبر یا خارج از جدول)"""
+    starts = month_starts()
+    index = int(np.searchsorted(starts, day, side="right")) - 1
+    if day == DAY_MISSING or index < 0 or index >= len(starts) - 1:
+        return ""
+    year, month = divmod(index, 12)
+    return f"{JALALI_MIN_YEAR + year:04d}/{month + 1:02d}/{int(day - starts[index]) + 1:02d}"
+
+
+def jalali_to_day(text):
+    """
+    تاریخ شمسی ورودی کاربر (مثل "1404/09/08" یا "۱۴۰۴/۰۹/۰۸") به شماره روز
+    برای تاریخ نامعتبر ValueError
+    """
+    day = int(strings_to_days([text])[0])
+    if day == DAY_MISSING:
+        raise ValueError(f"Invalid Jalali date: {text!r}")
+    return day
@@ -5,11 +5,31 @@ import pandas as pd
 import os
 import logging
 from openpyxl import load_workbook
+from excel_stream import read_sheet
+from column_resolver import ColumnResolver
 import traceback
 
 # تنظیمات لاگینگ
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# نام‌های احتمالی ستون‌ها در این برنامه (فهرست گسترده‌تر از column_resolver.COLUMN_CANDIDATES)
+COLUMN_PATTERNS = {
+    'repair_col': ['نوع تعمیر', 'تعمیر', 'repair', 'نوع', 'کار'],
+    'part_col': ['قالب', 'قطعه', 'دستگاه', 'part', 'device', 'مورد'],
+    'date_col': ['تاریخ', 'date', 'زمان'],
+    'perf_col': ['مقدار ساعت کار شده', 'ساعت', 'hour', 'time', 'مدت', 'ساعت کار'],
+    'req_col': ['شماره نامه درخواست', 'شماره درخواست', 'request', 'شماره'],
+    'code_col': ['کد قالب', 'کد', 'code', 'شناسه']
+}
+
+# نگاشت ستون‌ها به ازای هر ساختار هدر (در column_map.json، جدا از نگاشت‌های فهرست پیش‌فرض)
+COLUMN_RESOLVER = ColumnResolver(os.path.join(os.path.dirname(os.path.abspath(__file__)), "column_map.json"),
+                                 COLUMN_PATTERNS)
+
+def _column_header(index, cell):
+    """نام ستون؛ برای هدرهای خالی Column_i"""
+    return str(cell).strip() if cell is not None else f"Column_{index}"
+
 class ExcelProcessor:
     """کلاس برای پردازش فایل‌های اکسل"""
     
@@ -23,24 +43,17 @@ class ExcelProcessor:
             print(f"📂 در حال بارگذاری فایل: {file_path}")
             print(f"📋 شیت انتخاب شده: {sheet_name}")
             
-            # بارگذاری فایل اکسل
-            wb = load_workbook(file_path, read_only=False, data_only=True)
-            ws = wb[sheet_name]
-            data = list(ws.values)
-            wb.close()
+            # بارگذاری جریانی فایل اکسل به DataFrame
+            self.df = read_sheet(file_path, sheet_name, header_func=_column_header)
             
-            print(f"📊 تعداد ردیف‌های خوانده شده: {len(data)}")
+            print(f"📊 تعداد ردیف‌های خوانده شده: {0 if self.df is None else len(self.df) + 1}")
             
-            if not data or len(data) <= 1:  # فقط هدرها یا هیچ داده‌ای نیست
+            if self.df is None or self.df.empty:  # فقط هدرها یا هیچ داده‌ای نیست
                 print("❌ فایل اکسل خالی است یا فقط هدر دارد")
+                self.df = None
                 return False
                 
-            # استخراج هدرها و داده‌ها
-            headers = [str(cell).strip() if cell is not None else f"Column_{i}" for i, cell in enumerate(data[0])]
-            print(f"🏷️ هدرهای شناسایی شده: {headers}")
-            
-            # ایجاد DataFrame
-            self.df = pd.DataFrame(data[1:], columns=headers)
+            print(f"🏷️ هدرهای شناسایی شده: {list(self.df.columns)}")
             
             # حذف ستون‌های کاملاً خالی
             self.df = self.df.dropna(axis=1, how='all')
@@ -62,29 +75,12 @@ class ExcelProcessor:
         if self.df is None or self.df.empty:
             return
             
-        column_patterns = {
-            'repair_col': ['نوع تعمیر', 'تعمیر', 'repair', 'نوع', 'کار'],
-            'part_col': ['قالب', 'قطعه', 'دستگاه', 'part', 'device', 'مورد'],
-            'date_col': ['تاریخ', 'date', 'زمان'],
-            'perf_col': ['مقدار ساعت کار شده', 'ساعت', 'hour', 'time', 'مدت', 'ساعت کار'],
-            'req_col': ['شماره نامه درخواست', 'شماره درخواست', 'request', 'شماره'],
-            'code_col': ['کد قالب', 'کد', 'code', 'شناسه']
-        }
-        
         print("🔍 در حال تشخیص ستون‌ها...")
-        for col_type, patterns in column_patterns.items():
-            found_col = None
-            for col in self.df.columns:
-                col_str = str(col).strip().lower()
-                for pattern in patterns:
-                    if pattern.lower() in col_str:
-                        found_col = col
-                        print(f"   ✅ {col_type} تشخیص داده شد: {col}")
-                        break
-                if found_col:
-                    break
+        for col_type, found_col in COLUMN_RESOLVER.resolve(self.df.columns).items():
             self.column_mapping[col_type] = found_col
-            if not found_col:
+            if found_col is not None:
+                print(f"   ✅ {col_type} تشخیص داده شد: {found_col}")
+            else:
                 print(f"   ❌ {col_type} تشخیص داده نشد")
 
 class ExcelReportApp:
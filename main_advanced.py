@@ -6,10 +6,18 @@ import os
 import logging
 from openpyxl import load_workbook
 import traceback
+from repair_normalizer import ColumnNormalizer
+from repair_rules import RepairRuleEngine
+from column_resolver import ColumnResolver
 
 # تنظیمات لاگینگ
 logging.basicConfig(level=logging.INFO)
 
+# قواعد مرتب نرمالایز نوع تعمیر از کلید repair_rules در settings.json
+SETTINGS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "settings.json")
+# نگاشت ستون‌ها به ازای هر ساختار هدر (مشترک با report_excel.py)
+COLUMN_RESOLVER = ColumnResolver(os.path.join(os.path.dirname(os.path.abspath(__file__)), "column_map.json"))
+
 class ExcelProcessor:
     """کلاس برای پردازش فایل‌های اکسل"""
     
@@ -17,6 +25,7 @@ class ExcelProcessor:
         self.df = None
         self.df_normalized = None
         self.column_mapping = {}
+        self.repair_normalizer = ColumnNormalizer(RepairRuleEngine.from_settings(SETTINGS_PATH, profile="lower"))
         
     def load_excel(self, file_path, sheet_name):
         """بارگذاری فایل اکسل"""
@@ -52,26 +61,8 @@ class ExcelProcessor:
         if self.df is None or self.df.empty:
             return
             
-        column_patterns = {
-            'repair_col': ['نوع تعمیر', 'تعمیر', 'repair'],
-            'part_col': ['قالب', 'قطعه', 'دستگاه', 'part', 'device'],
-            'date_col': ['تاریخ', 'date'],
-            'perf_col': ['مقدار ساعت کار شده', 'ساعت', 'hour', 'time'],
-            'req_col': ['شماره نامه درخواست', 'شماره درخواست', 'request'],
-            'code_col': ['کد قالب', 'کد', 'code']
-        }
-        
-        for col_type, patterns in column_patterns.items():
-            found_col = None
-            for col in self.df.columns:
-                col_str = str(col).strip().lower()
-                for pattern in patterns:
-                    if pattern.lower() in col_str:
-                        found_col = col
-                        break
-                if found_col:
-                    break
-            self.column_mapping[col_type] = found_col
+        # نگاشت ذخیره شده برای همین ساختار هدر یا امتیازدهی یک باره (column_resolver)
+        self.column_mapping.update(COLUMN_RESOLVER.resolve(self.df.columns))
     
     def _create_normalized_data(self):
         """ایجاد نسخه نرمالایز شده"""
@@ -81,31 +72,7 @@ class ExcelProcessor:
         self.df_normalized = self.df.copy()
         repair_col = self.column_mapping.get('repair_col')
         if repair_col and repair_col in self.df_normalized.columns:
-            self.df_normalized[repair_col] = self.df_normalized[repair_col].apply(self._normalize_repair_type)
-    
-    def _normalize_repair_type(self, repair_type):
-        """نرمال‌سازی نوع تعمیر"""
-        if not isinstance(repair_type, str):
-            return str(repair_type)
-        
-        repair_type = str(repair_type).strip().lower()
-        
-        if 'قالب' in repair_type and 'تعمیر' in repair_type:
-            return 'قالب تعمیری'
-        elif 'قطعه' in repair_type and 'تعمیر' in repair_type:
-            return 'قطعه تعمیری'
-        elif 'دستگاه' in repair_type and 'تعمیر' in repair_type:
-            return 'دستگاه تعمیری'
-        elif 'قالب' in repair_type:
-            return 'قالب'
-        elif 'قطعه' in repair_type:
-            return 'قطعه'
-        elif 'دستگاه' in repair_type:
-            return 'دستگاه'
-        elif 'تعمیر' in repair_type:
-            return 'تعمیری'
-        else:
-            return repair_type
+            self.df_normalized[repair_col] = self.repair_normalizer.normalize(self.df_normalized[repair_col])
 
 class DataFilter:
     """کلاس برای فیلتر کردن داده‌ها"""
@@ -24,6 +24,12 @@ import sys
 import traceback
 import logging
 from datetime import datetime
+from excel_stream import read_sheet, ENGINE_XLSX
+from xlsx_reader import XlsxWorkbook
+from workbook_catalog import WorkbookCatalog
+from repair_normalizer import ColumnNormalizer, NormalizationMemo
+from repair_rules import RepairRuleEngine
+from column_resolver import ColumnResolver
 
 # Optional PyQt (PySide6) import guarded
 try:
@@ -32,6 +38,12 @@ try:
 except Exception:
     PYQT_AVAILABLE = False
 
+# Excel reader engine: ENGINE_XLSX (direct zip/XML reader) or ENGINE_OPENPYXL (pandas + openpyxl)
+EXCEL_ENGINE = ENGINE_XLSX
+
+# Sheet list cache (sheet names + approximate row counts per file fingerprint)
+CATALOG = WorkbookCatalog(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'catalog.json'))
+
 # Logging
 logging.basicConfig(filename='merged_app_errors.log', level=logging.ERROR,
                     format='%(asctime)s - %(levelname)s - %(message)s')
@@ -40,10 +52,23 @@ logging.basicConfig(filename='merged_app_errors.log', level=logging.ERROR,
 # Utility functions
 # -----------------------------
 
-def safe_read_excel(path, sheet_name=None):
+def safe_read_excel(path, sheet_name=None, engine=None):
     """Read excel into pandas DataFrame robustly."""
+    engine = engine or EXCEL_ENGINE
     try:
-        if sheet_name:
+        if engine == ENGINE_XLSX:
+            if not sheet_name:
+                with XlsxWorkbook(path) as wb:
+                    sheet_name = wb.sheetnames[0]
+            # same header naming as pandas.read_excel for empty header cells
+            df = read_sheet(path, sheet_name, engine=ENGINE_XLSX,
+                            header_func=lambda i, v: str(v) if v is not None else f"Unnamed: {i}")
+            if df is None:
+                return pd.DataFrame()
+            # pandas.read_excel also trims trailing empty rows
+            has_value = df.notna().any(axis=1).to_numpy()
+            df = df.iloc[:has_value.nonzero()[0][-1] + 1] if has_value.any() else df.iloc[0:0]
+        elif sheet_name:
             df = pd.read_excel(path, sheet_name=sheet_name, engine='openpyxl')
         else:
             # read first sheet
@@ -56,40 +81,19 @@ def safe_read_excel(path, sheet_name=None):
         raise
 
 
-def find_column(columns, possible_names):
-    for name in possible_names:
-        for col in columns:
-            try:
-                if name.strip().lower() in str(col).strip().lower():
-                    return col
-            except Exception:
-                continue
-    return None
+# Column mapping scored once per header layout, persisted (and user-pinnable) in column_map.json
+COLUMN_RESOLVER = ColumnResolver(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'column_map.json'))
 
 
-def normalize_repair_type(repair_type):
-    try:
-        if pd.isna(repair_type):
-            return repair_type
-        s = str(repair_type).strip()
-        s_lower = s.lower()
-        if 'قالب' in s_lower and 'تعمیر' in s_lower:
-            return 'قالب تعمیری'
-        if 'قطعه' in s_lower and 'تعمیر' in s_lower:
-            return 'قطعه تعمیری'
-        if 'دستگاه' in s_lower and 'تعمیر' in s_lower:
-            return 'دستگاه تعمیری'
-        if 'قالب' in s_lower:
-            return 'قالب'
-        if 'قطعه' in s_lower:
-            return 'قطعه'
-        if 'دستگاه' in s_lower:
-            return 'دستگاه'
-        if 'تعمیر' in s_lower:
-            return 'تعمیری'
-        return s
-    except Exception:
-        return str(repair_type)
+# Repair-type rules: ordered "repair_rules" in settings.json, compiled once (repair_rules.RepairRuleEngine)
+normalize_repair_type = RepairRuleEngine.from_settings(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'settings.json'), profile='merged')
+
+
+# normalize_repair_type applied once per distinct value, memo persisted across sessions
+REPAIR_NORMALIZER = ColumnNormalizer(
+    normalize_repair_type,
+    NormalizationMemo(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'normalize_memo.json')))
 
 # -----------------------------
 # Core classes
@@ -107,9 +111,8 @@ class ExcelHandler:
             raise FileNotFoundError('File not found')
         self.file_path = path
         try:
-            # get sheet names via pandas
-            xls = pd.ExcelFile(path, engine='openpyxl')
-            self.sheet_names = xls.sheet_names
+            # sheet names from workbook.xml only (no full workbook parse)
+            self.sheet_names = CATALOG.sheet_names(path)
             return self.sheet_names
         except Exception:
             logging.error(traceback.format_exc())
@@ -124,20 +127,16 @@ class ExcelHandler:
         return self.df
 
     def _detect_columns(self):
-        cols = list(self.df.columns)
-        self.cols['repair'] = find_column(cols, ['نوع تعمیر', 'تعمیر', 'repair'])
-        self.cols['part'] = find_column(cols, ['قالب', 'قطعه', 'دستگاه', 'part', 'device'])
-        self.cols['date'] = find_column(cols, ['تاریخ', 'date'])
-        self.cols['perf'] = find_column(cols, ['مقدار ساعت کار شده', 'ساعت', 'hour', 'time'])
-        self.cols['req'] = find_column(cols, ['شماره نامه درخواست', 'شماره درخواست', 'request'])
-        self.cols['code'] = find_column(cols, ['کد قالب', 'کد', 'code'])
+        mapping = COLUMN_RESOLVER.resolve(self.df.columns)
+        for key in ('repair', 'part', 'date', 'perf', 'req', 'code'):
+            self.cols[key] = mapping[key + '_col']
 
     def _normalize(self):
         if self.df is None:
             return
         self.df_normalized = self.df.copy()
         if self.cols.get('repair') in self.df_normalized.columns:
-            self.df_normalized[self.cols['repair']] = self.df_normalized[self.cols['repair']].apply(normalize_repair_type)
+            self.df_normalized[self.cols['repair']] = REPAIR_NORMALIZER.normalize(self.df_normalized[self.cols['repair']])
 
 # -----------------------------
 # GUI windows (Tkinter)
@@ -676,7 +675,7 @@ class PowerBIWindow(tk.Toplevel):
         # normalize repair
         rep = self.app.excel.cols.get('repair')
         if rep and rep in tmp.columns:
-            tmp[rep] = tmp[rep].apply(normalize_repair_type)
+            tmp[rep] = REPAIR_NORMALIZER.normalize(tmp[rep])
         # try convert date col
         date_col = self.app.excel.cols.get('date')
         if date_col and date_col in tmp.columns:
@@ -697,7 +696,7 @@ class PowerBIWindow(tk.Toplevel):
         tmp = df.dropna(how='all')
         rep = self.app.excel.cols.get('repair')
         if rep and rep in tmp.columns:
-            tmp[rep] = tmp[rep].apply(normalize_repair_type)
+            tmp[rep] = REPAIR_NORMALIZER.normalize(tmp[rep])
         p = filedialog.asksaveasfilename(defaultextension='.xlsx', filetypes=[('Excel', '*.xlsx')])
         if p:
             tmp.to_excel(p, index=False, engine='openpyxl')
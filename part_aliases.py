@@ -0,0 +1,174 @@
+# part_aliases.py
+# -*- coding: utf-8 -*-
+"""
+پیشنهاد ادغام نام‌های تقریباً تکراری قالب/قطعه/دستگاه و نگاشت نام مستعار
+
+نام‌هایی که اپراتورهای مختلف کمی متفاوت تایپ کرده‌اند (مثلاً "شمش پراید" و
+"شمش پرايد 2") مجموع ساعت‌ها را در گزارش گروه‌بندی شده پخش می‌کنند.
+
+similar_pairs جفت نام‌هایی را پیدا می‌کند که شباهت Jaccard مجموعه n-gram حرفی آن‌ها
+حداقل threshold باشد، بدون مقایسه همه جفت‌ها: n-gramهای هر نام به ترتیب کمیابی
+مرتب می‌شوند و فقط پیشوند کوتاهی از آن‌ها (prefix filtering) در یک inverted index
+قرار می‌گیرد. دو نام با شباهت حداقل threshold حتماً یک n-gram مشترک در پیشوندهایشان
+دارند، پس فقط همین نامزدها دقیق مقایسه می‌شوند.
+
+ادغام‌های تأیید شده در AliasMap (فایل JSON نام مستعار -> نام اصلی، روی کلیدهای متعارف
+persian_text) ذخیره و هنگام بارگذاری روی ستون df_normalized اعمال می‌شوند.
+"""
+
+import os
+import json
+import math
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from data_schema import map_categories
+
+NGRAM_SIZE = 3
+DEFAULT_THRESHOLD = 0.75
+PROGRESS_STEP = 1000
+
+
+def char_ngrams(text, n=NGRAM_SIZE):
+    """مجموعه n-gramهای حرفی یک نام (با یک فاصله در ابتدا و انتها برای مرز کلمه)"""
+    padded = f" {text} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def similar_pairs(names, threshold=DEFAULT_THRESHOLD, n=NGRAM_SIZE, progress=None):
+    """
+    جفت‌های (i, j, شباهت) با i < j از نام‌ها که شباهت Jaccard n-gramهایشان حداقل threshold است
+    progress(done, total) هر PROGRESS_STEP نام یک بار فراخوانی می‌شود
+    """
+    grams = [char_ngrams(name, n) for name in names]
+    frequency = Counter(g for item in grams for g in item)
+    # ترتیب سراسری: کمیاب‌ترین n-gram اول (شماره n-gram همان رتبه کمیابی است)
+    rank = {g: r for r, g in enumerate(sorted(frequency, key=lambda g: (frequency[g], g)))}
+    grams = [sorted(rank[g] for g in item) for item in grams]
+    sizes = [len(item) for item in grams]
+    sets = [set(item) for item in grams]
+
+    index = defaultdict(list)
+    # ابتدای بخش قابل استفاده هر لیست index (نام‌های کوچک‌تر از حد طول کنار گذاشته می‌شوند)
+    start = defaultdict(int)
+    pairs = []
+    # پردازش به ترتیب اندازه: لیست‌های index بر اساس اندازه مرتب می‌مانند و حد طول فقط بالا می‌رود
+    for done, i in enumerate(sorted(range(len(names)), key=sizes.__getitem__)):
+        if progress is not None and done % PROGRESS_STEP == 0:
+            progress(done, len(names))
+        size = sizes[i]
+        prefix = grams[i][:size - math.ceil(threshold * size) + 1]
+        min_size = threshold * size
+        candidates = set()
+        for g in prefix:
+            postings = index[g]
+            k = start[g]
+            while k < len(postings) and sizes[postings[k]] < min_size:
+                k += 1
+            start[g] = k
+            candidates.update(postings[k:])
+        items = sets[i]
+        for j in candidates:
+            shared = len(items.intersection(grams[j]))
+            score = shared / (size + sizes[j] - shared)
+            if score >= threshold:
+                pairs.append((min(i, j), max(i, j), score))
+        for g in prefix:
+            index[g].append(i)
+    return pairs
+
+
+def suggest_merges(weights, threshold=DEFAULT_THRESHOLD, n=NGRAM_SIZE, progress=None):
+    """
+    پیشنهادهای ادغام از {نام: وزن (مثلاً مجموع ساعت)}؛ نام سبک‌تر در نام سنگین‌تر ادغام می‌شود
+    خروجی: لیست {"source", "target", "score", "source_weight", "target_weight"} به ترتیب شباهت نزولی
+    """
+    names = [name for name in weights if name]
+    suggestions = []
+    for i, j, score in similar_pairs(names, threshold, n, progress):
+        a, b = names[i], names[j]
+        # نام سنگین‌تر (در تساوی، نام کوتاه‌تر و سپس ترتیب الفبایی) نام اصلی است
+        if (weights[a], -len(a), b) < (weights[b], -len(b), a):
+            a, b = b, a
+        suggestions.append({"source": b, "target": a, "score": score,
+                            "source_weight": weights[b], "target_weight": weights[a]})
+    suggestions.sort(key=lambda s: (-s["score"], s["target"], s["source"]))
+    return suggestions
+
+
+class AliasMap:
+    """نگاشت پایدار نام مستعار -> نام اصلی (کلیدهای متعارف)"""
+
+    def __init__(self, alias_path):
+        self.alias_path = alias_path
+        self._aliases = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._aliases is not None:
+            return
+        self._aliases = {}
+        if os.path.exists(self.alias_path):
+            try:
+                with open(self.alias_path, "r", encoding="utf-8") as f:
+                    self._aliases = json.load(f)
+            except Exception as e:
+                logging.error(f"Error loading part aliases: {e}")
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.alias_path) or ".", exist_ok=True)
+            tmp_path = self.alias_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._aliases, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.alias_path)
+        except Exception as e:
+            logging.error(f"Error saving part aliases: {e}")
+
+    # -------------------------
+    def aliases(self):
+        """کپی نگاشت فعلی"""
+        with self._lock:
+            self._load()
+            return dict(self._aliases)
+
+    def resolve(self, name):
+        """نام اصلی یک نام (خود نام اگر مستعار نباشد)"""
+        with self._lock:
+            self._load()
+            return self._aliases.get(name, name)
+
+    def add(self, merges):
+        """
+        ثبت ادغام‌ها: لیست (نام مستعار, نام اصلی)
+        نگاشت همیشه یک مرحله‌ای نگه داشته می‌شود (مستعارهای قبلی نام مستعار جدید به نام اصلی نهایی)
+        """
+        with self._lock:
+            self._load()
+            for source, target in merges:
+                target = self._aliases.get(target, target)
+                if source == target:
+                    continue
+                for alias, current in self._aliases.items():
+                    if current == source:
+                        self._aliases[alias] = target
+                self._aliases[source] = target
+            self._save()
+
+    def remove(self, names):
+        """حذف نام‌های مستعار"""
+        with self._lock:
+            self._load()
+            for name in names:
+                self._aliases.pop(name, None)
+            self._save()
+
+    def apply(self, series):
+        """اعمال نگاشت روی ستون categorical (فقط روی دسته‌ها)"""
+        aliases = self.aliases()
+        if not aliases:
+            return series
+        return map_categories(series, lambda name: aliases.get(name, name))
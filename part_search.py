@@ -0,0 +1,110 @@
+# part_search.py
+# -*- coding: utf-8 -*-
+"""
+جستجوی تایپی (type-ahead) قالب/قطعه/دستگاه با نام یا کد قالب
+
+هنگام بارگذاری دیتاست یک بار برای هر قالب، کلید متعارف (casefold شده) نام از ابتدای هر کلمه و
+کدهای قالب مربوط به آن در یک آرایه مرتب قرار می‌گیرد؛ هر کلید تایپ شده با دو
+bisect به یک برش پیوسته از این آرایه تبدیل می‌شود و از قالب‌های همان برش فقط
+پرکارترین‌ها (بیشترین مجموع ساعت) با argpartition انتخاب می‌شوند. هزینه هر کلید
+مستقل از تعداد ردیف‌های دیتاست است.
+"""
+
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+from data_schema import to_category, to_hours
+from filter_index import value_pairs
+from persian_text import canonical_text
+
+# تعداد پیشنهادهای نمایش داده شده برای هر کلید
+DEFAULT_LIMIT = 20
+# بزرگ‌ترین کاراکتر BMP برای پیدا کردن انتهای برش یک پیشوند
+_PREFIX_END = "\uffff"
+
+
+def search_key(text):
+    """کلید جستجو: متن متعارف و بدون حساسیت به حروف بزرگ و کوچک (کدهای لاتین قالب)"""
+    return canonical_text(text).casefold()
+
+
+class PartSearch:
+    """ایندکس پیشوندی قالب/قطعه/دستگاه‌ها، مرتب بر اساس مجموع ساعت کار هر قالب"""
+
+    def __init__(self, parts, codes=None, hours=None):
+        parts = to_category(parts)
+        self.names = list(parts.cat.categories)
+        self.positions = {name: i for i, name in enumerate(self.names)}
+        self.exact = {search_key(name): i for i, name in enumerate(self.names)}
+        
+        part_codes = parts.cat.codes.to_numpy()
+        valid = part_codes >= 0
+        if hours is not None:
+            weights = np.nan_to_num(to_hours(hours).to_numpy().astype(np.float64)[valid])
+            self.hours = np.bincount(part_codes[valid], weights=weights, minlength=len(self.names))
+        else:
+            self.hours = np.zeros(len(self.names))
+        
+        keys, owners = [], []
+        for i, name in enumerate(self.names):
+            start = 0
+            for word in name.split(" "):
+                keys.append(search_key(name[start:]))
+                owners.append(i)
+                start += len(word) + 1
+        if codes is not None:
+            for part, code in value_pairs(parts, codes):
+                keys.append(search_key(code))
+                owners.append(self.positions[part])
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.keys = [keys[i] for i in order]
+        self.owners = np.array([owners[i] for i in order], dtype=np.int32)
+
+    def mask_of(self, names):
+        """ماسک بولی قالب‌های names (برای محدود کردن پیشنهادها)"""
+        mask = np.zeros(len(self.names), dtype=bool)
+        mask[[self.positions[name] for name in names if name in self.positions]] = True
+        return mask
+
+    def search(self, text, limit=DEFAULT_LIMIT, allowed=None):
+        """پرکارترین قالب‌هایی که نام یکی از کلمه‌هایشان یا کدشان با text شروع می‌شود"""
+        text = search_key(text)
+        if text:
+            lo = bisect_left(self.keys, text)
+            hi = bisect_left(self.keys, text + _PREFIX_END, lo)
+            ids = self.owners[lo:hi]
+        else:
+            ids = np.arange(len(self.names))
+        if allowed is not None:
+            ids = ids[allowed[ids]]
+        # هر قالب فقط یک بار (چند کلمه یا چند کد یک قالب)
+        seen = np.zeros(len(self.names), dtype=bool)
+        seen[ids] = True
+        ids = np.flatnonzero(seen)
+        if len(ids) > limit:
+            ids = ids[np.argpartition(-self.hours[ids], limit)[:limit]]
+        ranked = sorted(ids, key=lambda i: (-self.hours[i], self.names[i]))
+        return [self.names[i] for i in ranked]
+
+    def resolve(self, text, allowed=None):
+        """
+        نام قالب برای متن وارد شده: نام کامل، وگرنه پرکارترین قالبی که یک کد کامل آن
+        یا پیشوندی از نام یا کدش برابر متن است؛ None اگر هیچ قالبی منطبق نباشد
+        """
+        key = search_key(text)
+        if not key:
+            return None
+        i = self.exact.get(key)
+        if i is not None and (allowed is None or allowed[i]):
+            return self.names[i]
+        # کد کامل قالب (مثلاً M-12) بر پیشوندهای طولانی‌تر (M-120) مقدم است
+        lo = bisect_left(self.keys, key)
+        hi = bisect_right(self.keys, key, lo)
+        ids = self.owners[lo:hi]
+        if allowed is not None:
+            ids = ids[allowed[ids]]
+        if len(ids):
+            return self.names[max(ids, key=lambda i: (self.hours[i], -i))]
+        matches = self.search(text, limit=1, allowed=allowed)
+        return matches[0] if matches else None
@@ -0,0 +1,42 @@
+# persian_text.py
+# -*- coding: utf-8 -*-
+"""
+یکسان‌سازی (canonicalisation) متن فارسی ستون‌های متنی
+
+نام قالب/قطعه/دستگاه و کد قالب توسط اپراتورهای مختلف با حروف عربی یا فارسی
+(ي/ی، ك/ک)، نیم‌فاصله یا فاصله، ارقام فارسی یا لاتین و ":" اضافه وارد می‌شوند و یک
+قالب در چند گروه جدا قرار می‌گیرد. canonical_text برای هر مقدار یک کلید یکتا
+می‌سازد:
+- ي و ى عربی به ی فارسی، ك عربی به ک فارسی
+- نیم‌فاصله (ZWNJ) به فاصله؛ حذف کاراکترهای نامرئی (ZWJ، ZWSP، BOM، علامت‌های جهت) و کشیده (ـ)
+- ارقام فارسی و عربی به ارقام لاتین
+- حذف ":" و یکی کردن فاصله‌های پشت سر هم و حذف فاصله ابتدا و انتها
+
+اعمال روی ستون (data_schema.to_canonical_category) فقط روی مقادیر یکتا انجام می‌شود.
+"""
+
+import re
+
+_CHAR_MAP = {
+    "ي": "ی",
+    "ى": "ی",
+    "ك": "ک",
+    "\u200c": " ",
+    "\u200b": "",
+    "\u200d": "",
+    "\u200e": "",
+    "\u200f": "",
+    "\ufeff": "",
+    "\u0640": "",
+    ":": "",
+}
+_CHAR_MAP.update(zip("۰۱۲۳۴۵۶۷۸۹", "0123456789"))
+_CHAR_MAP.update(zip("٠١٢٣٤٥٦٧٨٩", "0123456789"))
+_TRANSLATION = str.maketrans(_CHAR_MAP)
+
+_SPACES = re.compile(r"\s+")
+
+
+def canonical_text(text):
+    """کلید متعارف یک مقدار متنی (مقادیر غیر رشته‌ای ابتدا با str تبدیل می‌شوند)"""
+    return _SPACES.sub(" ", str(text).translate(_TRANSLATION)).strip()
@@ -0,0 +1,131 @@
+# repair_normalizer.py
+# -*- coding: utf-8 -*-
+"""
+نرمالایز ستون‌ها روی مقادیر یکتا
+
+به جای اجرای تابع نرمالایز (مثلاً normalize_repair_type) روی تک تک ردیف‌ها با apply،
+ستون factorize می‌شود، تابع فقط یک بار برای هر مقدار یکتا اجرا می‌شود و نتیجه با
+کدها به ردیف‌ها برگردانده می‌شود. نتیجه مقادیر رشته‌ای در یک فایل JSON (memo)
+نگه داشته می‌شود تا در اجراهای بعدی برنامه هم دوباره محاسبه نشوند. کلید memo هر
+تابع شامل هش کد آن است؛ با تغییر قواعد تابع، memo قبلی خودبه‌خود کنار گذاشته می‌شود.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+def function_key(func):
+    """
+    کلید یکتای یک تابع نرمالایز: نام کامل به همراه هش بایت‌کد و ثابت‌های آن
+    اشیای قابل فراخوانی دارای memo_key (مثل RepairRuleEngine) کلید خود را می‌سازند
+    """
+    if hasattr(func, "memo_key"):
+        return func.memo_key()
+    func = getattr(func, "__func__", func)
+    code = func.__code__
+    digest = hashlib.sha1(code.co_code + repr(code.co_consts).encode("utf-8")).hexdigest()[:12]
+    return f"{func.__module__}.{func.__qualname__}:{digest}"
+
+
+class NormalizationMemo:
+    """فایل JSON نگاشت مقدار خام به مقدار نرمالایز شده، جدا برای هر تابع"""
+
+    def __init__(self, memo_path):
+        self.memo_path = memo_path
+        self._lock = threading.Lock()
+
+    def _read(self):
+        if not os.path.exists(self.memo_path):
+            return {}
+        try:
+            with open(self.memo_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logging.error(f"Error loading normalization memo: {e}")
+            return {}
+
+    def load(self, namespace):
+        """نگاشت ذخیره شده یک تابع"""
+        with self._lock:
+            return dict(self._read().get(namespace, {}))
+
+    def save(self, namespace, mapping):
+        """ذخیره نگاشت یک تابع (نگاشت‌های کهنه همان تابع با هش قبلی حذف می‌شوند)"""
+        prefix = namespace.rsplit(":", 1)[0] + ":"
+        with self._lock:
+            data = {key: value for key, value in self._read().items() if not key.startswith(prefix)}
+            data[namespace] = mapping
+            try:
+                os.makedirs(os.path.dirname(self.memo_path) or ".", exist_ok=True)
+                tmp_path = self.memo_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.memo_path)
+            except Exception as e:
+                logging.error(f"Error saving normalization memo: {e}")
+
+
+class ColumnNormalizer:
+    """اجرای یک تابع نرمالایز روی ستون‌ها، فقط یک بار برای هر مقدار یکتا"""
+
+    def __init__(self, func, memo=None):
+        self.func = func
+        self.memo = memo
+        self.namespace = function_key(func)
+        self._mapping = None
+        self._lock = threading.Lock()
+
+    def _load_mapping(self):
+        if self._mapping is None:
+            self._mapping = self.memo.load(self.namespace) if self.memo is not None else {}
+        return self._mapping
+
+    def normalize_values(self, values):
+        """لیست مقادیر یکتا به لیست مقادیر نرمالایز شده (مقادیر رشته‌ای از memo)"""
+        with self._lock:
+            mapping = self._load_mapping()
+            result = []
+            added = False
+            for value in values:
+                if isinstance(value, str):
+                    normalized = mapping.get(value)
+                    if normalized is None:
+                        normalized = self.func(value)
+                        if isinstance(normalized, str):
+                            mapping[value] = normalized
+                            added = True
+                else:
+                    normalized = self.func(value)
+                result.append(normalized)
+            if added and self.memo is not None:
+                self.memo.save(self.namespace, mapping)
+        return result
+
+    def normalize(self, series):
+        """ستون نرمالایز شده (Series از نوع object با همان index و نام)"""
+        codes, uniques = pd.factorize(series, use_na_sentinel=False)
+        uniques = list(np.asarray(uniques, dtype=object))
+        # factorize همه مقادیر خالی را یکی می‌کند؛ None و بقیه (NaN و ...) جدا به تابع داده می‌شوند
+        missing = np.flatnonzero(pd.isna(np.asarray(uniques, dtype=object)))
+        if len(missing):
+            values = series.to_numpy(dtype=object)
+            rows = codes == missing[0]
+            is_none = rows & (values == None)  # noqa: E711 (مقایسه عنصر به عنصر numpy)
+            other = rows & ~is_none
+            if other.any():
+                uniques[missing[0]] = values[np.argmax(other)]
+                if is_none.any():
+                    codes = np.where(is_none, len(uniques), codes)
+                    uniques.append(None)
+            else:
+                uniques[missing[0]] = None
+
+        normalized = np.empty(len(uniques), dtype=object)
+        normalized[:] = self.normalize_values(list(uniques))
+        return pd.Series(normalized[codes], index=series.index, name=series.name, dtype=object)
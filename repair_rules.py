@@ -0,0 +1,174 @@
+# repair_rules.py
+# -*- coding: utf-8 -*-
+"""
+موتور قواعد نرمالایز نوع تعمیر
+
+قواعد گروه‌بندی نوع تعمیر (که قبلاً در هر برنامه جدا به شکل زنجیره if یا دیکشنری
+الگوهای regex نوشته شده بود) به ترتیب از کلید "repair_rules" فایل settings.json
+خوانده می‌شوند. هر قاعده یک نام خروجی و چند کلمه کلیدی دارد و اولین قاعده‌ای که
+همه کلمات کلیدی آن در مقدار وجود داشته باشد برنده است؛ اگر هیچ قاعده‌ای برقرار
+نباشد خود مقدار پاک‌سازی شده برگردانده می‌شود.
+
+همه کلمات کلیدی در یک regex تناوبی (alternation) کامپایل می‌شوند و هر مقدار فقط
+یک بار پیمایش می‌شود. قاعده برنده برای هر مجموعه کلمات پیدا شده یک بار محاسبه و
+نگه داشته می‌شود.
+
+تفاوت رفتار برنامه‌ها (پاک‌سازی ":" و فاصله‌ها، حروف کوچک، مقادیر خالی) با
+پروفایل‌های PROFILES مشخص می‌شود.
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+
+import pandas as pd
+
+RULES_KEY = "repair_rules"
+
+# قواعد پیش‌فرض (ترتیب مهم است: قواعد ترکیبی قبل از قواعد تک کلمه‌ای)
+DEFAULT_REPAIR_RULES = [
+    {"name": "قالب تعمیری", "keywords": ["قالب", "تعمیر"]},
+    {"name": "قطعه تعمیری", "keywords": ["قطعه", "تعمیر"]},
+    {"name": "دستگاه تعمیری", "keywords": ["دستگاه", "تعمیر"]},
+    {"name": "قالب", "keywords": ["قالب"]},
+    {"name": "قطعه", "keywords": ["قطعه"]},
+    {"name": "دستگاه", "keywords": ["دستگاه"]},
+    {"name": "تعمیری", "keywords": ["تعمیر"]},
+]
+
+# remove_chars: کاراکترهای حذف شونده، collapse_spaces: یکی کردن فاصله‌ها،
+# lowercase: خروجی با حروف کوچک، match_lowercase: تطبیق روی حروف کوچک،
+# keep_missing: مقدار خالی بدون تغییر برگردانده و بقیه مقادیر غیر رشته‌ای هم دسته‌بندی می‌شوند
+PROFILES = {
+    # report_excel.py / 1a.py / report_excel_test.py
+    "report": {"remove_chars": ":", "collapse_spaces": True, "lowercase": False,
+               "match_lowercase": False, "keep_missing": False},
+    # merged_report_app.py
+    "merged": {"remove_chars": "", "collapse_spaces": False, "lowercase": False,
+               "match_lowercase": True, "keep_missing": True},
+    # complete_app.py / main_advanced.py
+    "lower": {"remove_chars": "", "collapse_spaces": False, "lowercase": True,
+              "match_lowercase": False, "keep_missing": False},
+}
+
+# حداکثر تعداد نتایج نگه داشته شده برای مقادیر رشته‌ای (با رسیدن به آن cache خالی می‌شود)
+RESULT_CACHE_SIZE = 200_000
+
+_SPACES = re.compile(r"\s+")
+
+
+def validate_rules(rules):
+    """قواعد به شکل لیست مرتب {"name": ..., "keywords": [...]}؛ برای قاعده نامعتبر ValueError"""
+    result = []
+    for rule in rules:
+        if not isinstance(rule, dict) or "name" not in rule:
+            raise ValueError(f"Invalid repair rule: {rule!r}")
+        keywords = rule.get("keywords", [])
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        result.append({"name": str(rule["name"]), "keywords": [str(k) for k in keywords if str(k)]})
+    return result
+
+
+def load_rules(settings_path):
+    """قواعد مرتب از settings.json (در نبود کلید یا خطا، قواعد پیش‌فرض)"""
+    try:
+        if os.path.exists(settings_path):
+            with open(settings_path, "r", encoding="utf-8") as f:
+                rules = json.load(f).get(RULES_KEY)
+            if rules:
+                return validate_rules(rules)
+    except Exception as e:
+        logging.error(f"Error loading repair rules: {e}")
+    return validate_rules(DEFAULT_REPAIR_RULES)
+
+
+class RepairRuleEngine:
+    """دسته‌بندی نوع تعمیر با قواعد مرتب و یک regex کامپایل شده؛ خود شیء تابع نرمالایز است"""
+
+    def __init__(self, rules=None, profile="report"):
+        self.rules = validate_rules(DEFAULT_REPAIR_RULES if rules is None else rules)
+        self.profile = profile
+        options = PROFILES[profile]
+        self.remove_chars = str.maketrans("", "", options["remove_chars"]) if options["remove_chars"] else None
+        self.collapse_spaces = options["collapse_spaces"]
+        self.lowercase = options["lowercase"]
+        self.match_lowercase = options["match_lowercase"]
+        self.keep_missing = options["keep_missing"]
+
+        keywords = sorted({k for rule in self.rules for k in rule["keywords"]}, key=len, reverse=True)
+        # lookahead: در هر موقعیت بلندترین کلمه کلیدی گرفته می‌شود (تطبیق‌های هم‌پوشان هم پیدا می‌شوند)
+        alternation = "|".join(re.escape(k) for k in keywords)
+        self._pattern = re.compile(f"(?=({alternation}))") if keywords else None
+        # کلمات کلیدی که با پیدا شدن هر کلمه حتماً در مقدار وجود دارند (کلمات کوتاه‌تر داخل آن)
+        self._implied = {k: frozenset(other for other in keywords if other in k) for k in keywords}
+        self._required = [(rule["name"], frozenset(rule["keywords"])) for rule in self.rules]
+        self._winners = {}
+        self._results = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings_path, profile="report"):
+        """موتور با قواعد settings.json"""
+        return cls(load_rules(settings_path), profile)
+
+    def memo_key(self):
+        """کلید memo در NormalizationMemo: با تغییر قواعد یا پروفایل عوض می‌شود"""
+        config = json.dumps([self.rules, PROFILES[self.profile]], ensure_ascii=False, sort_keys=True)
+        code = b"".join(func.__code__.co_code for func in (RepairRuleEngine._normalize, RepairRuleEngine.classify))
+        digest = hashlib.sha1(config.encode("utf-8") + code).hexdigest()[:12]
+        return f"{__name__}.{type(self).__qualname__}[{self.profile}]:{digest}"
+
+    def _winner(self, found):
+        """نام اولین قاعده‌ای که همه کلمات کلیدی آن پیدا شده (None اگر هیچ قاعده‌ای برقرار نباشد)"""
+        present = frozenset().union(*(self._implied[k] for k in found))
+        winner = next((name for name, required in self._required if required <= present), None)
+        with self._lock:
+            self._winners[found] = winner
+        return winner
+
+    def classify(self, text):
+        """نام قاعده برنده برای یک رشته پاک‌سازی شده (None اگر هیچ قاعده‌ای برقرار نباشد)"""
+        # کلید: کلمات پیدا شده به ترتیب پیدا شدن (تکرارها هم کلید جدا ولی با نتیجه یکسان)
+        found = tuple(self._pattern.findall(text)) if self._pattern is not None else ()
+        winner = self._winners.get(found, False)
+        return self._winner(found) if winner is False else winner
+
+    def __call__(self, repair_type):
+        """نرمالایز یک مقدار نوع تعمیر (نتیجه مقادیر رشته‌ای نگه داشته می‌شود)"""
+        if isinstance(repair_type, str):
+            result = self._results.get(repair_type)
+            if result is None:
+                result = self._normalize(repair_type)
+                if len(self._results) >= RESULT_CACHE_SIZE:
+                    self._results.clear()
+                self._results[repair_type] = result
+            return result
+        return self._normalize(repair_type)
+
+    def _normalize(self, repair_type):
+        if isinstance(repair_type, str):
+            text = repair_type
+        elif not self.keep_missing:
+            return str(repair_type)
+        else:
+            try:
+                if pd.isna(repair_type):
+                    return repair_type
+            except (TypeError, ValueError):
+                return str(repair_type)
+            text = str(repair_type)
+
+        text = text.strip()
+        if self.remove_chars is not None:
+            text = text.translate(self.remove_chars)
+        if self.collapse_spaces:
+            text = _SPACES.sub(" ", text)
+        if self.lowercase:
+            text = text.lower()
+
+        winner = self.classify(text.lower() if self.match_lowercase else text)
+        return text if winner is None else winner
@@ -6,8 +6,7 @@ from tkinter import ttk, filedialog, messagebox
 import pandas as pd
 import os
 import json
-from persiantools.jdatetime import JalaliDate
-from openpyxl import load_workbook, Workbook
+from openpyxl import Workbook
 from openpyxl.drawing.image import Image as XLImage
 from openpyxl.styles import Font, PatternFill, Alignment
 from reportlab.pdfgen import canvas
@@ -19,6 +18,25 @@ import traceback
 import warnings
 import logging
 import re
+import time
+import bisect
+import multiprocessing
+import numpy as np
+from pandas.api.types import union_categoricals
+from sheet_cache import SheetCache, file_fingerprint
+from excel_stream import (read_sheet, read_sheet_tasks_parallel, concat_sheets, read_sheet_appended,
+                          read_sheet_header, read_sheet_headers, tail_signature, ENGINE_XLSX)
+from background_task import BackgroundTask
+from workbook_catalog import WorkbookCatalog
+from data_schema import typed_dataset, to_category, distinct_strings, decimal_hours, HOURS_DECIMALS
+from repair_normalizer import ColumnNormalizer, NormalizationMemo
+from repair_rules import RepairRuleEngine
+from persian_text import canonical_text
+from part_aliases import AliasMap, suggest_merges, DEFAULT_THRESHOLD
+from column_resolver import ColumnResolver, COLUMN_LABELS
+from filter_index import AdjacencyIndex, FilterIndex, FilterResultCache, DEFAULT_CACHE_MB, frame_nbytes
+from part_search import PartSearch
+from jalali_dates import DAY_MISSING, jalali_to_day, day_to_jalali, to_day_ordinals
 
 # تنظیمات لاگینگ
 logging.basicConfig(
@@ -33,6 +51,30 @@ warnings.simplefilter("ignore", UserWarning)
 # -----------------------------
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 SETTINGS_PATH = os.path.join(BASE_DIR, "settings.json")
+# فهرست شیت‌ها و آمار هر شیت فایل‌های باز شده (کنار settings.json)
+CATALOG_PATH = os.path.join(BASE_DIR, "workbook_catalog.json")
+# نگاشت ستون‌ها به ازای هر ساختار هدر (شامل نگاشت‌های ثابت شده کاربر)
+COLUMN_MAP_PATH = os.path.join(BASE_DIR, "column_map.json")
+# ادغام‌های تأیید شده نام‌های قالب/قطعه/دستگاه (نام مستعار -> نام اصلی)
+PART_ALIASES_PATH = os.path.join(BASE_DIR, "part_aliases.json")
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+
+# ستون نام شیت مبدأ هر ردیف در حالت بارگذاری همه ماه‌ها
+SOURCE_SHEET_COL = "شیت"
+# ستون‌های سال و نام فایل مبدأ هر ردیف در حالت بارگذاری پوشه
+YEAR_COL = "سال"
+FILE_COL = "فایل"
+# نام یکسان ستون‌های تشخیص داده شده هنگام الحاق فایل‌هایی با هدرهای کمی متفاوت
+CANONICAL_COLUMN_NAMES = {
+    "repair_col": "نوع تعمیر",
+    "part_col": "قالب / قطعه / دستگاه",
+    "date_col": "تاریخ",
+    "perf_col": "مقدار ساعت کار شده",
+    "req_col": "شماره نامه درخواست",
+    "code_col": "کد قالب",
+}
+# نام مدخل کش برای شیت‌هایی که فقط ستون‌های تشخیص داده شده آن‌ها خوانده شده
+PROJECTED_CACHE_VARIANT = "projected"
 
 # -----------------------------
 def register_persian_fonts():
@@ -69,6 +111,9 @@ def load_settings():
         "last_excel_path": "",
         "last_sheet": "",
         "window_size": "1200x800",
+        "excel_engine": ENGINE_XLSX,
+        "load_all_columns": False,
+        "filter_cache_mb": DEFAULT_CACHE_MB,
         "filters": {
             "start_date": "",
             "end_date": "",
@@ -119,45 +164,155 @@ def save_settings(data):
         traceback.print_exc()
 
 # -----------------------------
-def find_column(columns, possible_names):
+# قواعد مرتب نرمالایز نوع تعمیر از کلید repair_rules در settings.json (موتور repair_rules)
+normalize_repair_type = RepairRuleEngine.from_settings(SETTINGS_PATH)
+
+# نرمالایز ستون نوع تعمیر روی مقادیر یکتا، با memo پایدار بین اجراها
+REPAIR_NORMALIZER = ColumnNormalizer(normalize_repair_type,
+                                     NormalizationMemo(os.path.join(CACHE_DIR, "normalize_memo.json")))
+
+PART_ALIASES = AliasMap(PART_ALIASES_PATH)
+
+COLUMN_RESOLVER = ColumnResolver(COLUMN_MAP_PATH)
+
+def detect_column_names(columns):
+    """ستون‌های مهم از روی هدرها (نگاشت ذخیره شده برای همین ساختار هدر یا امتیازدهی یک باره)"""
+    return COLUMN_RESOLVER.resolve(columns)
+
+def projected_columns(headers):
     """
-    پیدا کردن ستون در لیست ستون‌ها بر اساس نام‌های احتمالی
+    اندیس ستون‌هایی از شیت که برنامه استفاده می‌کند (ستون‌های تشخیص داده شده)
+    اگر ستونی تشخیص داده نشود یا همه ستون‌ها لازم باشند None (خواندن همه ستون‌ها)
     """
-    for name in possible_names:
-        for col in columns:
-            if name.strip().lower() in str(col).strip().lower():
-                return col
-    return None
+    detected = {col for col in detect_column_names(headers).values() if col is not None}
+    usecols = [i for i, header in enumerate(headers) if header in detected]
+    if not usecols or len(usecols) == len(headers):
+        return None
+    return usecols
+
+def load_stats_text(stats):
+    """متن آمار بارگذاری (ستون‌ها، حافظه، زمان و صرفه‌جویی تقریبی) برای نوار وضعیت"""
+    text = f"{stats['loaded_columns']} ستون، {stats['memory_mb']:.1f} MB، {stats['elapsed']:.2f} ثانیه"
+    if stats.get("from_cache"):
+        return text + " (از کش)"
+    total_columns = stats.get("total_columns")
+    if not total_columns or total_columns == stats["loaded_columns"]:
+        return text
+    
+    # هزینه هر سلول خوانده نشده برابر میانگین سلول‌های خوانده شده فرض می‌شود
+    skipped = stats.get("skipped_cells", 0)
+    loaded = max(stats.get("loaded_cells", 0), 1)
+    saved_mb = stats["memory_mb"] * skipped / loaded
+    saved_s = stats["elapsed"] * skipped / loaded
+    return (f"{stats['loaded_columns']} از {total_columns} ستون، {stats['memory_mb']:.1f} MB، "
+            f"{stats['elapsed']:.2f} ثانیه | صرفه‌جویی تقریبی: {saved_mb:.1f} MB و {saved_s:.2f} ثانیه "
+            f"({skipped:,} سلول خوانده نشد)")
+
+def prepare_dataset(df, normalized, with_index=True):
+    """
+    کارهای سنگین پس از خواندن شیت (قابل اجرا در ترد کارگر):
+    تشخیص ستون‌ها، تبدیل ستون‌ها به نوع‌های schema و ساخت نسخه نرمالایز شده
+    (با اعمال نام‌های مستعار قالب/قطعه/دستگاه) و ایندکس ستون‌های فیلتر
+    """
+    columns = detect_column_names(df.columns)
+    df_normalized = typed_dataset(df, columns, normalized)
+    part_col = columns["part_col"]
+    if part_col is not None and part_col in df_normalized.columns:
+        df_normalized[part_col] = PART_ALIASES.apply(df_normalized[part_col])
+    return {
+        "df": df,
+        "df_normalized": df_normalized,
+        "columns": columns,
+        "filter_index": FilterIndex(df_normalized, columns) if with_index else None,
+    }
 
-# -----------------------------
-def normalize_repair_type(repair_type):
-    """نرمالایز کردن نوع تعمیر برای تطبیق بهتر"""
-    if not isinstance(repair_type, str):
-        return str(repair_type)
+def sheet_stats(df, normalized):
+    """آمار یک شیت برای فهرست فایل: تعداد ردیف، بازه تاریخ (شماره روز و شمسی) و انواع تعمیر"""
+    columns = detect_column_names(df.columns)
+    stats = {"rows": len(df), "min_day": None, "max_day": None,
+             "min_date": "", "max_date": "", "repair_types": []}
     
-    repair_type = repair_type.strip()
+    date_col = columns["date_col"]
+    if date_col is not None:
+        days = to_day_ordinals(df[date_col])
+        days = days[days != DAY_MISSING]
+        if len(days):
+            stats["min_day"], stats["max_day"] = int(days.min()), int(days.max())
+            stats["min_date"] = day_to_jalali(stats["min_day"])
+            stats["max_date"] = day_to_jalali(stats["max_day"])
     
-    # حذف کاراکترهای اضافی و نرمالایز کردن
-    repair_type = re.sub(r'[:]', '', repair_type)
-    repair_type = re.sub(r'\s+', ' ', repair_type)
+    repair_col = columns["repair_col"]
+    if repair_col is not None and repair_col in normalized.columns:
+        stats["repair_types"] = sorted(distinct_strings(normalized[repair_col]))
+    return stats
+
+def normalized_repair_frame(df):
+    """ستون نوع تعمیر نرمالایز شده یک شیت به صورت DataFrame جداگانه"""
+    repair_col = detect_column_names(df.columns)["repair_col"]
+    if repair_col is None:
+        return pd.DataFrame(index=df.index)
+    return pd.DataFrame({repair_col: REPAIR_NORMALIZER.normalize(df[repair_col])}, index=df.index)
+
+def workbook_paths(folder):
+    """فایل‌های xlsx یک پوشه به ترتیب نام (بدون فایل‌های موقت ~$ اکسل)"""
+    names = sorted(name for name in os.listdir(folder)
+                   if name.lower().endswith(".xlsx") and not name.startswith("~$"))
+    return [os.path.join(folder, name) for name in names]
+
+def workbook_year(path):
+    """سال شمسی فایل از روی نام آن (مثلاً 1404.xlsx یا قالب سازی 1403.xlsx)"""
+    match = re.search(r"(?<!\d)(1[34]\d\d)(?!\d)", os.path.basename(path))
+    return match.group(1) if match else ""
+
+def reconcile_columns(df, normalized):
+    """تغییر نام ستون‌های تشخیص داده شده یک شیت به نام‌های CANONICAL_COLUMN_NAMES"""
+    mapping = {}
+    for key, col in detect_column_names(df.columns).items():
+        canonical = CANONICAL_COLUMN_NAMES[key]
+        if col is not None and col != canonical and canonical not in df.columns:
+            mapping[col] = canonical
+    if not mapping:
+        return df, normalized
+    return df.rename(columns=mapping), normalized.rename(columns=mapping)
+
+def combine_workbook_frames(parts):
+    """
+    الحاق شیت‌های چند فایل با هم‌ترازی ستون‌ها و افزودن ستون‌های سال، فایل و شیت مبدأ
+    parts: لیست ((مسیر, شیت), df, نوع تعمیر نرمالایز شده)
+    """
+    frames, normalized = {}, {}
+    for i, ((path, sheet), df, norm) in enumerate(parts):
+        frames[i], normalized[i] = reconcile_columns(df, norm)
+    combined = concat_sheets(frames)
+    combined_normalized = concat_sheets(normalized)
     
-    # گروه‌بندی انواع تعمیر
-    if 'قالب' in repair_type and 'تعمیر' in repair_type:
-        return 'قالب تعمیری'
-    elif 'قطعه' in repair_type and 'تعمیر' in repair_type:
-        return 'قطعه تعمیری'
-    elif 'دستگاه' in repair_type and 'تعمیر' in repair_type:
-        return 'دستگاه تعمیری'
-    elif 'قالب' in repair_type:
-        return 'قالب'
-    elif 'قطعه' in repair_type:
-        return 'قطعه'
-    elif 'دستگاه' in repair_type:
-        return 'دستگاه'
-    elif 'تعمیر' in repair_type:
-        return 'تعمیری'
-    else:
-        return repair_type
+    lengths = [len(df) for _, df, _ in parts]
+    sources = {
+        YEAR_COL: [workbook_year(path) for (path, _), _, _ in parts],
+        FILE_COL: [os.path.basename(path) for (path, _), _, _ in parts],
+        SOURCE_SHEET_COL: [sheet for (_, sheet), _, _ in parts],
+    }
+    for col, values in sources.items():
+        combined[col] = pd.Categorical(np.repeat(np.array(values, dtype=object), lengths))
+    return combined, combined_normalized
+
+def append_column(column, appended):
+    """الحاق یک ستون؛ ستون‌های categorical با ادغام دسته‌ها categorical می‌مانند"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        merged = union_categoricals([column, to_category(appended)], sort_categories=True)
+        return pd.Series(merged, name=column.name)
+    return pd.concat([column, appended], ignore_index=True)
+
+def append_rows(df, appended):
+    """الحاق ردیف‌های جدید به انتهای DataFrame (ستون به ستون تا نام‌های تکراری حفظ شوند)"""
+    if len(appended) == 0:
+        return df
+    if df.shape[1] == 0:
+        return pd.DataFrame(index=pd.RangeIndex(len(df) + len(appended)))
+    data = {i: append_column(df.iloc[:, i], appended.iloc[:, i]) for i in range(df.shape[1])}
+    combined = pd.DataFrame(data)
+    combined.columns = df.columns
+    return combined
 
 # -----------------------------
 class ExcelReportApp:
@@ -172,6 +327,12 @@ class ExcelReportApp:
         self.df_filtered = None
         self.df_normalized = None
         self.df_grouped = None
+        # ایندکس معکوس ستون‌های فیلتر روی df_normalized و طرح آخرین فیلتر (filter_index)
+        self.filter_index = None
+        self.filter_plan = None
+        # نتایج اخیر فیلتر با کلید (نسخه دیتاست، کلید طرح فیلتر)؛ هر تغییر دیتاست نسخه را بالا می‌برد
+        self.dataset_version = 0
+        self.filter_cache = FilterResultCache(self.settings.get("filter_cache_mb", DEFAULT_CACHE_MB))
         
         self.repair_col = None
         self.part_col = None
@@ -180,11 +341,26 @@ class ExcelReportApp:
         self.req_col = None
         self.code_col = None
         
+        self.sheet_cache = SheetCache(os.path.join(CACHE_DIR, "sheets"))
+        self.catalog = WorkbookCatalog(CATALOG_PATH)
+        self.loading_task = None
+        self.loaded_source = None
+        # (مسیر, شیت) شیت‌های تشکیل دهنده دیتاست فعلی
+        self.loaded_sheets = []
+        self.distinct_values = {}
+        # نوع تعمیر ↔ قالب/قطعه/دستگاه برای کمبوباکس‌های وابسته
+        self.repair_parts = None
+        # جستجوی تایپی قالب/قطعه/دستگاه و قالب‌های مجاز نوع تعمیر انتخاب شده (ماسک بولی)
+        self.part_search = None
+        self.part_allowed = None
+        
         self.persian_font = register_persian_fonts()
         self.has_persian_support = self.check_persian_support()
         
         self.status_var = tk.StringVar()
         self.status_var.set("آماده")
+        # راهنمای کمترین و بیشترین تاریخ داده‌های بارگذاری شده (کنار فیلدهای تاریخ)
+        self.date_range_var = tk.StringVar()
 
         self.root.title("گزارش قالبسازی - برنامه‌ریز تعمیر و ساخت")
         geom = self.settings.get("window_size", "1200x800")
@@ -276,6 +452,8 @@ class ExcelReportApp:
         file_menu.add_command(label="اطلاعات دیباگ لوگو", command=self.debug_logo_info)
         file_menu.add_command(label="اطلاعات دیباگ ستون‌ها", command=self.debug_columns_info)
         file_menu.add_command(label="اطلاعات دیباگ فیلتر هوشمند", command=self.debug_smart_filter)
+        file_menu.add_command(label="📊 آمار کش فیلتر", command=self.show_filter_cache_stats)
+        file_menu.add_command(label="🔗 پیشنهاد ادغام قالب/قطعه‌های مشابه", command=self.suggest_part_merges)
         file_menu.add_command(label="ذخیره تنظیمات", command=lambda: save_settings(self.settings))
         file_menu.add_command(label="بارگذاری دستی settings.json", command=self.debug_show_settings)
         file_menu.add_separator()
@@ -289,32 +467,92 @@ class ExcelReportApp:
         self.root.config(menu=menubar)
 
     def debug_columns_info(self):
-        """اطلاعات دیباگ برای ستون‌ها"""
+        """اطلاعات دیباگ ستون‌ها و ثابت کردن دستی نگاشت ستون‌ها"""
+        headers = self.current_sheet_headers()
+        if self.df is None and headers is None:
+            messagebox.showwarning("هشدار", "ابتدا داده‌ها را بارگذاری کنید.")
+            return
+        
         if self.df is not None:
             print("\n" + "="*50)
             print("اطلاعات ستون‌ها:")
             print(f"ستون نوع تعمیر: '{self.repair_col}'")
             print(f"ستون قالب/قطعه/دستگاه: '{self.part_col}'")
-            print("مقادیر منحصر به فرد نوع تعمیر (خام):")
-            for val in self.df[self.repair_col].dropna().astype(str).unique():
-                print(f"  - '{val}'")
+            if self.repair_col in self.df.columns:
+                print("مقادیر منحصر به فرد نوع تعمیر (خام):")
+                for val in self.df[self.repair_col].dropna().astype(str).unique():
+                    print(f"  - '{val}'")
             
-            if self.df_normalized is not None:
+            if self.df_normalized is not None and self.repair_col in self.df_normalized.columns:
                 print("مقادیر منحصر به فرد نوع تعمیر (نرمالایز شده):")
                 for val in self.df_normalized[self.repair_col].dropna().astype(str).unique():
                     print(f"  - '{val}'")
             print("="*50 + "\n")
-            
-            info_msg = f"""اطلاعات دیباگ ستون‌ها:
-            
-ستون نوع تعمیر: '{self.repair_col}'
-ستون قالب/قطعه/دستگاه: '{self.part_col}'
+            if headers is None:
+                headers = list(self.df.columns)
+        
+        self.show_column_mapping(headers)
 
-مقادیر نوع تعمیر (خام): {list(self.df[self.repair_col].dropna().astype(str).unique())}
-            """
-            messagebox.showinfo("اطلاعات دیباگ ستون‌ها", info_msg)
-        else:
-            messagebox.showwarning("هشدار", "ابتدا داده‌ها را بارگذاری کنید.")
+    def current_sheet_headers(self):
+        """ردیف هدر کامل شیت انتخاب شده (None اگر فایل یا شیت انتخاب نشده باشد)"""
+        path = self.file_entry.get().strip()
+        sheet = self.sheet_cb.get().strip()
+        if not path or not sheet or not os.path.exists(path):
+            return None
+        try:
+            headers = read_sheet_header(path, sheet, engine=self.settings.get("excel_engine", ENGINE_XLSX))
+            return list(headers) if headers is not None else None
+        except Exception as e:
+            logging.error(f"Error reading sheet header: {e}")
+            return None
+
+    def show_column_mapping(self, headers):
+        """پنجره نگاشت ستون‌ها با امکان ثابت کردن (pin) نگاشت هر ستون برای این ساختار هدر"""
+        mapping = COLUMN_RESOLVER.resolve(headers)
+        pinned = COLUMN_RESOLVER.pinned(headers)
+        none_label = "(هیچ)"
+        
+        window = tk.Toplevel(self.root)
+        window.title("اطلاعات دیباگ ستون‌ها")
+        frame = ttk.Frame(window, padding=10)
+        frame.pack(fill="both", expand=True)
+        
+        choices = {}
+        for row, (role, label) in enumerate(COLUMN_LABELS.items()):
+            ttk.Label(frame, text=f"{label}:").grid(row=row, column=0, sticky="w", padx=5, pady=2)
+            cb = ttk.Combobox(frame, width=40, state="readonly", values=[none_label] + [str(h) for h in headers])
+            cb.set(str(mapping[role]) if mapping[role] is not None else none_label)
+            cb.grid(row=row, column=1, sticky="w", padx=5, pady=2)
+            ttk.Label(frame, text="📌 ثابت" if role in pinned else "خودکار").grid(row=row, column=2, padx=5, pady=2)
+            choices[role] = cb
+        
+        if self.df is not None and self.repair_col in self.df.columns:
+            raw_values = list(self.df[self.repair_col].dropna().astype(str).unique())
+            ttk.Label(frame, text=f"مقادیر نوع تعمیر (خام): {raw_values}", wraplength=500,
+                      justify="right").grid(row=len(choices), column=0, columnspan=3, sticky="w", padx=5, pady=8)
+        
+        def changed():
+            # کش شیت‌های projection شده این فایل با ستون‌های قبلی ساخته شده است
+            path = self.file_entry.get().strip()
+            for sheet in self.sheet_cb["values"]:
+                self.sheet_cache.invalidate(path, sheet, PROJECTED_CACHE_VARIANT)
+            window.destroy()
+            self.status_var.set("نگاشت ستون‌ها ذخیره شد؛ برای اعمال، داده‌ها را دوباره بارگذاری کنید")
+        
+        def pin():
+            COLUMN_RESOLVER.pin(headers, {role: (None if cb.get() == none_label else cb.get())
+                                          for role, cb in choices.items()})
+            changed()
+        
+        def unpin():
+            COLUMN_RESOLVER.unpin(headers)
+            changed()
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.grid(row=len(choices) + 1, column=0, columnspan=3, pady=10)
+        ttk.Button(button_frame, text="📌 ثابت کردن نگاشت", command=pin).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="↩ تشخیص خودکار", command=unpin).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="بستن", command=window.destroy).pack(side="left", padx=5)
 
     def debug_smart_filter(self):
         """دیباگ فیلتر هوشمند"""
@@ -346,6 +584,111 @@ class ExcelReportApp:
         """
         messagebox.showinfo("دیباگ فیلتر هوشمند", info_msg)
 
+    def part_weights(self):
+        """مجموع ساعت هر قالب/قطعه/دستگاه (کلید متعارف)؛ بدون ستون ساعت، تعداد ردیف‌ها"""
+        parts = self.df_normalized[self.part_col]
+        if self.perf_col in self.df.columns:
+            weights = self.df[self.perf_col].astype("float64").groupby(parts, observed=True).sum()
+        else:
+            weights = parts.value_counts()
+        return {name: float(weight) for name, weight in weights.items()}
+
+    def suggest_part_merges(self):
+        """پنجره پیشنهاد ادغام نام‌های تقریباً تکراری قالب/قطعه/دستگاه"""
+        if self.df_normalized is None or self.part_col is None:
+            messagebox.showwarning("هشدار", "ابتدا داده‌ها را بارگذاری کنید.")
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title("پیشنهاد ادغام قالب/قطعه/دستگاه‌های مشابه")
+        window.geometry("900x500")
+        
+        top_frame = ttk.Frame(window, padding=10)
+        top_frame.pack(fill="x")
+        ttk.Label(top_frame, text="حداقل شباهت (0 تا 1):").pack(side="left", padx=5)
+        threshold_entry = ttk.Entry(top_frame, width=8)
+        threshold_entry.insert(0, str(DEFAULT_THRESHOLD))
+        threshold_entry.pack(side="left", padx=5)
+        info_var = tk.StringVar(value=f"{len(PART_ALIASES.aliases())} ادغام ثبت شده")
+        
+        columns = ("نام", "ساعت", "ادغام در", "ساعت نام اصلی", "شباهت")
+        tree = ttk.Treeview(window, columns=columns, show="headings", selectmode="extended")
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=250 if col in ("نام", "ادغام در") else 100, anchor="center")
+        tree.pack(fill="both", expand=True, padx=10, pady=5)
+        suggestions = {}
+        
+        def show(result):
+            tree.delete(*tree.get_children())
+            suggestions.clear()
+            for item in result:
+                iid = tree.insert("", "end", values=(item["source"], f"{item['source_weight']:.2f}", item["target"],
+                                                     f"{item['target_weight']:.2f}", f"{item['score']:.2f}"))
+                suggestions[iid] = item
+            self.status_var.set(f"{len(result)} پیشنهاد ادغام پیدا شد")
+        
+        def search():
+            try:
+                threshold = float(threshold_entry.get())
+                if not 0 < threshold <= 1:
+                    raise ValueError(threshold)
+            except ValueError:
+                messagebox.showerror("خطا", "حداقل شباهت باید عددی بین 0 و 1 باشد.")
+                return
+            weights = self.part_weights()
+            
+            def work(progress, cancel_event):
+                return suggest_merges(weights, threshold, progress=progress)
+            
+            self.start_loading(work, show, f"جستجوی نام‌های مشابه در {len(weights)} قالب/قطعه/دستگاه", clear=False)
+        
+        def accept():
+            selected = [suggestions[iid] for iid in tree.selection()]
+            if not selected:
+                messagebox.showwarning("هشدار", "هیچ پیشنهادی انتخاب نشده است.")
+                return
+            merges = [(item["source"], item["target"]) for item in selected]
+            PART_ALIASES.add(merges)
+            self.apply_part_aliases()
+            
+            # پیشنهادهایی که نام ادغام شده‌ای دارند دیگر معتبر نیستند
+            merged = {source for source, _ in merges}
+            for iid, item in list(suggestions.items()):
+                if item["source"] in merged or item["target"] in merged:
+                    tree.delete(iid)
+                    del suggestions[iid]
+            info_var.set(f"{len(PART_ALIASES.aliases())} ادغام ثبت شده")
+            self.status_var.set(f"{len(merges)} ادغام ثبت و اعمال شد")
+        
+        def clear_aliases():
+            if not messagebox.askyesno("تأیید", "همه ادغام‌های ثبت شده حذف شوند؟ (پس از بارگذاری دوباره داده‌ها اعمال می‌شود)"):
+                return
+            PART_ALIASES.remove(list(PART_ALIASES.aliases()))
+            info_var.set("0 ادغام ثبت شده")
+        
+        ttk.Button(top_frame, text="🔍 جستجو", command=search).pack(side="left", padx=5)
+        ttk.Label(top_frame, textvariable=info_var).pack(side="left", padx=15)
+        
+        button_frame = ttk.Frame(window, padding=10)
+        button_frame.pack(fill="x")
+        ttk.Button(button_frame, text="✅ ادغام موارد انتخاب شده", command=accept).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="🗑 حذف همه ادغام‌ها", command=clear_aliases).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="بستن", command=window.destroy).pack(side="right", padx=5)
+        
+        search()
+
+    def apply_part_aliases(self):
+        """اعمال نام‌های مستعار روی دیتاست فعلی و به‌روزرسانی کمبوباکس‌ها"""
+        if self.df_normalized is None or self.part_col not in self.df_normalized.columns:
+            return
+        self.df_normalized[self.part_col] = PART_ALIASES.apply(self.df_normalized[self.part_col])
+        self.filter_index.invalidate("part_col")
+        self.bump_dataset_version()
+        self.populate_comboboxes(self.df_normalized)
+        if self.repair_cb.get() and self.repair_cb.get() != "(همه)":
+            self.on_repair_type_changed()
+
     def select_logo(self):
         """انتخاب فایل لوگو"""
         path = filedialog.askopenfilename(
@@ -480,8 +823,14 @@ class ExcelReportApp:
         self.setup_filters_frame()
         self.setup_treeview()
         
-        status_label = ttk.Label(self.root, textvariable=self.status_var, relief="sunken", anchor="w")
-        status_label.pack(fill="x", padx=10, pady=5)
+        self.status_label = ttk.Label(self.root, textvariable=self.status_var, relief="sunken", anchor="w")
+        self.status_label.pack(fill="x", padx=10, pady=5)
+        
+        # نوار پیشرفت بارگذاری؛ فقط هنگام خواندن فایل نمایش داده می‌شود
+        self.progress_frame = ttk.Frame(self.root)
+        self.progress_bar = ttk.Progressbar(self.progress_frame, mode="determinate", length=400)
+        self.progress_bar.pack(side="left", fill="x", expand=True, padx=5)
+        ttk.Button(self.progress_frame, text="✖ لغو", command=self.cancel_loading).pack(side="left", padx=5)
 
     def setup_filters_frame(self):
         """تنظیمات فریم فیلترها"""
@@ -506,6 +855,8 @@ class ExcelReportApp:
         ttk.Label(self.frame_filters, text="تاریخ پایان (YYYY/MM/DD):").grid(row=3, column=0, sticky="w", padx=5, pady=2)
         self.end_entry = ttk.Entry(self.frame_filters, width=15)
         self.end_entry.grid(row=3, column=1, sticky="w", padx=5, pady=2)
+        ttk.Label(self.frame_filters, textvariable=self.date_range_var, foreground="gray").grid(
+            row=2, column=2, rowspan=2, sticky="w", padx=5, pady=2)
 
         ttk.Label(self.frame_filters, text="نوع تعمیر:").grid(row=4, column=0, sticky="w", padx=5, pady=2)
         self.repair_cb = ttk.Combobox(self.frame_filters, width=30, state="readonly")
@@ -513,13 +864,24 @@ class ExcelReportApp:
         self.repair_cb.bind('<<ComboboxSelected>>', self.on_repair_type_changed)
 
         ttk.Label(self.frame_filters, text="قالب / قطعه / دستگاه:").grid(row=5, column=0, sticky="w", padx=5, pady=2)
-        self.part_cb = ttk.Combobox(self.frame_filters, width=30, state="readonly")
+        # با هر کلید فقط پرکارترین قالب‌های منطبق با نام یا کد در لیست کشویی قرار می‌گیرند
+        self.part_cb = ttk.Combobox(self.frame_filters, width=30)
         self.part_cb.grid(row=5, column=1, sticky="w", padx=5, pady=2)
+        self.part_cb.bind('<<ComboboxSelected>>', self.on_part_changed)
+        self.part_cb.bind('<KeyRelease>', self.on_part_typed)
+        ttk.Label(self.frame_filters, text="(نام یا کد قالب را تایپ کنید)", foreground="gray").grid(
+            row=5, column=2, sticky="w", padx=5, pady=2)
 
         button_frame = ttk.Frame(self.frame_filters)
         button_frame.grid(row=6, column=0, columnspan=3, pady=10)
         
         ttk.Button(button_frame, text="📂 بارگذاری داده‌ها", command=self.load_values).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="📅 بارگذاری همه ماه‌ها", command=self.load_all_sheets).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="🗂 بارگذاری پوشه", command=self.load_folder).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="🔄 ردیف‌های جدید", command=self.refresh_values).pack(side="left", padx=5)
+        self.load_all_columns_var = tk.BooleanVar(value=self.settings.get("load_all_columns", False))
+        ttk.Checkbutton(button_frame, text="همه ستون‌ها", variable=self.load_all_columns_var,
+                        command=self.toggle_load_all_columns).pack(side="left", padx=5)
         ttk.Button(button_frame, text="🔍 اعمال فیلتر ساده", command=self.apply_simple_filter).pack(side="left", padx=5)
         ttk.Button(button_frame, text="💾 ذخیره", command=lambda: self.save_output(self.df_filtered)).pack(side="left", padx=5)
         ttk.Button(button_frame, text="پاک کردن فیلترها", command=self.clear_filters).pack(side="left", padx=5)
@@ -584,7 +946,7 @@ class ExcelReportApp:
     # -------------------------
     def on_repair_type_changed(self, event=None):
         """وقتی نوع تعمیر تغییر کرد، قالب/قطعه/دستگاه‌های مربوطه را نمایش بده"""
-        if self.df_normalized is None or self.repair_col is None or self.part_col is None:
+        if self.repair_parts is None:
             print("⚠️ داده‌ها یا ستون‌ها بارگذاری نشده‌اند")
             return
         
@@ -592,33 +954,71 @@ class ExcelReportApp:
         print(f"🔍 نوع تعمیر انتخاب شده: '{selected_repair}'")
         
         if not selected_repair or selected_repair == "(همه)":
-            part_values = ["(همه)"] + sorted(self.df[self.part_col].dropna().astype(str).unique())
-            self.part_cb["values"] = part_values
+            self.part_allowed = None
+            self.update_part_suggestions()
             self.status_var.set("همه قالب/قطعه/دستگاه‌ها نمایش داده می‌شوند")
-            print(f"📋 نمایش همه {len(part_values)-1} قالب/قطعه/دستگاه")
+            print(f"📋 نمایش همه {len(self.distinct_values.get('part', ()))} قالب/قطعه/دستگاه")
         else:
             try:
-                mask = self.df_normalized[self.repair_col].astype(str) == selected_repair
-                filtered_parts = self.df_normalized.loc[mask, self.part_col].dropna().astype(str).unique()
+                filtered_parts = self.repair_parts.right_of(selected_repair)
                 
-                part_values = ["(همه)"] + sorted(filtered_parts)
-                self.part_cb["values"] = part_values
+                self.part_allowed = self.part_search.mask_of(filtered_parts)
                 self.part_cb.set('')
+                self.update_part_suggestions()
+                # قالب انتخابی پاک شد: همه انواع تعمیر دوباره قابل انتخاب‌اند
+                self.repair_cb["values"] = ["(همه)"] + sorted(self.distinct_values.get("repair", ()))
                 
-                count = len(part_values) - 1
+                count = len(filtered_parts)
                 self.status_var.set(f"{count} قالب/قطعه/دستگاه برای نوع تعمیر '{selected_repair}' یافت شد")
-                print(f"✅ {count} قالب/قطعه/دستگاه برای '{selected_repair}' پیدا شد: {list(filtered_parts)}")
+                print(f"✅ {count} قالب/قطعه/دستگاه برای '{selected_repair}' پیدا شد")
                 
             except Exception as e:
                 print(f"❌ خطا در فیلتر کردن: {e}")
                 logging.error(f"Error in on_repair_type_changed: {e}")
                 self.status_var.set("خطا در فیلتر کردن داده‌ها")
 
+    def on_part_changed(self, event=None):
+        """وقتی قالب/قطعه/دستگاه تغییر کرد، فقط انواع تعمیر مربوط به آن در کمبوباکس نوع تعمیر بمانند"""
+        if self.repair_parts is None:
+            return
+        
+        selected_part = self.part_cb.get()
+        if not selected_part or selected_part == "(همه)":
+            repair_values = sorted(self.distinct_values.get("repair", ()))
+        else:
+            repair_values = self.repair_parts.left_of(selected_part)
+        self.repair_cb["values"] = ["(همه)"] + repair_values
+
+    def on_part_typed(self, event=None):
+        """به‌روزرسانی پیشنهادهای قالب/قطعه/دستگاه با هر کلید (کلیدهای حرکت لیست نادیده گرفته می‌شوند)"""
+        if event is not None and event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        self.update_part_suggestions()
+
+    def update_part_suggestions(self):
+        """پرکارترین قالب/قطعه/دستگاه‌های منطبق با متن تایپ شده در لیست کشویی"""
+        if self.part_search is None:
+            return
+        text = self.part_cb.get()
+        if text == "(همه)":
+            text = ""
+        self.part_cb["values"] = ["(همه)"] + self.part_search.search(text, allowed=self.part_allowed)
+
+    def build_part_search(self):
+        """ساخت ایندکس جستجوی تایپی قالب‌ها (یک بار برای هر بارگذاری دیتاست)"""
+        if self.part_col not in self.df_normalized.columns:
+            self.part_search = None
+            return
+        codes = self.df_normalized[self.code_col] if self.code_col in self.df_normalized.columns else None
+        hours = self.df[self.perf_col] if self.perf_col in self.df.columns else None
+        self.part_search = PartSearch(self.df_normalized[self.part_col], codes, hours)
+        self.part_allowed = None
+
     def update_repair_listbox(self):
         """به‌روزرسانی لیست‌باکس انواع تعمیر"""
         if self.df_normalized is not None and self.repair_col is not None:
             self.repair_listbox.delete(0, tk.END)
-            repair_types = sorted(self.df_normalized[self.repair_col].dropna().astype(str).unique())
+            repair_types = sorted(self.distinct_values.get("repair", ()))
             for repair_type in repair_types:
                 self.repair_listbox.insert(tk.END, repair_type)
 
@@ -628,13 +1028,13 @@ class ExcelReportApp:
             messagebox.showwarning("هشدار", "ابتدا داده‌ها را بارگذاری کنید.")
             return
         
-        df = self.df.copy()
+        # شرط‌ها در طرح فیلتر جمع و فقط یک بار روی ستون‌های اصلی ارزیابی می‌شوند
+        plan = self.filter_index.plan()
         
-        # فیلتر بر اساس انواع تعمیر انتخاب شده
+        # فیلتر بر اساس انواع تعمیر انتخاب شده (OR ردیف‌های ایندکس شده هر نوع)
         selected_repairs = [self.repair_listbox.get(i) for i in self.repair_listbox.curselection()]
         if selected_repairs:
-            mask = self.df_normalized[self.repair_col].astype(str).isin(selected_repairs)
-            df = df[mask]
+            plan.values("repair_col", selected_repairs)
             print(f"🔍 فیلتر انواع تعمیر: {selected_repairs}")
 
         # فیلتر بر اساس بازه ساعت کار شده
@@ -643,21 +1043,16 @@ class ExcelReportApp:
         
         if hour_min or hour_max:
             try:
-                if self.perf_col in df.columns:
-                    df[self.perf_col] = pd.to_numeric(df[self.perf_col], errors="coerce")
-                    
-                    if hour_min and hour_max:
-                        df = df[(df[self.perf_col] >= float(hour_min)) & (df[self.perf_col] <= float(hour_max))]
-                        print(f"⏰ فیلتر ساعت: از {hour_min} تا {hour_max}")
-                    elif hour_min:
-                        df = df[df[self.perf_col] >= float(hour_min)]
-                        print(f"⏰ فیلتر ساعت: از {hour_min}")
-                    elif hour_max:
-                        df = df[df[self.perf_col] <= float(hour_max)]
-                        print(f"⏰ فیلتر ساعت: تا {hour_max}")
+                if self.perf_col in self.df.columns:
+                    low = float(hour_min) if hour_min else None
+                    high = float(hour_max) if hour_max else None
+                    plan.between(self.df[self.perf_col].to_numpy(), low, high, label="hours")
+                    print(f"⏰ فیلتر ساعت: از {hour_min or '-'} تا {hour_max or '-'}")
             except ValueError:
                 messagebox.showerror("خطا", "مقادیر ساعت باید عددی باشند.")
 
+        # تنها DataFrame ساخته شده در کل فیلتر (یا نتیجه همین فیلتر از کش)
+        df = self.filtered_frame(plan)
         self.df_filtered = df
         self.update_treeview(df)
         
@@ -700,14 +1095,14 @@ class ExcelReportApp:
             
             print(f"📊 گروه‌بندی بر اساس ستون‌های: {grouping_cols}")
             
-            # اطمینان از عددی بودن ستون ساعت کار شده
-            if self.perf_col in self.df_filtered.columns:
-                self.df_filtered[self.perf_col] = pd.to_numeric(self.df_filtered[self.perf_col], errors="coerce").fillna(0)
+            # ستون ساعت float32 است؛ جمع در float64 و روی مقادیر اعشاری ورودی انجام می‌شود تا
+            # خطای float32 (2.299999952316284) به مجموع‌ها و خروجی نرسد
+            # (مقادیر خالی در sum نادیده گرفته می‌شوند، معادل fillna(0))
+            hours = decimal_hours(self.df_filtered[self.perf_col])
             
-            # گروه‌بندی و جمع‌بندی - فقط ستون‌های مورد نظر
-            grouped_df = self.df_filtered.groupby(grouping_cols, as_index=False).agg({
-                self.perf_col: 'sum'
-            })
+            # گروه‌بندی روی کلیدهای متعارف df_normalized (هم‌تراز با ردیف‌های فیلتر شده)
+            keys = [self.df_normalized.loc[self.df_filtered.index, col] for col in grouping_cols]
+            grouped_df = hours.groupby(keys, observed=True).sum().round(HOURS_DECIMALS).reset_index()
             
             # مرتب‌سازی بر اساس ساعت کار شده (نزولی)
             grouped_df = grouped_df.sort_values(by=self.perf_col, ascending=False)
@@ -884,6 +1279,8 @@ class ExcelReportApp:
         self.end_entry.delete(0, tk.END)
         self.repair_cb.set('')
         self.part_cb.set('')
+        self.part_allowed = None
+        self.update_part_suggestions()
         self.hour_min_entry.delete(0, tk.END)
         self.hour_max_entry.delete(0, tk.END)
         self.repair_listbox.selection_clear(0, tk.END)
@@ -913,16 +1310,20 @@ class ExcelReportApp:
         
         self.set_loading_cursor(True)
         try:
-            wb = load_workbook(path, read_only=True)
-            sheetnames = wb.sheetnames[:]
-            wb.close()
+            # فقط workbook.xml و ابتدای هر شیت خوانده می‌شود (با کش بر اساس اثر انگشت فایل)
+            sheet_rows = self.catalog.sheet_rows(path)
+            sheetnames = list(sheet_rows)
             
             self.sheet_cb["values"] = sheetnames
             last_sheet = self.settings.get("last_sheet", "")
             if last_sheet and last_sheet in sheetnames:
                 self.sheet_cb.set(last_sheet)
             
-            self.status_var.set(f"{len(sheetnames)} شیت پیدا شد")
+            known_rows = [n for n in sheet_rows.values() if n is not None]
+            if known_rows:
+                self.status_var.set(f"{len(sheetnames)} شیت پیدا شد (حدود {sum(known_rows):,} ردیف)")
+            else:
+                self.status_var.set(f"{len(sheetnames)} شیت پیدا شد")
             
         except Exception as e:
             logging.error(f"Error loading sheets: {e}")
@@ -930,15 +1331,8 @@ class ExcelReportApp:
         finally:
             self.set_loading_cursor(False)
 
-    def load_values(self):
-        """بارگذاری داده‌ها از شیت انتخاب شده"""
-        path = self.file_entry.get().strip()
-        sheet = self.sheet_cb.get().strip()
-        
-        if not path or not sheet or not os.path.exists(path):
-            messagebox.showerror("خطا", "فایل و شیت را انتخاب کنید.")
-            return
-        
+    def clear_dataset(self):
+        """آزاد کردن داده‌های بارگذاری شده قبلی"""
         if hasattr(self, 'df'):
             del self.df
         if hasattr(self, 'df_filtered'):
@@ -952,52 +1346,562 @@ class ExcelReportApp:
         self.df_filtered = None
         self.df_normalized = None
         self.df_grouped = None
-        
-        self.set_loading_cursor(True)
+        self.filter_index = None
+        self.filter_plan = None
+        self.repair_parts = None
+        self.part_search = None
+        self.part_allowed = None
+        self.bump_dataset_version()
+        self.date_range_var.set("")
+        self.loaded_source = None
+        self.loaded_sheets = []
+
+    def read_sheet_cached(self, path, sheet, progress=None, all_columns=True, stats=None):
+        """
+        خواندن یک شیت از کش یا فایل
+        all_columns=False: فقط ستون‌های تشخیص داده شده خوانده می‌شوند (مدخل کش جداگانه)
+        خروجی (df, ستون نوع تعمیر نرمالایز شده, وضعیت انتهای شیت برای بارگذاری افزایشی)
+        """
+        variant = "" if all_columns else PROJECTED_CACHE_VARIANT
+        cached = self.sheet_cache.load(path, sheet, variant, with_extra=True)
+        if cached is not None and cached[1]:
+            frames, tail = cached
+            print(f"⚡ شیت '{sheet}' از کش خوانده شد")
+            if stats is not None:
+                stats["from_cache"] = True
+            self.record_sheet_stats(path, sheet, frames["data"], frames["normalized"], only_missing=True)
+            return frames["data"], frames["normalized"], tail
+        
+        # اگر فایل فقط ردیف جدید گرفته باشد، مدخل قبلی کش به همراه ردیف‌های جدید کافی است
+        stale = self.sheet_cache.load_stale(path, sheet, variant)
+        if stale is not None and stale[1]:
+            frames, tail = stale
+            result = self.read_appended_rows(path, sheet, frames["data"], frames["normalized"], tail,
+                                             progress, variant)
+            if result is not None:
+                return result[0], result[1], result[4]
+        
+        return self.read_sheet_full(path, sheet, progress, all_columns, stats)
+
+    def read_sheet_full(self, path, sheet, progress=None, all_columns=True, stats=None):
+        """
+        خواندن کامل یک شیت از فایل و ذخیره در کش
+        بدون all_columns ابتدا فقط هدر خوانده و ستون‌ها با detect_column_names تشخیص داده می‌شوند،
+        سپس فقط همان ستون‌ها از فایل خوانده می‌شوند
+        """
+        engine = self.settings.get("excel_engine", ENGINE_XLSX)
+        usecols = None
+        if not all_columns:
+            headers = read_sheet_header(path, sheet, engine=engine)
+            if headers is None:
+                return None, None, None
+            usecols = projected_columns(headers)
+            if stats is not None:
+                stats["total_columns"] = len(headers)
+        
+        df = read_sheet(path, sheet, progress=progress, engine=engine, usecols=usecols, stats=stats)
+        if df is None:
+            return None, None, None
+        tail = tail_signature(df, usecols=usecols)
+        variant = "" if all_columns else PROJECTED_CACHE_VARIANT
+        return df, self.store_sheet(path, sheet, df, variant, tail), tail
+
+    def read_appended_rows(self, path, sheet, df, normalized, tail, progress=None, variant=""):
+        """
+        خواندن فقط ردیف‌های اضافه شده به شیت نسبت به وضعیت tail و به‌روزرسانی کش
+        خروجی (df کامل، نوع تعمیر نرمالایز شده کامل، ردیف‌های جدید، نرمالایز ردیف‌های جدید،
+        وضعیت جدید انتهای شیت) یا None اگر داده‌های قبلی شیت تغییر کرده باشند
+        """
+        appended = read_sheet_appended(path, sheet, tail, progress=progress,
+                                       engine=self.settings.get("excel_engine", ENGINE_XLSX))
+        if appended is None:
+            print(f"⚠️ ردیف‌های قبلی شیت '{sheet}' تغییر کرده‌اند؛ بارگذاری کامل لازم است")
+            return None
+        
+        print(f"⚡ {len(appended)} ردیف جدید از شیت '{sheet}' خوانده شد")
+        appended_normalized = normalized_repair_frame(appended)
+        df = append_rows(df, appended)
+        normalized = append_rows(normalized, appended_normalized)
+        new_tail = tail_signature(df, usecols=tail.get("usecols"))
+        self.sheet_cache.store(path, sheet, {"data": df, "normalized": normalized}, variant, extra=new_tail)
+        self.record_sheet_stats(path, sheet, df, normalized)
+        return df, normalized, appended, appended_normalized, new_tail
+
+    def store_sheet(self, path, sheet, df, variant="", tail=None):
+        """نرمالایز ستون نوع تعمیر یک شیت و ذخیره آن در کش"""
+        normalized = normalized_repair_frame(df)
+        if tail is None:
+            tail = tail_signature(df)
+        self.sheet_cache.store(path, sheet, {"data": df, "normalized": normalized}, variant, extra=tail)
+        self.record_sheet_stats(path, sheet, df, normalized)
+        return normalized
+
+    def record_sheet_stats(self, path, sheet, df, normalized, only_missing=False):
+        """ثبت آمار شیت در فهرست فایل (برای انتخاب شیت‌های بازه تاریخ)"""
         try:
-            wb = load_workbook(path, data_only=True, read_only=True)
-            ws = wb[sheet]
-            rows = list(ws.values)
-            wb.close()
-            
-            if not rows:
+            if only_missing and self.catalog.sheet_stats(path).get(sheet) is not None:
+                return
+            self.catalog.update_stats(path, {sheet: sheet_stats(df, normalized)})
+        except Exception as e:
+            logging.error(f"Error recording sheet stats for {path} [{sheet}]: {e}")
+
+    def set_dataset(self, dataset):
+        """تنظیم داده‌های آماده شده در ترد اصلی و پر کردن فیلترها"""
+        self.df = dataset["df"]
+        self.df_normalized = dataset["df_normalized"]
+        self.filter_index = dataset["filter_index"]
+        self.filter_plan = None
+        self.bump_dataset_version()
+        self.loaded_source = dataset.get("source")
+        self.loaded_sheets = dataset.get("sheets", [])
+        self.detect_columns(self.df, dataset["columns"])
+        
+        self.populate_comboboxes(self.df_normalized)
+        self.update_repair_listbox()
+        self.update_date_range_hint()
+
+    def update_date_range_hint(self):
+        """نمایش کمترین و بیشترین تاریخ داده‌ها از دو سر ایندکس مرتب تاریخ"""
+        dates = self.filter_index.dates if self.filter_index is not None else None
+        if dates is None or dates.min_day is None:
+            self.date_range_var.set("")
+            return
+        self.date_range_var.set(f"بازه داده‌ها: {day_to_jalali(dates.min_day)} تا {day_to_jalali(dates.max_day)}")
+
+    def collect_distinct_values(self, df_normalized):
+        """مقادیر یکتای نوع تعمیر (نرمالایز شده) و قالب/قطعه/دستگاه"""
+        values = {}
+        for key, col in (("repair", self.repair_col), ("part", self.part_col)):
+            if col in df_normalized.columns:
+                values[key] = distinct_strings(df_normalized[col])
+        return values
+
+    def append_dataset(self, result):
+        """افزودن ردیف‌های جدید به داده‌های فعلی و به‌روزرسانی افزایشی فیلترها"""
+        self.df = result["df"]
+        self.df_normalized = result["df_normalized"]
+        self.filter_index = result["filter_index"]
+        self.filter_plan = None
+        self.bump_dataset_version()
+        self.loaded_source = result["source"]
+        
+        # فقط مقادیر جدید به کمبوباکس‌ها و لیست‌باکس اضافه می‌شوند
+        new_values = self.collect_distinct_values(result["appended_normalized"])
+        new_repairs = sorted(new_values.get("repair", set()) - self.distinct_values.get("repair", set()))
+        new_parts = new_values.get("part", set()) - self.distinct_values.get("part", set())
+        for key, values in new_values.items():
+            self.distinct_values.setdefault(key, set()).update(values)
+        appended = result["appended_normalized"]
+        if self.repair_parts is not None and self.repair_col in appended.columns and self.part_col in appended.columns:
+            self.repair_parts.update(appended[self.repair_col], appended[self.part_col])
+        
+        if new_repairs:
+            self.repair_cb["values"] = ["(همه)"] + sorted(self.distinct_values["repair"])
+            current = list(self.repair_listbox.get(0, tk.END))
+            for repair_type in new_repairs:
+                index = bisect.bisect_left(current, repair_type)
+                current.insert(index, repair_type)
+                self.repair_listbox.insert(index, repair_type)
+        # ساعت‌های قالب‌های قبلی هم تغییر کرده است؛ ایندکس جستجو دوباره ساخته می‌شود
+        self.build_part_search()
+        selected_repair = self.repair_cb.get()
+        if self.part_search is not None and self.repair_parts is not None and selected_repair and selected_repair != "(همه)":
+            self.part_allowed = self.part_search.mask_of(self.repair_parts.right_of(selected_repair))
+        self.update_part_suggestions()
+        
+        self.update_date_range_hint()
+        print(f"📝 {len(new_repairs)} نوع تعمیر و {len(new_parts)} قالب/قطعه/دستگاه جدید اضافه شد")
+
+    # -------------------------
+    def start_loading(self, work, on_done, message, clear=True):
+        """اجرای بارگذاری در پس‌زمینه با نوار پیشرفت و دکمه لغو"""
+        if self.loading_task is not None and self.loading_task.running:
+            self.status_var.set("بارگذاری دیگری در حال انجام است")
+            return
+        
+        if clear:
+            self.clear_dataset()
+        self.root.config(cursor="watch")
+        self.progress_bar["value"] = 0
+        self.progress_bar["maximum"] = 1
+        self.progress_frame.pack(fill="x", padx=10, before=self.status_label)
+        self.status_var.set(message)
+        
+        def done(result):
+            self.finish_loading()
+            on_done(result)
+        
+        def error(exc):
+            self.finish_loading()
+            messagebox.showerror("خطا", f"خطا در بارگذاری داده‌ها: {str(exc)}")
+        
+        def cancelled():
+            self.finish_loading()
+            self.status_var.set("بارگذاری لغو شد")
+        
+        def progress(done_count, total):
+            self.progress_bar["maximum"] = max(total, 1)
+            self.progress_bar["value"] = done_count
+            self.status_var.set(f"{message} ({done_count} از {total})")
+        
+        self.loading_task = BackgroundTask(self.root, work, done, on_error=error,
+                                           on_progress=progress, on_cancel=cancelled).start()
+
+    def finish_loading(self):
+        """پنهان کردن نوار پیشرفت پس از پایان بارگذاری"""
+        self.loading_task = None
+        self.progress_frame.pack_forget()
+        self.root.config(cursor="")
+
+    def cancel_loading(self):
+        """لغو بارگذاری در حال انجام"""
+        if self.loading_task is not None:
+            self.loading_task.cancel()
+            self.status_var.set("در حال لغو بارگذاری...")
+
+    def load_values(self):
+        """بارگذاری داده‌ها از شیت انتخاب شده"""
+        path = self.file_entry.get().strip()
+        sheet = self.sheet_cb.get().strip()
+        
+        if not path or not sheet or not os.path.exists(path):
+            messagebox.showerror("خطا", "فایل و شیت را انتخاب کنید.")
+            return
+        
+        all_columns = self.settings.get("load_all_columns", False)
+        
+        def work(progress, cancel_event):
+            started = time.perf_counter()
+            fingerprint = file_fingerprint(path)
+            stats = {}
+            df, normalized, tail = self.read_sheet_cached(path, sheet, progress, all_columns, stats)
+            if df is None:
+                return None
+            dataset = prepare_dataset(df, normalized)
+            dataset["source"] = {"path": path, "sheet": sheet, "fingerprint": fingerprint,
+                                 "tail": tail, "all_columns": all_columns}
+            dataset["sheets"] = [(path, sheet)]
+            stats.update({
+                "elapsed": time.perf_counter() - started,
+                "loaded_columns": df.shape[1],
+                "loaded_cells": int(df.count().sum()),
+                "memory_mb": df.memory_usage(deep=True).sum() / 2**20,
+            })
+            dataset["load_stats"] = stats
+            return dataset
+        
+        def done(dataset):
+            if dataset is None:
                 messagebox.showerror("خطا", "شیت انتخاب‌شده خالی است.")
                 return
             
-            headers = [str(x).strip() if x else "" for x in rows[0]]
-            df = pd.DataFrame(rows[1:], columns=headers)
-            self.df = df
-            
-            # ایجاد نسخه نرمالایز شده از داده‌ها
-            self.df_normalized = df.copy()
-            if self.repair_col in df.columns:
-                self.df_normalized[self.repair_col] = self.df_normalized[self.repair_col].apply(normalize_repair_type)
-            
             self.settings["last_sheet"] = sheet
             save_settings(self.settings)
 
-            self.detect_columns(df)
-            self.populate_comboboxes(self.df_normalized)
-            self.update_repair_listbox()
+            self.set_dataset(dataset)
 
-            record_count = len(df)
-            self.status_var.set(f"تعداد {record_count} رکورد بارگذاری شد")
+            record_count = len(self.df)
+            self.status_var.set(f"تعداد {record_count} رکورد بارگذاری شد | {load_stats_text(dataset['load_stats'])}")
             messagebox.showinfo("موفق", f"اطلاعات بارگذاری و نرمالایز شد. ({record_count} رکورد)")
+        
+        self.start_loading(work, done, f"در حال خواندن شیت '{sheet}'")
+
+    def toggle_load_all_columns(self):
+        """تغییر حالت بارگذاری همه ستون‌ها یا فقط ستون‌های تشخیص داده شده"""
+        self.settings["load_all_columns"] = bool(self.load_all_columns_var.get())
+        save_settings(self.settings)
+        if self.settings["load_all_columns"]:
+            self.status_var.set("بارگذاری بعدی همه ستون‌های شیت را می‌خواند")
+        else:
+            self.status_var.set("بارگذاری بعدی فقط ستون‌های تشخیص داده شده را می‌خواند")
+
+    def refresh_values(self):
+        """خواندن فقط ردیف‌های اضافه شده به شیت بارگذاری شده (در صورت تغییر فایل)"""
+        source = self.loaded_source
+        if self.df is None or source is None:
+            messagebox.showwarning("هشدار", "ابتدا یک شیت را بارگذاری کنید.")
+            return
+        
+        path, sheet = source["path"], source["sheet"]
+        if not os.path.exists(path):
+            messagebox.showerror("خطا", "فایل یافت نشد.")
+            return
+        if file_fingerprint(path) == source["fingerprint"]:
+            self.status_var.set("فایل از آخرین بارگذاری تغییری نکرده است")
+            return
+        
+        df = self.df
+        df_normalized = self.df_normalized
+        all_columns = source.get("all_columns", True)
+        variant = "" if all_columns else PROJECTED_CACHE_VARIANT
+        
+        def work(progress, cancel_event):
+            fingerprint = file_fingerprint(path)
+            # کش و امضای انتهای شیت روی مقادیر خام (بدون schema) ساخته می‌شوند؛
+            # ردیف‌های جدید به نسخه خام کش شده اضافه و فقط خودشان نوع‌دهی می‌شوند
+            result = None
+            stale = self.sheet_cache.load_stale(path, sheet, variant)
+            if stale is not None and stale[1] == source["tail"]:
+                frames = stale[0]
+                result = self.read_appended_rows(path, sheet, frames["data"], frames["normalized"],
+                                                 source["tail"], progress, variant)
             
-        except Exception as e:
-            logging.error(f"Error loading values: {e}")
-            messagebox.showerror("خطا", f"خطا در بارگذاری داده‌ها: {str(e)}")
-        finally:
-            self.set_loading_cursor(False)
+            if result is None:
+                full_df, full_normalized, tail = self.read_sheet_full(path, sheet, progress, all_columns)
+                if full_df is None:
+                    return None
+                dataset = prepare_dataset(full_df, full_normalized)
+                dataset["mode"] = "full"
+                dataset["sheets"] = [(path, sheet)]
+            else:
+                _, _, appended, appended_normalized, tail = result
+                appended_dataset = prepare_dataset(appended, appended_normalized, with_index=False)
+                combined_normalized = append_rows(df_normalized, appended_dataset["df_normalized"])
+                dataset = {
+                    "mode": "append",
+                    "df": append_rows(df, appended_dataset["df"]),
+                    "df_normalized": combined_normalized,
+                    "filter_index": FilterIndex(combined_normalized, appended_dataset["columns"]),
+                    "appended_normalized": appended_dataset["df_normalized"],
+                    "appended_count": len(appended),
+                }
+            dataset["source"] = {"path": path, "sheet": sheet, "fingerprint": fingerprint,
+                                 "tail": tail, "all_columns": all_columns}
+            return dataset
+        
+        def done(dataset):
+            if dataset is None:
+                self.clear_dataset()
+                messagebox.showerror("خطا", "شیت انتخاب‌شده خالی است.")
+                return
+            
+            if dataset["mode"] == "append":
+                self.append_dataset(dataset)
+                self.status_var.set(f"{dataset['appended_count']} ردیف جدید اضافه شد (مجموع {len(self.df)} رکورد)")
+            else:
+                self.set_dataset(dataset)
+                self.status_var.set(f"داده‌های قبلی تغییر کرده بود؛ تعداد {len(self.df)} رکورد دوباره بارگذاری شد")
+        
+        self.start_loading(work, done, f"در حال بررسی ردیف‌های جدید شیت '{sheet}'", clear=False)
+
+    def load_all_sheets(self):
+        """بارگذاری همه شیت‌ها (ماه‌ها) به صورت موازی و الحاق آن‌ها در یک دیتاست سالانه"""
+        path = self.file_entry.get().strip()
+        
+        if not path or not os.path.exists(path):
+            messagebox.showerror("خطا", "فایل یافت نشد.")
+            return
+        
+        known_sheets = list(self.sheet_cb["values"])
+        all_columns = self.settings.get("load_all_columns", False)
+        
+        def work(progress, cancel_event):
+            sheetnames = known_sheets
+            if not sheetnames:
+                sheetnames = self.catalog.sheet_names(path)
+            
+            return self.sheets_dataset(path, sheetnames, all_columns, progress)
+        
+        def done(dataset):
+            if dataset is None:
+                messagebox.showerror("خطا", "همه شیت‌ها خالی هستند.")
+                return
+            
+            self.set_dataset(dataset)
+            
+            record_count = len(self.df)
+            sheet_count = dataset["sheet_count"]
+            self.status_var.set(f"تعداد {record_count} رکورد از {sheet_count} شیت بارگذاری شد")
+            messagebox.showinfo("موفق", f"اطلاعات {sheet_count} شیت بارگذاری و نرمالایز شد. ({record_count} رکورد)")
+        
+        self.start_loading(work, done, "در حال خواندن همه شیت‌ها")
+
+    def sheets_dataset(self, path, sheetnames, all_columns, progress=None):
+        """خواندن چند شیت یک فایل و الحاق آن‌ها با ستون شیت مبدأ (None اگر همه خالی باشند)"""
+        keys = [(path, sheet) for sheet in sheetnames]
+        frames, normalized = self.read_workbook_sheets(keys, all_columns, progress)
+        order = [key for key in keys if key in frames]
+        if not order:
+            return None
+        
+        df = concat_sheets({sheet: frames[(path, sheet)] for _, sheet in order}, source_col=SOURCE_SHEET_COL)
+        normalized_df = concat_sheets({sheet: normalized[(path, sheet)] for _, sheet in order})
+        dataset = prepare_dataset(df, normalized_df)
+        dataset["sheet_count"] = len(order)
+        dataset["sheets"] = order
+        return dataset
+
+    def scan_sheet_stats(self, path, sheets, progress=None):
+        """
+        ثبت آمار شیت‌هایی که هنوز آمار ندارند: از کش اگر موجود باشد، وگرنه فقط ستون‌های
+        تاریخ و نوع تعمیر شیت‌ها خوانده می‌شوند (بدون ذخیره داده‌ها در کش)
+        """
+        engine = self.settings.get("excel_engine", ENGINE_XLSX)
+        stats = {}
+        tasks = []
+        for sheet in sheets:
+            cached = self.sheet_cache.load(path, sheet) or self.sheet_cache.load(path, sheet, PROJECTED_CACHE_VARIANT)
+            if cached is not None:
+                stats[sheet] = sheet_stats(cached["data"], cached["normalized"])
+            else:
+                tasks.append(sheet)
+        
+        if tasks:
+            usecols = {}
+            for sheet, headers in read_sheet_headers(path, tasks, engine=engine).items():
+                if headers is not None:
+                    columns = detect_column_names(headers)
+                    wanted = {columns["date_col"], columns["repair_col"]} - {None}
+                    usecols[sheet] = [i for i, header in enumerate(headers) if header in wanted] or None
+            results = read_sheet_tasks_parallel([(path, sheet, usecols.get(sheet)) for sheet in tasks],
+                                                progress=progress, engine=engine)
+            for (_, sheet), df in results.items():
+                if df is None:
+                    df = pd.DataFrame()
+                stats[sheet] = sheet_stats(df, normalized_repair_frame(df))
+        self.catalog.update_stats(path, stats)
+
+    def load_sheets_for_range(self, s, e):
+        """
+        بارگذاری خودکار شیت‌هایی از فایل انتخاب شده که بازه تاریخشان با بازه شمسی [s, e] هم‌پوشانی دارد
+        اگر بارگذاری شروع شود True (فیلتر بعد از بارگذاری دوباره اجرا می‌شود)؛
+        اگر شیت‌های لازم همان شیت‌های فعلی باشند یا فایلی انتخاب نشده باشد False
+        """
+        path = self.file_entry.get().strip()
+        if not path or not os.path.exists(path):
+            return False
+        # دیتاست‌های ساخته شده از فایل‌های دیگر (حالت پوشه) دست نمی‌خورند
+        if any(loaded_path != path for loaded_path, _ in self.loaded_sheets):
+            return False
+        try:
+            s_day, e_day = jalali_to_day(s), jalali_to_day(e)
+            overlapping, unknown = self.catalog.sheets_in_range(path, s_day, e_day)
+        except Exception as exc:
+            logging.error(f"Error checking sheet date ranges: {exc}")
+            return False
+        
+        if not unknown:
+            if not overlapping:
+                messagebox.showinfo("اطلاع", f"هیچ شیتی از این فایل در بازه {s} تا {e} داده ندارد.")
+                return True
+            if all((path, sheet) in self.loaded_sheets for sheet in overlapping):
+                return False
+        
+        all_columns = self.settings.get("load_all_columns", False)
+        
+        def work(progress, cancel_event):
+            if unknown:
+                self.scan_sheet_stats(path, unknown, progress)
+            sheets, _ = self.catalog.sheets_in_range(path, s_day, e_day)
+            if not sheets:
+                return {"sheets": []}
+            return self.sheets_dataset(path, sheets, all_columns, progress) or {"sheets": []}
+        
+        def done(dataset):
+            if not dataset["sheets"]:
+                messagebox.showinfo("اطلاع", f"هیچ شیتی از این فایل در بازه {s} تا {e} داده ندارد.")
+                return
+            self.set_dataset(dataset)
+            names = "، ".join(sheet for _, sheet in dataset["sheets"])
+            print(f"📅 شیت‌های بازه {s} تا {e}: {names}")
+            self.apply_simple_filter(load_range=False)
+        
+        self.start_loading(work, done, f"در حال خواندن شیت‌های بازه {s} تا {e}")
+        return True
 
-    def detect_columns(self, df):
+    def read_workbook_sheets(self, keys, all_columns, progress=None):
+        """
+        خواندن شیت‌های یک یا چند فایل: شیت‌های فایل‌های تغییر نکرده از کش و بقیه همزمان
+        در پروسس‌های جداگانه (و ذخیره در کش)
+        keys: لیست (مسیر, شیت)؛ خروجی دو دیکشنری {(مسیر, شیت): df} و {(مسیر, شیت): نوع تعمیر نرمالایز شده}
+        """
+        variant = "" if all_columns else PROJECTED_CACHE_VARIANT
+        frames = {}
+        normalized = {}
+        missing = []
+        for key in keys:
+            cached = self.sheet_cache.load(key[0], key[1], variant)
+            if cached is not None:
+                frames[key] = cached["data"]
+                normalized[key] = cached["normalized"]
+                self.record_sheet_stats(key[0], key[1], frames[key], normalized[key], only_missing=True)
+            else:
+                missing.append(key)
+        
+        # ستون‌های لازم هر شیت از روی هدر آن تشخیص داده می‌شود
+        engine = self.settings.get("excel_engine", ENGINE_XLSX)
+        usecols = {}
+        if missing and not all_columns:
+            for path in dict.fromkeys(path for path, _ in missing):
+                sheets = [sheet for p, sheet in missing if p == path]
+                for sheet, headers in read_sheet_headers(path, sheets, engine=engine).items():
+                    usecols[(path, sheet)] = projected_columns(headers) if headers is not None else None
+        
+        tasks = [(path, sheet, usecols.get((path, sheet))) for path, sheet in missing]
+        results = read_sheet_tasks_parallel(tasks, progress=progress, engine=engine)
+        for (path, sheet), df in results.items():
+            if df is not None:
+                frames[(path, sheet)] = df
+                tail = tail_signature(df, usecols=usecols.get((path, sheet)))
+                normalized[(path, sheet)] = self.store_sheet(path, sheet, df, variant, tail)
+        return frames, normalized
+
+    def load_folder(self):
+        """بارگذاری همه فایل‌های اکسل یک پوشه (مثلاً یک فایل برای هر سال) در یک دیتاست"""
+        folder = filedialog.askdirectory(title="انتخاب پوشه فایل‌های اکسل",
+                                         initialdir=self.settings.get("last_folder") or None)
+        if not folder:
+            return
+        
+        paths = workbook_paths(folder)
+        if not paths:
+            messagebox.showerror("خطا", "هیچ فایل اکسلی در این پوشه پیدا نشد.")
+            return
+        self.settings["last_folder"] = folder
+        save_settings(self.settings)
+        
+        all_columns = self.settings.get("load_all_columns", False)
+        
+        def work(progress, cancel_event):
+            keys = []
+            for path in paths:
+                try:
+                    keys.extend((path, sheet) for sheet in self.catalog.sheet_names(path))
+                except Exception as e:
+                    logging.error(f"Error reading sheet list of {path}: {e}")
+            
+            frames, normalized = self.read_workbook_sheets(keys, all_columns, progress)
+            parts = [(key, frames[key], normalized[key]) for key in keys if key in frames]
+            if not parts:
+                return None
+            
+            df, normalized_df = combine_workbook_frames(parts)
+            dataset = prepare_dataset(df, normalized_df)
+            dataset["file_count"] = len({path for (path, _), _, _ in parts})
+            dataset["sheet_count"] = len(parts)
+            dataset["sheets"] = [key for key, _, _ in parts]
+            return dataset
+        
+        def done(dataset):
+            if dataset is None:
+                messagebox.showerror("خطا", "همه فایل‌های پوشه خالی هستند.")
+                return
+            
+            self.set_dataset(dataset)
+            
+            record_count = len(self.df)
+            file_count = dataset["file_count"]
+            self.status_var.set(f"تعداد {record_count} رکورد از {file_count} فایل ({dataset['sheet_count']} شیت) بارگذاری شد")
+            messagebox.showinfo("موفق", f"اطلاعات {file_count} فایل بارگذاری و نرمالایز شد. ({record_count} رکورد)")
+        
+        self.start_loading(work, done, f"در حال خواندن {len(paths)} فایل پوشه")
+
+    def detect_columns(self, df, columns=None):
         """تشخیص خودکار ستون‌های مهم"""
-        self.repair_col = find_column(df.columns, ["نوع تعمیر", "تعمیر", "repair"])
-        self.part_col = find_column(df.columns, ["قالب / قطعه / دستگاه", "قالب", "part", "device"])
-        self.date_col = find_column(df.columns, ["تاریخ", "date"])
-        self.perf_col = find_column(df.columns, ["مقدار ساعت کار شده", "ساعت", "hour", "time"])
-        self.req_col = find_column(df.columns, ["شماره نامه درخواست", "شماره درخواست", "request"])
-        self.code_col = find_column(df.columns, ["کد قالب", "کد", "code"])
+        if columns is None:
+            columns = detect_column_names(df.columns)
+        for attr, col in columns.items():
+            setattr(self, attr, col)
         
         print(f"🔍 ستون تشخیص داده شده نوع تعمیر: '{self.repair_col}'")
         print(f"🔍 ستون تشخیص داده شده قالب/قطعه/دستگاه: '{self.part_col}'")
@@ -1006,15 +1910,21 @@ class ExcelReportApp:
 
     def populate_comboboxes(self, df):
         """پر کردن کمبوباکس‌ها با مقادیر موجود"""
+        self.distinct_values = self.collect_distinct_values(df)
+        if self.repair_col in df.columns and self.part_col in df.columns:
+            self.repair_parts = AdjacencyIndex(df[self.repair_col], df[self.part_col])
+        else:
+            self.repair_parts = None
+        
         if self.repair_col in df.columns:
-            repair_values = ["(همه)"] + sorted(df[self.repair_col].dropna().astype(str).unique())
+            repair_values = ["(همه)"] + sorted(self.distinct_values["repair"])
             self.repair_cb["values"] = repair_values
             print(f"📝 {len(repair_values)-1} نوع تعمیر (نرمالایز شده) در combobox بارگذاری شد")
         
         if self.part_col in df.columns:
-            part_values = ["(همه)"] + sorted(df[self.part_col].dropna().astype(str).unique())
-            self.part_cb["values"] = part_values
-            print(f"📝 {len(part_values)-1} قالب/قطعه/دستگاه در combobox بارگذاری شد")
+            self.build_part_search()
+            self.update_part_suggestions()
+            print(f"📝 {len(self.distinct_values['part'])} قالب/قطعه/دستگاه در جستجوی تایپی بارگذاری شد")
 
     def set_loading_cursor(self, loading):
         """تنظیم کرسر loading"""
@@ -1022,14 +1932,11 @@ class ExcelReportApp:
         self.root.update()
 
     # -------------------------
-    def apply_simple_filter(self):
-        """اعمال فیلتر ساده بر اساس تاریخ و نوع"""
-        if self.df is None:
-            messagebox.showwarning("هشدار", "ابتدا داده‌ها را بارگذاری کنید.")
-            return
-        
-        df = self.df.copy()
-        
+    def apply_simple_filter(self, load_range=True):
+        """
+        اعمال فیلتر ساده بر اساس تاریخ و نوع
+        load_range: اگر شیت‌های بازه تاریخ در دیتاست فعلی نباشند، ابتدا همان شیت‌ها بارگذاری می‌شوند
+        """
         s = self.start_entry.get().strip()
         e = self.end_entry.get().strip()
         
@@ -1037,36 +1944,56 @@ class ExcelReportApp:
             messagebox.showwarning("هشدار", "هر دو فیلد تاریخ باید پر شوند یا خالی باشند.")
             return
         
+        # فقط شیت‌هایی که بازه تاریخشان با بازه فیلتر هم‌پوشانی دارد بارگذاری می‌شوند
+        if load_range and s and e and self.load_sheets_for_range(s, e):
+            return
+        
+        if self.df is None:
+            messagebox.showwarning("هشدار", "ابتدا داده‌ها را بارگذاری کنید.")
+            return
+        
+        # نوع تعمیر و قالب/قطعه/دستگاه از ایندکس معکوس، تاریخ از ایندکس مرتب شماره روز؛
+        # شرط‌ها در طرح فیلتر جمع و فقط یک بار روی ستون‌های اصلی ارزیابی می‌شوند
+        plan = self.filter_index.plan()
+        
         self.settings["filters"]["start_date"] = s
         self.settings["filters"]["end_date"] = e
         save_settings(self.settings)
 
-        if s and e and self.date_col:
-            try:
-                s_g = JalaliDate.strptime(s, "%Y/%m/%d").to_gregorian()
-                e_g = JalaliDate.strptime(e, "%Y/%m/%d").to_gregorian()
-                df[self.date_col] = pd.to_datetime(df[self.date_col], errors="coerce")
-                df = df[(df[self.date_col] >= s_g) & (df[self.date_col] <= e_g)]
-                self.status_var.set(f"فیلتر تاریخ اعمال شد: {s} تا {e}")
-            except Exception as exc:
-                logging.error(f"Date filter error: {exc}")
-                messagebox.showerror("خطا", "فرمت تاریخ اشتباه است. از فرمت YYYY/MM/DD استفاده کنید.")
-
         rep = self.repair_cb.get()
         if rep and rep != "(همه)" and self.repair_col:
-            mask = self.df_normalized[self.repair_col].astype(str) == rep
-            df = df[mask]
+            plan.values("repair_col", [rep])
             self.settings["filters"]["repair_type"] = rep
 
         part = self.part_cb.get()
         if part and part != "(همه)" and self.part_col:
-            df = df[df[self.part_col].astype(str) == part]
+            # متن تایپ شده (نام ادغام شده، پیشوند، کد قالب یا نام با حروف متفاوت) به یک قالب موجود تبدیل می‌شود
+            if self.part_search is not None:
+                resolved = self.part_search.resolve(PART_ALIASES.resolve(canonical_text(part)),
+                                                    allowed=self.part_allowed)
+                if resolved is None:
+                    messagebox.showwarning("هشدار", f"قالب / قطعه / دستگاهی منطبق با '{part}' پیدا نشد.")
+                    return
+                if resolved != part:
+                    part = resolved
+                    self.part_cb.set(part)
+            plan.values("part_col", [PART_ALIASES.resolve(canonical_text(part))])
             self.settings["filters"]["part_type"] = part
 
         save_settings(self.settings)
 
-        if self.perf_col in df.columns:
-            df[self.perf_col] = pd.to_numeric(df[self.perf_col], errors="coerce").fillna(0)
+        if s and e and self.date_col:
+            try:
+                # برش پیوسته ردیف‌ها از ایندکس مرتب شماره روز (دو جستجوی دودویی)
+                plan.days(jalali_to_day(s), jalali_to_day(e))
+                self.status_var.set(f"فیلتر تاریخ اعمال شد: {s} تا {e}")
+            except Exception as exc:
+                logging.error(f"Date filter error: {exc}")
+                messagebox.showerror("خطا", "فرمت تاریخ اشتباه است. از فرمت YYYY/MM/DD استفاده کنید.")
+
+        # تنها DataFrame ساخته شده در کل فیلتر (یا نتیجه همین فیلتر از کش)؛
+        # ستون ساعت فقط روی همین ردیف‌ها پر می‌شود
+        df = self.filtered_frame(plan, fill_hours=True)
 
         self.df_filtered = df
         self.update_treeview(df)
@@ -1074,6 +2001,43 @@ class ExcelReportApp:
         filtered_count = len(df)
         self.status_var.set(f"فیلتر اعمال شد. {filtered_count} رکورد نمایش داده می‌شود")
 
+    def filtered_frame(self, plan, fill_hours=False):
+        """ردیف‌های طرح فیلتر از کش نتایج، یا materialise کردن طرح و نگه داشتن نتیجه"""
+        key = (self.dataset_version, plan.key, fill_hours)
+        cached = self.filter_cache.get(key)
+        if cached is not None:
+            df, rows = cached
+            plan.use_rows(rows)
+        else:
+            # فیلتر محدودتر از فیلتر قبلی: فقط شرط‌های جدید روی ردیف‌های نتیجه قبلی بررسی می‌شوند
+            plan.refine(self.filter_plan)
+            df = plan.take(self.df)
+            if fill_hours and self.perf_col in df.columns:
+                df[self.perf_col] = df[self.perf_col].fillna(0)
+            rows = plan.rows()
+            self.filter_cache.put(key, (df, rows), frame_nbytes(df) + rows.nbytes)
+        self.filter_plan = plan
+        return df
+
+    def bump_dataset_version(self):
+        """تغییر دیتاست: نتایج قبلی فیلتر دیگر معتبر نیستند"""
+        self.dataset_version += 1
+        self.filter_cache.clear()
+        self.filter_plan = None
+
+    def show_filter_cache_stats(self):
+        """نمایش آمار کش نتایج فیلتر (و امکان خالی کردن آن)"""
+        stats = self.filter_cache.stats()
+        info_msg = (f"تعداد نتایج نگه داشته شده: {stats['entries']}\n"
+                    f"حافظه: {stats['mb']:.1f} از {stats['max_mb']:.0f} MB\n"
+                    f"hit: {stats['hits']} | miss: {stats['misses']} | نرخ hit: {stats['hit_rate']:.0%}\n"
+                    f"نسخه دیتاست: {self.dataset_version}\n\n"
+                    "کش خالی شود؟")
+        print(f"📊 کش فیلتر: {stats}")
+        if messagebox.askyesno("آمار کش فیلتر", info_msg):
+            self.filter_cache.clear()
+            self.status_var.set("کش نتایج فیلتر خالی شد")
+
     # -------------------------
     def save_output(self, df):
         """ذخیره خروجی در فرمت‌های مختلف"""
@@ -1122,6 +2086,9 @@ class ExcelReportApp:
                 df_to_save = df_to_save.rename(columns=column_mapping)
             else:
                 df_to_save = df
+                # ساعت float32 با همان مقدار اعشاری ورودی در فایل نوشته شود
+                if self.perf_col in df_to_save.columns:
+                    df_to_save = df_to_save.assign(**{self.perf_col: decimal_hours(df_to_save[self.perf_col])})
         
             if path.endswith(".xlsx"):
                 self.save_excel(df_to_save, path)
@@ -1165,7 +2132,7 @@ class ExcelReportApp:
         if self.perf_col in df.columns:
             total_row = len(df) + 2
             ws.cell(row=total_row, column=1, value="جمع کل")
-            ws.cell(row=total_row, column=df.columns.get_loc(self.perf_col) + 1, value=df[self.perf_col].sum())
+            ws.cell(row=total_row, column=df.columns.get_loc(self.perf_col) + 1, value=round(df[self.perf_col].sum(), HOURS_DECIMALS))
             
             for col in range(1, len(df.columns) + 1):
                 cell = ws.cell(row=total_row, column=col)
@@ -1184,7 +2151,7 @@ class ExcelReportApp:
         df_out = df.copy()
         if self.perf_col in df_out.columns:
             total_row = {col: "" for col in df_out.columns}
-            total_row[self.perf_col] = df_out[self.perf_col].sum()
+            total_row[self.perf_col] = round(df_out[self.perf_col].sum(), HOURS_DECIMALS)
             total_row[df_out.columns[0]] = "جمع کل"
             df_out = pd.concat([df_out, pd.DataFrame([total_row])], ignore_index=True)
         
@@ -1289,6 +2256,7 @@ class ExcelReportApp:
     def on_close(self):
         """ذخیره تنظیمات هنگام بسته شدن برنامه"""
         try:
+            self.cancel_loading()
             self.settings["window_size"] = self.root.geometry()
             save_settings(self.settings)
             self.status_var.set("برنامه بسته شد")
@@ -1299,6 +2267,8 @@ class ExcelReportApp:
 
 # -----------------------------
 if __name__ == "__main__":
+    # لازم برای ProcessPoolExecutor در نسخه exe ویندوز
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = ExcelReportApp(root)
     root.mainloop()
\ No newline at end of file
@@ -17,10 +17,12 @@ if __name__ == "__main__":
     main()
     # core/excel_processor.py
 import pandas as pd
-from openpyxl import load_workbook
 import logging
 from typing import Optional, List, Dict, Any
 from utils.helpers import find_column, normalize_repair_type
+from excel_stream import read_sheet
+from filter_index import FilterIndex
+from jalali_dates import day_to_jalali, to_day_ordinals
 
 class ExcelProcessor:
     """کلاس اصلی برای پردازش فایل‌های اکسل"""
@@ -29,20 +31,16 @@ class ExcelProcessor:
         self.df: Optional[pd.DataFrame] = None
         self.df_normalized: Optional[pd.DataFrame] = None
         self.column_mapping: Dict[str, str] = {}
+        self.filter_index: Optional[FilterIndex] = None
         
     def load_excel(self, file_path: str, sheet_name: str) -> bool:
         """بارگذاری فایل اکسل"""
         try:
-            # استفاده از context manager برای مدیریت حافظه
-            with load_workbook(file_path, read_only=True, data_only=True) as wb:
-                ws = wb[sheet_name]
-                data = list(ws.values)
+            # خواندن جریانی ستون‌ها بدون ساختن لیست کامل ردیف‌ها
+            self.df = read_sheet(file_path, sheet_name)
             
-            if not data:
+            if self.df is None:
                 return False
-                
-            headers = [str(cell).strip() if cell else "" for cell in data[0]]
-            self.df = pd.DataFrame(data[1:], columns=headers)
             
             # تشخیص خودکار ستون‌ها
             self._auto_detect_columns()
@@ -50,6 +48,9 @@ class ExcelProcessor:
             # ایجاد نسخه نرمالایز شده
             self._create_normalized_data()
             
+            # ایندکس ستون‌های فیلتر و ردیف‌های مرتب بر اساس شماره روز (یک بار هنگام بارگذاری)
+            self._create_filter_index()
+            
             return True
             
         except Exception as e:
@@ -87,6 +88,22 @@ class ExcelProcessor:
                 lambda x: normalize_repair_type(x) if pd.notna(x) else x
             )
     
+    def _create_filter_index(self) -> None:
+        """ساخت ایندکس ستون‌های فیلتر (روی df_normalized) و ایندکس مرتب تاریخ"""
+        if self.df_normalized is None:
+            self.filter_index = None
+            return
+        date_col = self.column_mapping.get('date_col')
+        days = to_day_ordinals(self.df[date_col]) if date_col and date_col in self.df.columns else None
+        self.filter_index = FilterIndex(self.df_normalized, self.column_mapping, days=days)
+    
+    def get_date_range(self) -> Optional[tuple]:
+        """کمترین و بیشترین تاریخ شمسی داده‌ها (برای راهنمای فیلدهای تاریخ)"""
+        dates = self.filter_index.dates if self.filter_index is not None else None
+        if dates is None or dates.min_day is None:
+            return None
+        return day_to_jalali(dates.min_day), day_to_jalali(dates.max_day)
+    
     def get_column_values(self, column_type: str, normalized: bool = False) -> List[str]:
         """دریافت مقادیر منحصر به فرد یک ستون"""
         df_source = self.df_normalized if normalized else self.df
@@ -114,49 +131,73 @@ class ExcelProcessor:
         """پاکسازی داده‌ها برای آزادسازی حافظه"""
         self.df = None
         self.df_normalized = None
+        self.filter_index = None
         self.column_mapping.clear()
         
         import gc
         gc.collect()
         # core/data_filter.py
 import pandas as pd
-from persiantools.jdatetime import JalaliDate
 from typing import Optional, List, Dict, Any
 import logging
+from jalali_dates import jalali_to_day
+from filter_index import FilterPlan
 
 class DataFilter:
-    """کلاس برای فیلتر کردن داده‌ها"""
+    """
+    کلاس برای فیلتر کردن داده‌ها
+    هر apply_* فقط یک شرط به طرح فیلتر (FilterPlan) اضافه می‌کند؛ filtered_data
+    یک بار و فقط هنگام نیاز از DataFrame اصلی ساخته می‌شود
+    """
     
     def __init__(self, excel_processor):
         self.excel_processor = excel_processor
-        self.filtered_data: Optional[pd.DataFrame] = None
+        self.plan: Optional[FilterPlan] = None
+        self._filtered_data: Optional[pd.DataFrame] = None
+    
+    def _current_plan(self) -> Optional[FilterPlan]:
+        """طرح فیلتر فعلی (با اولین شرط ساخته می‌شود)"""
+        if self.plan is None and self.excel_processor.filter_index is not None:
+            self.plan = self.excel_processor.filter_index.plan()
+        self._filtered_data = None
+        return self.plan
+    
+    @property
+    def filtered_data(self) -> Optional[pd.DataFrame]:
+        """
+        ردیف‌های فیلتر شده از DataFrame اصلی (ستون ساعت عددی)؛ نوع تعمیر و قالب/قطعه/دستگاه
+        از df_normalized برداشته می‌شوند تا گروه‌بندی روی مقادیر نرمالایز شده باشد
+        """
+        if self.plan is None or self.excel_processor.df is None:
+            return None
+        if self._filtered_data is None:
+            df = self.plan.take(self.excel_processor.df)
+            normalized = self.excel_processor.df_normalized
+            if normalized is not None:
+                rows = self.plan.rows()
+                for col_type in ('repair_col', 'part_col'):
+                    col = self.excel_processor.column_mapping.get(col_type)
+                    if col and col in normalized.columns:
+                        df[col] = normalized[col].to_numpy()[rows]
+            perf_col = self.excel_processor.column_mapping.get('perf_col')
+            if perf_col and perf_col in df.columns:
+                df[perf_col] = pd.to_numeric(df[perf_col], errors='coerce')
+            self._filtered_data = df
+        return self._filtered_data
         
     def apply_date_filter(self, start_date: str, end_date: str) -> bool:
         """اعمال فیلتر تاریخ"""
         try:
             if self.excel_processor.df is None:
                 return False
-                
-            date_col = self.excel_processor.column_mapping.get('date_col')
-            if not date_col:
-                return False
-            
-            # تبدیل تاریخ‌های شمسی به میلادی
-            start_gregorian = JalaliDate.strptime(start_date, "%Y/%m/%d").to_gregorian()
-            end_gregorian = JalaliDate.strptime(end_date, "%Y/%m/%d").to_gregorian()
-            
-            # تبدیل ستون تاریخ به datetime
-            self.excel_processor.df[date_col] = pd.to_datetime(
-                self.excel_processor.df[date_col], errors='coerce'
-            )
             
-            # اعمال فیلتر
-            mask = (
-                (self.excel_processor.df[date_col] >= start_gregorian) & 
-                (self.excel_processor.df[date_col] <= end_gregorian)
-            )
+            filter_index = self.excel_processor.filter_index
+            if filter_index is None or filter_index.dates is None:
+                return False
             
-            self.filtered_data = self.excel_processor.df[mask].copy()
+            # بازه شمسی به شماره روز؛ برش ردیف‌ها با دو جستجوی دودویی روی ایندکس مرتب تاریخ
+            start_day, end_day = jalali_to_day(start_date), jalali_to_day(end_date)
+            self._current_plan().days(start_day, end_day)
             return True
             
         except Exception as e:
@@ -173,10 +214,7 @@ class DataFilter:
             if not repair_col:
                 return False
             
-            source_df = self.filtered_data if self.filtered_data is not None else self.excel_processor.df_normalized
-            
-            mask = source_df[repair_col].astype(str).isin(repair_types)
-            self.filtered_data = source_df[mask].copy()
+            self._current_plan().values('repair_col', repair_types)
             return True
             
         except Exception as e:
@@ -187,22 +225,12 @@ class DataFilter:
         """اعمال فیلتر بازه ساعتی"""
         try:
             perf_col = self.excel_processor.column_mapping.get('perf_col')
-            if not perf_col:
+            if not perf_col or self.excel_processor.df is None:
                 return False
             
-            source_df = self.filtered_data if self.filtered_data is not None else self.excel_processor.df
-            
-            # تبدیل به عدد
-            source_df[perf_col] = pd.to_numeric(source_df[perf_col], errors='coerce')
-            
-            mask = pd.Series(True, index=source_df.index)
-            
-            if min_hours is not None:
-                mask &= (source_df[perf_col] >= min_hours)
-            if max_hours is not None:
-                mask &= (source_df[perf_col] <= max_hours)
-            
-            self.filtered_data = source_df[mask].copy()
+            # تبدیل به عدد فقط روی آرایه مقایسه (DataFrame اصلی دست نمی‌خورد)
+            hours = pd.to_numeric(self.excel_processor.df[perf_col], errors='coerce').to_numpy()
+            self._current_plan().between(hours, min_hours, max_hours)
             return True
             
         except Exception as e:
@@ -241,7 +269,8 @@ class DataFilter:
     
     def clear_filters(self) -> None:
         """پاک کردن فیلترها"""
-        self.filtered_data = None
+        self.plan = None
+        self._filtered_data = None
         # core/report_generator.py
 import pandas as pd
 from openpyxl import Workbook
@@ -357,11 +386,11 @@ class ReportGenerator:
             return False
         # utils/helpers.py
 import os
-import re
 import pandas as pd
 from typing import List, Optional
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
+from repair_rules import RepairRuleEngine
 
 def find_column(columns: List[str], possible_names: List[str]) -> Optional[str]:
     """پیدا کردن ستون بر اساس نام‌های احتمالی"""
@@ -371,32 +400,13 @@ def find_column(columns: List[str], possible_names: List[str]) -> Optional[str]:
                 return col
     return None
 
+# قواعد مرتب نرمالایز نوع تعمیر از کلید repair_rules در settings.json
+REPAIR_RULES = RepairRuleEngine.from_settings(
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "settings.json"))
+
 def normalize_repair_type(repair_type: str) -> str:
     """نرمال‌سازی نوع تعمیر"""
-    if not isinstance(repair_type, str):
-        return str(repair_type)
-    
-    repair_type = repair_type.strip()
-    repair_type = re.sub(r'[:]', '', repair_type)
-    repair_type = re.sub(r'\s+', ' ', repair_type)
-    
-    # منطق نرمال‌سازی
-    patterns = {
-        'قالب تعمیری': ['قالب.*تعمیر', 'تعمیر.*قالب'],
-        'قطعه تعمیری': ['قطعه.*تعمیر', 'تعمیر.*قطعه'],
-        'دستگاه تعمیری': ['دستگاه.*تعمیر', 'تعمیر.*دستگاه'],
-        'قالب': ['قالب'],
-        'قطعه': ['قطعه'],
-        'دستگاه': ['دستگاه'],
-        'تعمیری': ['تعمیر']
-    }
-    
-    for normalized_name, pattern_list in patterns.items():
-        for pattern in pattern_list:
-            if re.search(pattern, repair_type, re.IGNORECASE):
-                return normalized_name
-    
-    return repair_type
+    return REPAIR_RULES(repair_type)
 
 def register_persian_fonts() -> str:
     """ثبت فونت‌های فارسی"""
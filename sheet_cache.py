@@ -0,0 +1,178 @@
+# sheet_cache.py
+# -*- coding: utf-8 -*-
+"""
+کش ستونی شیت‌های خوانده‌شده روی دیسک
+
+هر شیت پس از پاک‌سازی هدرها و نرمالایز نوع تعمیر، ستون به ستون در قالب
+فایل‌های .npy ذخیره می‌شود تا بارگذاری بعدی با memory-map و بدون openpyxl
+انجام شود. کلید کش مسیر فایل + نام شیت است و اندازه و زمان تغییر فایل در
+meta.json نگه داشته می‌شود؛ اگر هر کدام تغییر کند مدخل دیگر معتبر نیست ولی
+تا ذخیره بعدی برای بارگذاری افزایشی (load_stale) باقی می‌ماند.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+
+import numpy as np
+import pandas as pd
+
+CACHE_FORMAT_VERSION = 1
+
+
+def file_fingerprint(path):
+    """اثر انگشت فایل: مسیر مطلق، اندازه و زمان آخرین تغییر"""
+    st = os.stat(path)
+    return {
+        "path": os.path.abspath(path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+    }
+
+
+class SheetCache:
+    """کش ستونی شیت‌ها در یک پوشه روی دیسک"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    # -------------------------
+    def _entry_dir(self, path, sheet, variant=""):
+        raw = f"{os.path.abspath(path)}|{sheet}|{variant}".encode("utf-8")
+        return os.path.join(self.cache_dir, hashlib.sha1(raw).hexdigest()[:20])
+
+    def invalidate(self, path, sheet, variant=""):
+        """حذف مدخل کش یک شیت"""
+        entry = self._entry_dir(path, sheet, variant)
+        if os.path.isdir(entry):
+            shutil.rmtree(entry, ignore_errors=True)
+
+    def load(self, path, sheet, variant="", with_extra=False):
+        """
+        خواندن فریم‌های ذخیره‌شده یک شیت؛ اگر مدخل وجود نداشته باشد یا فایل
+        اکسل از زمان ذخیره تغییر کرده باشد None برمی‌گرداند
+        با with_extra=True خروجی (فریم‌ها، extra ذخیره شده) است
+        """
+        result = self._load_entry(path, sheet, variant, stale=False)
+        if result is None or with_extra:
+            return result
+        return result[0]
+
+    def load_stale(self, path, sheet, variant=""):
+        """
+        خواندن آخرین مدخل ذخیره شده حتی اگر فایل اکسل تغییر کرده باشد
+        خروجی (فریم‌ها، extra ذخیره شده) یا None
+        """
+        return self._load_entry(path, sheet, variant, stale=True)
+
+    def _load_entry(self, path, sheet, variant, stale):
+        entry = self._entry_dir(path, sheet, variant)
+        meta_path = os.path.join(entry, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+
+            if meta.get("version") != CACHE_FORMAT_VERSION or meta.get("sheet") != sheet:
+                self.invalidate(path, sheet, variant)
+                return None
+            if not stale and meta.get("fingerprint") != file_fingerprint(path):
+                return None
+
+            frames = {}
+            for frame_name, frame_meta in meta["frames"].items():
+                # ستون‌ها با شماره ساخته می‌شوند تا نام‌های تکراری (مثلاً هدرهای خالی) از دست نروند
+                data = {i: _read_column(entry, c) for i, c in enumerate(frame_meta["columns"])}
+                df = pd.DataFrame(data)
+                df.columns = [c["name"] for c in frame_meta["columns"]]
+                frames[frame_name] = df
+            return frames, meta.get("extra")
+        except Exception as e:
+            logging.error(f"Error reading sheet cache for {path} [{sheet}]: {e}")
+            self.invalidate(path, sheet, variant)
+            return None
+
+    def store(self, path, sheet, frames, variant="", extra=None):
+        """
+        ذخیره دیکشنری {نام: DataFrame} برای یک شیت
+        extra: اطلاعات اضافی قابل JSON (مثلاً وضعیت انتهای شیت برای بارگذاری افزایشی)
+        """
+        entry = self._entry_dir(path, sheet, variant)
+        tmp_entry = entry + ".tmp"
+        try:
+            fp = file_fingerprint(path)
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            os.makedirs(tmp_entry, exist_ok=True)
+
+            meta = {
+                "version": CACHE_FORMAT_VERSION,
+                "sheet": sheet,
+                "fingerprint": fp,
+                "frames": {},
+                "extra": extra,
+            }
+            for frame_name, df in frames.items():
+                columns = []
+                for i, col in enumerate(df.columns):
+                    stem = f"{frame_name}_{i}"
+                    columns.append(_write_column(tmp_entry, stem, col, df.iloc[:, i]))
+                meta["frames"][frame_name] = {"columns": columns}
+
+            with open(os.path.join(tmp_entry, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp_entry, entry)
+            return True
+        except Exception as e:
+            logging.error(f"Error writing sheet cache for {path} [{sheet}]: {e}")
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            return False
+
+
+# -----------------------------
+def _write_column(entry, stem, name, series):
+    """نوشتن یک ستون: عددی مستقیم، تاریخ به صورت int64، بقیه دیکشنری‌کد شده"""
+    values = series.to_numpy()
+    col_meta = {"name": name}
+
+    if values.dtype.kind in "biuf":
+        np.save(os.path.join(entry, stem + ".npy"), values)
+        col_meta["kind"] = "numeric"
+    elif values.dtype.kind == "M":
+        np.save(os.path.join(entry, stem + ".npy"), values.astype("datetime64[ns]").view("int64"))
+        col_meta["kind"] = "datetime"
+    else:
+        codes, uniques = pd.factorize(series.astype(object), use_na_sentinel=True)
+        np.save(os.path.join(entry, stem + ".npy"), codes.astype(np.int32))
+        uniques = np.asarray(uniques, dtype=object)
+        if all(isinstance(v, str) for v in uniques):
+            # رشته‌ها بدون pickle ذخیره می‌شوند
+            np.save(os.path.join(entry, stem + "_dict.npy"), uniques.astype(str))
+            col_meta["kind"] = "dict_str"
+        else:
+            np.save(os.path.join(entry, stem + "_dict.npy"), uniques, allow_pickle=True)
+            col_meta["kind"] = "dict_obj"
+    col_meta["file"] = stem
+    return col_meta
+
+
+def _read_column(entry, col_meta):
+    """خواندن یک ستون با memory-map"""
+    base = os.path.join(entry, col_meta["file"])
+    kind = col_meta["kind"]
+    if kind == "numeric":
+        return np.load(base + ".npy", mmap_mode="r")
+    if kind == "datetime":
+        return np.load(base + ".npy", mmap_mode="r").view("datetime64[ns]")
+
+    codes = np.load(base + ".npy", mmap_mode="r")
+    uniques = np.load(base + "_dict.npy", allow_pickle=(kind == "dict_obj"))
+    # خانه اول برای مقادیر خالی (کد -1)
+    lookup = np.empty(len(uniques) + 1, dtype=object)
+    lookup[0] = None
+    lookup[1:] = uniques.astype(object)
+    return lookup[np.asarray(codes) + 1]
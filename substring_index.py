@@ -0,0 +1,68 @@
+# substring_index.py
+# -*- coding: utf-8 -*-
+"""
+ایندکس سه‌حرفی (trigram) برای جستجوی زیررشته در ستون‌های متنی
+
+مقادیر ستون یک بار factorize می‌شوند (کد هر ردیف + لیست مقادیر یکتا) و برای هر
+سه‌حرفی، شماره مقادیر یکتایی که آن را دارند نگه داشته می‌شود. جستجوی یک عبارت با
+اشتراک لیست سه‌حرفی‌های آن، مقادیر کاندید را پیدا می‌کند و فقط همان‌ها با «in»
+بررسی دقیق می‌شوند؛ ماسک ردیف‌ها در پایان با یک lookup روی کدها ساخته می‌شود.
+عبارت‌های کوتاه‌تر از سه حرف و حالت regex روی مقادیر یکتا (نه همه ردیف‌ها) بررسی می‌شوند.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+GRAM = 3
+
+
+def grams(text):
+    """مجموعه سه‌حرفی‌های متن"""
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+class TrigramIndex:
+    """ایندکس زیررشته یک ستون (مقادیر خالی با هیچ عبارتی تطبیق نمی‌کنند)"""
+
+    def __init__(self, series):
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        self.codes = codes.astype(np.int32)
+        self.values = [str(value) for value in uniques]
+        postings = {}
+        for i, value in enumerate(self.values):
+            for gram in grams(value):
+                postings.setdefault(gram, []).append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def candidates(self, text):
+        """شماره مقادیر یکتایی که همه سه‌حرفی‌های text را دارند"""
+        if len(text) < GRAM:
+            return range(len(self.values))
+        lists = []
+        for gram in grams(text):
+            ids = self.postings.get(gram)
+            if ids is None:
+                return ()
+            lists.append(ids)
+        lists.sort(key=len)
+        ids = lists[0]
+        for other in lists[1:]:
+            ids = np.intersect1d(ids, other, assume_unique=True)
+            if not len(ids):
+                break
+        return ids
+
+    def matches(self, text, literal=True):
+        """شماره مقادیر یکتایی که text را دارند (literal=False: text یک الگوی regex است)"""
+        if literal:
+            return [i for i in self.candidates(text) if text in self.values[i]]
+        pattern = re.compile(text)
+        return [i for i, value in enumerate(self.values) if pattern.search(value)]
+
+    def mask(self, text, literal=True):
+        """ماسک بولی ردیف‌هایی که مقدارشان text را دارد"""
+        hit = np.zeros(len(self.values) + 1, dtype=bool)
+        hit[np.asarray(self.matches(text, literal), dtype=np.int64) + 1] = True
+        return hit[self.codes + 1]
@@ -0,0 +1,130 @@
+# workbook_catalog.py
+# -*- coding: utf-8 -*-
+"""
+فهرست سبک شیت‌های یک فایل اکسل
+
+نام شیت‌ها از xl/workbook.xml و تعداد تقریبی ردیف‌ها از المان dimension ابتدای
+XML هر شیت خوانده می‌شود؛ بدون باز کردن کامل فایل با openpyxl یا pandas.
+نتیجه بر اساس اثر انگشت فایل (مسیر، اندازه، زمان تغییر) در یک فایل JSON
+نگه داشته می‌شود تا باز کردن دوباره همان فایل فوری باشد.
+
+آمار هر شیت (تعداد دقیق ردیف، کمترین و بیشترین تاریخ، انواع تعمیر) بعد از اولین
+خواندن داده‌های شیت ثبت می‌شود تا فیلتر تاریخ فقط شیت‌های هم‌پوشان با بازه را باز کند.
+با تغییر فایل، مدخل آن (و آمار شیت‌ها) از نو ساخته می‌شود.
+"""
+
+import os
+import json
+import logging
+import threading
+
+from openpyxl import load_workbook
+
+from sheet_cache import file_fingerprint
+from xlsx_reader import XlsxWorkbook
+
+
+class WorkbookCatalog:
+    """کش فهرست شیت‌ها به ازای هر فایل"""
+
+    def __init__(self, catalog_path):
+        self.catalog_path = catalog_path
+        self._entries = None
+        self._lock = threading.Lock()
+
+    # -------------------------
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        if os.path.exists(self.catalog_path):
+            try:
+                with open(self.catalog_path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except Exception as e:
+                logging.error(f"Error loading workbook catalog: {e}")
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.catalog_path) or ".", exist_ok=True)
+            tmp_path = self.catalog_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.catalog_path)
+        except Exception as e:
+            logging.error(f"Error saving workbook catalog: {e}")
+
+    # -------------------------
+    def get(self, path):
+        """
+        مدخل فهرست یک فایل: {"fingerprint": ..., "sheets": [{"name": ..., "rows": ...}, ...]}
+        rows تعداد ردیف‌های داده (بدون هدر) یا None اگر dimension ثبت نشده باشد
+        """
+        fp = file_fingerprint(path)
+        with self._lock:
+            self._load()
+            entry = self._entries.get(fp["path"])
+            if entry is not None and entry.get("fingerprint") == fp:
+                return entry
+
+            entry = {"fingerprint": fp, "sheets": _scan_sheets(path)}
+            self._entries[fp["path"]] = entry
+            self._save()
+            return entry
+
+    def sheet_names(self, path):
+        return [s["name"] for s in self.get(path)["sheets"]]
+
+    def sheet_rows(self, path):
+        """{نام شیت: تعداد تقریبی ردیف}"""
+        return {s["name"]: s["rows"] for s in self.get(path)["sheets"]}
+
+    def sheet_stats(self, path):
+        """{نام شیت: آمار ثبت شده یا None}"""
+        return {s["name"]: s.get("stats") for s in self.get(path)["sheets"]}
+
+    def update_stats(self, path, stats_by_sheet):
+        """ثبت آمار چند شیت ({نام شیت: آمار}) برای نسخه فعلی فایل"""
+        entry = self.get(path)
+        with self._lock:
+            changed = False
+            for sheet in entry["sheets"]:
+                stats = stats_by_sheet.get(sheet["name"])
+                if stats is not None and sheet.get("stats") != stats:
+                    sheet["stats"] = stats
+                    changed = True
+            if changed:
+                self._save()
+
+    def sheets_in_range(self, path, start_day, end_day):
+        """
+        شیت‌هایی که بازه تاریخ آن‌ها با [start_day, end_day] (شماره روز) هم‌پوشانی دارد
+        خروجی (شیت‌های هم‌پوشان, شیت‌های بدون آمار) به ترتیب فایل
+        """
+        overlapping, unknown = [], []
+        for name, stats in self.sheet_stats(path).items():
+            if stats is None:
+                unknown.append(name)
+            elif stats["min_day"] is not None and stats["min_day"] <= end_day and stats["max_day"] >= start_day:
+                overlapping.append(name)
+        return overlapping, unknown
+
+
+def _scan_sheets(path):
+    """خواندن نام شیت‌ها و dimension هر شیت"""
+    try:
+        with XlsxWorkbook(path) as wb:
+            sheets = []
+            for name in wb.sheetnames:
+                dimension = wb.sheet_dimension(name)
+                rows = max(dimension[0] - 1, 0) if dimension else None
+                sheets.append({"name": name, "rows": rows})
+            return sheets
+    except Exception as e:
+        # فایل‌هایی که zip استاندارد xlsx نیستند با openpyxl خوانده می‌شوند
+        logging.error(f"Fast catalog scan failed for {path}: {e}")
+        wb = load_workbook(path, read_only=True)
+        try:
+            return [{"name": name, "rows": None} for name in wb.sheetnames]
+        finally:
+            wb.close()
@@ -0,0 +1,381 @@
+# xlsx_reader.py
+# -*- coding: utf-8 -*-
+"""
+خواننده مستقیم و سریع فایل xlsx بدون ساختن اشیای Cell در openpyxl
+
+فایل xlsx یک zip است: sharedStrings.xml فقط یک بار خوانده و به جدول رشته‌ها
+تبدیل می‌شود (هر رشته تکراری مثل نوع تعمیر یا نام قطعه در تمام سلول‌ها همان
+شیء پایتون است) و XML شیت با parser رویدادمحور expat به صورت جریانی پیمایش
+می‌شود. اگر usecols داده شود فقط مقدار همان ستون‌ها ساخته می‌شود.
+خروجی iter_sheet_rows مانند ws.iter_rows(values_only=True) در openpyxl است.
+"""
+
+import re
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+from xml.parsers import expat
+
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils.datetime import from_excel, from_ISO8601, WINDOWS_EPOCH, MAC_EPOCH
+
+NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+READ_BLOCK = 1 << 16
+_CELL_REF = re.compile(r"([A-Z]+)(\d*)")
+_ROW_TAG = re.compile(rb"<(?:\w+:)?row\b([^>]*)>")
+_ROW_NUM = re.compile(rb'\sr="(\d+)"')
+_ROW_END = re.compile(rb"</(?:\w+:)?row>")
+_SHEET_DATA_END = re.compile(rb"</(?:\w+:)?sheetData>")
+
+
+def column_index(letters):
+    """تبدیل حروف ستون (A, B, ..., AA) به اندیس صفرمبنا"""
+    index = 0
+    for ch in letters:
+        index = index * 26 + (ord(ch) - 64)
+    return index - 1
+
+
+class XlsxWorkbook:
+    """باز کردن zip فایل و خواندن فهرست شیت‌ها، رشته‌های مشترک و استایل‌های تاریخ"""
+
+    def __init__(self, path):
+        self.path = path
+        self.zip = zipfile.ZipFile(path)
+        self.sheet_paths = {}
+        self.epoch = WINDOWS_EPOCH
+        self._shared_strings = None
+        self._date_styles = None
+        self._read_workbook()
+
+    def close(self):
+        self.zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -------------------------
+    @property
+    def sheetnames(self):
+        return list(self.sheet_paths)
+
+    def _read_workbook(self):
+        rels = {}
+        with self.zip.open("xl/_rels/workbook.xml.rels") as f:
+            for rel in ET.parse(f).getroot().iter(NS_PKG_REL + "Relationship"):
+                target = rel.get("Target", "")
+                if target.startswith("/"):
+                    target = target[1:]
+                else:
+                    target = posixpath.normpath(posixpath.join("xl", target))
+                rels[rel.get("Id")] = target
+
+        with self.zip.open("xl/workbook.xml") as f:
+            root = ET.parse(f).getroot()
+        pr = root.find(NS_MAIN + "workbookPr")
+        if pr is not None and pr.get("date1904") in ("1", "true"):
+            self.epoch = MAC_EPOCH
+        for sheet in root.iter(NS_MAIN + "sheet"):
+            self.sheet_paths[sheet.get("name")] = rels.get(sheet.get(NS_REL + "id"))
+
+    @property
+    def shared_strings(self):
+        """جدول رشته‌های مشترک؛ فقط یک بار از فایل خوانده می‌شود"""
+        if self._shared_strings is None:
+            strings = []
+            if "xl/sharedStrings.xml" in self.zip.namelist():
+                with self.zip.open("xl/sharedStrings.xml") as f:
+                    for _, elem in ET.iterparse(f):
+                        if elem.tag == NS_MAIN + "si":
+                            strings.append(_rich_text(elem))
+                            elem.clear()
+            self._shared_strings = strings
+        return self._shared_strings
+
+    @property
+    def date_styles(self):
+        """{اندیس استایل: 'date' یا 'timedelta'} برای سلول‌های عددی با قالب تاریخ/زمان"""
+        if self._date_styles is None:
+            styles = {}
+            if "xl/styles.xml" in self.zip.namelist():
+                with self.zip.open("xl/styles.xml") as f:
+                    root = ET.parse(f).getroot()
+                formats = dict(BUILTIN_FORMATS)
+                num_fmts = root.find(NS_MAIN + "numFmts")
+                if num_fmts is not None:
+                    for fmt in num_fmts.iter(NS_MAIN + "numFmt"):
+                        formats[int(fmt.get("numFmtId"))] = fmt.get("formatCode", "")
+                cell_xfs = root.find(NS_MAIN + "cellXfs")
+                if cell_xfs is not None:
+                    for i, xf in enumerate(cell_xfs.iter(NS_MAIN + "xf")):
+                        code = formats.get(int(xf.get("numFmtId", 0)), "")
+                        if is_timedelta_format(code):
+                            styles[str(i)] = "timedelta"
+                        elif is_date_format(code):
+                            styles[str(i)] = "date"
+            self._date_styles = styles
+        return self._date_styles
+
+    def sheet_dimension(self, sheet):
+        """
+        محدوده ثبت شده در المان dimension شیت به صورت (تعداد ردیف، تعداد ستون)
+        فقط ابتدای XML خوانده می‌شود؛ اگر dimension نباشد None
+        """
+        with self.zip.open(self.sheet_paths[sheet]) as f:
+            head = f.read(4096).decode("utf-8", "ignore")
+        m = re.search(r'<(?:\w+:)?dimension\s+ref="([^"]+)"', head)
+        if not m:
+            return None
+        last = m.group(1).split(":")[-1]
+        ref = _CELL_REF.match(last)
+        if not ref or not ref.group(2):
+            return None
+        return int(ref.group(2)), column_index(ref.group(1)) + 1
+
+    def iter_rows(self, sheet, usecols=None, skip_rows=0, stats=None):
+        """
+        پیمایش جریانی ردیف‌های یک شیت
+        مانند openpyxl ردیف‌ها تا عرض ثبت شده در dimension با None پر می‌شوند
+        skip_rows: تعداد ردیف‌های بعد از ردیف اول (هدر) که بدون تبدیل سلول‌ها رد می‌شوند
+        stats: دیکشنری اختیاری؛ تعداد سلول‌های خارج از usecols در skipped_cells نوشته می‌شود
+        """
+        dimension = self.sheet_dimension(sheet)
+        width = dimension[1] if dimension else 0
+        reader = _SheetReader(self.shared_strings, self.date_styles, self.epoch, usecols, width, skip_rows)
+        with self.zip.open(self.sheet_paths[sheet]) as f:
+            yield from reader.rows(f)
+        if stats is not None:
+            stats["skipped_cells"] = reader.skipped_cells
+
+
+def _rich_text(si):
+    """متن یک رشته (ساده یا rich text) بدون متن آوایی rPh"""
+    t = si.find(NS_MAIN + "t")
+    if t is not None and len(si) == 1:
+        return t.text or ""
+    parts = []
+    for r in si.iter(NS_MAIN + "r"):
+        rt = r.find(NS_MAIN + "t")
+        if rt is not None and rt.text:
+            parts.append(rt.text)
+    if not parts and t is not None:
+        return t.text or ""
+    return "".join(parts)
+
+
+# -----------------------------
+class _SheetReader:
+    """handlerهای expat برای XML یک شیت"""
+
+    def __init__(self, shared_strings, date_styles, epoch, usecols=None, width=0, skip_rows=0):
+        self.shared_strings = shared_strings
+        self.date_styles = date_styles
+        self.epoch = epoch
+        self.width = width
+        # ردیف‌های 2 تا skip_last (شماره‌گذاری اکسل) خوانده ولی تبدیل و خروجی داده نمی‌شوند
+        self.skip_last = 1 + skip_rows
+        self.skip_row = False
+        self.skipped_cells = 0
+        self.col_cache = {}
+        self.usecols = sorted(usecols) if usecols is not None else None
+        self.wanted = set(self.usecols) if usecols is not None else None
+
+        self.out = []
+        self.row_num = 0
+        self.cells = None
+        self.col = 0
+        self.cell_type = None
+        self.cell_style = None
+        self.text = None
+        self.skip_cell = False
+
+    def rows(self, stream):
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.StartElementHandler = self._start
+        parser.EndElementHandler = self._end
+        parser.CharacterDataHandler = self._chars
+        if self.skip_last > 1:
+            blocks = _skip_row_blocks(stream, self.skip_last + 1)
+        else:
+            blocks = _read_blocks(stream)
+        for block in blocks:
+            parser.Parse(block, False)
+            if self.out:
+                yield from self.out
+                self.out = []
+        parser.Parse(b"", True)
+        yield from self.out
+        self.out = []
+
+    # -------------------------
+    def _start(self, name, attrs):
+        name = name.rpartition(":")[2]
+        if name == "c":
+            ref = attrs.get("r")
+            if ref:
+                letters = ref.rstrip("0123456789")
+                col = self.col_cache.get(letters)
+                if col is None:
+                    col = self.col_cache[letters] = column_index(letters)
+                self.col = col
+            else:
+                self.col += 1
+            self.cell_type = attrs.get("t", "n")
+            self.cell_style = attrs.get("s")
+            self.skip_cell = self.skip_row
+            if self.wanted is not None and self.col not in self.wanted:
+                self.skip_cell = True
+                self.skipped_cells += not self.skip_row
+            self.text = None
+        elif name == "v" or name == "t":
+            if not self.skip_cell:
+                self.text = [] if self.text is None else self.text
+        elif name == "row":
+            r = attrs.get("r")
+            row_num = int(r) if r else self.row_num + 1
+            # ردیف‌های حذف شده از XML مانند openpyxl به صورت ردیف خالی برگردانده می‌شوند
+            if self.row_num < self.skip_last:
+                # ردیف‌های رد شده حذف شده از XML نیازی به پر شدن ندارند
+                self.row_num = max(self.row_num, min(self.skip_last, row_num - 1))
+            while self.row_num + 1 < row_num:
+                self.row_num += 1
+                if not self._skipped(self.row_num):
+                    self.out.append(self._make_row({}))
+            self.row_num = row_num
+            self.skip_row = self._skipped(row_num)
+            self.cells = {}
+            self.col = -1
+
+    def _chars(self, data):
+        if self.text is not None:
+            self.text.append(data)
+
+    def _end(self, name):
+        name = name.rpartition(":")[2]
+        if name == "c":
+            if not self.skip_cell and self.text is not None:
+                value = self._convert("".join(self.text))
+                if value is not None:
+                    self.cells[self.col] = value
+            self.text = None
+        elif name == "row":
+            if not self.skip_row:
+                self.out.append(self._make_row(self.cells))
+            self.cells = None
+
+    def _skipped(self, row_num):
+        return 1 < row_num <= self.skip_last
+
+    def _make_row(self, cells):
+        if self.usecols is not None:
+            return tuple(cells.get(i) for i in self.usecols)
+        width = max(cells) + 1 if cells else 0
+        if width < self.width:
+            width = self.width
+        return tuple(cells.get(i) for i in range(width))
+
+    def _convert(self, raw):
+        t = self.cell_type
+        if t == "s":
+            return self.shared_strings[int(raw)]
+        if t == "n":
+            if raw == "":
+                return None
+            if "." in raw or "E" in raw or "e" in raw:
+                value = float(raw)
+            else:
+                value = int(raw)
+            kind = self.date_styles.get(self.cell_style) if self.cell_style else None
+            if kind is not None:
+                try:
+                    return from_excel(value, self.epoch, timedelta=(kind == "timedelta"))
+                except (ValueError, OverflowError):
+                    return value
+            return value
+        if t == "b":
+            return raw == "1"
+        if t == "str" or t == "inlineStr":
+            return raw
+        if t == "e":
+            return raw
+        if t == "d":
+            return from_ISO8601(raw)
+        return raw
+
+
+# -----------------------------
+def _read_blocks(stream):
+    while True:
+        block = stream.read(READ_BLOCK)
+        if not block:
+            break
+        yield block
+
+
+def _skip_row_blocks(stream, first_kept):
+    """
+    بلوک‌های XML شیت بدون بایت‌های ردیف‌های بین هدر (ردیف 1) و ردیف first_kept
+    ردیف‌های رد شده به parser داده نمی‌شوند و فقط شماره r تگ‌هایشان با regex دیده می‌شود؛
+    اگر ساختار فایل مطابق انتظار نباشد (مثلاً تگ row بدون r) بلوک‌ها بدون تغییر برگردانده می‌شوند
+    """
+    blocks = _read_blocks(stream)
+    buf = b""
+    header_end = None
+    for block in blocks:
+        buf += block
+        tag = _ROW_TAG.search(buf)
+        if tag is None:
+            continue
+        num = _ROW_NUM.search(tag.group(1))
+        if num is None or int(num.group(1)) != 1:
+            break
+        if tag.group(1).endswith(b"/"):
+            header_end = tag.end()
+        else:
+            end = _ROW_END.search(buf, tag.end())
+            if end is None:
+                continue
+            header_end = end.end()
+        break
+
+    if header_end is None:
+        yield buf
+        yield from blocks
+        return
+
+    yield buf[:header_end]
+    buf = buf[header_end:]
+    while True:
+        for tag in _ROW_TAG.finditer(buf):
+            num = _ROW_NUM.search(tag.group(1))
+            if num is None or int(num.group(1)) >= first_kept:
+                yield buf[tag.start():]
+                yield from blocks
+                return
+        end = _SHEET_DATA_END.search(buf)
+        if end is not None:
+            yield buf[end.start():]
+            yield from blocks
+            return
+        # تگ ناقص انتهای بلوک برای دور بعد نگه داشته می‌شود
+        cut = buf.rfind(b"<")
+        buf = buf[cut:] if cut >= 0 else b""
+        block = next(blocks, None)
+        if block is None:
+            yield buf
+            return
+        buf += block
+
+
+# -----------------------------
+def iter_sheet_rows(path, sheet, usecols=None):
+    """ردیف‌های یک شیت به صورت tuple (مشابه values_only در openpyxl)"""
+    with XlsxWorkbook(path) as wb:
+        yield from wb.iter_rows(sheet, usecols)